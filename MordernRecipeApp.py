@@ -2,26 +2,77 @@ import sys
 import os
 import json
 import time
+
+# Reference point for the startup report (see StartupReporter)
+STARTUP_T0 = time.perf_counter()
+
 import threading
 import sqlite3
 from datetime import datetime
 import random
-import requests
-from io import BytesIO
-import speech_recognition as sr
-from PIL import Image, ImageQt
-import google.generativeai as genai
+
+# speech_recognition and google.generativeai are slow to import and only
+# needed for voice input and generation, so they are imported on first use
+# inside the worker threads rather than here.
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                            QLabel, QPushButton, QTextEdit, QCheckBox, QFrame, QScrollArea,
                            QStackedWidget, QSlider, QLineEdit, QComboBox, QFileDialog, 
-                           QMessageBox, QTabWidget, QGridLayout, QSplashScreen, QProgressBar, QInputDialog)
+                           QMessageBox, QTabWidget, QGridLayout, QSplashScreen, QProgressBar, QInputDialog,
+                           QGraphicsEffect, QGraphicsOpacityEffect, QListWidget, QListWidgetItem, QSpinBox)
 from PyQt6.QtCore import (Qt, QPropertyAnimation, QEasingCurve, QTimer, QSize, 
                         QThread, pyqtSignal, QPoint, QRect, QParallelAnimationGroup, 
-                        QSequentialAnimationGroup, QByteArray, QBuffer, pyqtProperty)
-from PyQt6.QtGui import (QPixmap, QFont, QColor, QPalette, QIcon, QImage, 
+                        QSequentialAnimationGroup, QByteArray, QBuffer, pyqtProperty,
+                        QObject, QPointF, QEvent)
+from PyQt6.QtGui import (QPixmap, QFont, QColor, QPalette, QIcon, 
                        QPainter, QBrush, QLinearGradient, QRadialGradient, 
-                       QPainterPath, QCursor, QFontDatabase, QPen)
+                       QPainterPath, QCursor, QFontDatabase, QPen, QPixmapCache,
+                       QTextDocument, QTextCursor)
+
+from thumbnails import ThumbnailService
+from recipe_images import RecipeImageCache
+from image_generation import ImageGenerationPipeline
+from image_store import ImageStore
+from image_fetcher import ImageFetcher, is_remote_url
+from speech_service import SpeechService, SPEECH_BACKENDS, create_speech_backend
+from dietary import DIET_LABELS
+from cooking_timers import TimerEngine, format_remaining, step_timers
+from recipe_service import DATABASE_PATH, RecipeParseError, RecipeService, create_recipe_backend
+# shopping_list, pantry_index, nutrition, meal_planner, scaling and dedup load
+# numpy, so they are imported on first use to keep them off the startup path
+
+# Static paint layers (backgrounds, gradients) are rendered once into
+# QPixmapCache and composited on every repaint. Set to False to paint
+# everything directly, e.g. when comparing frame times.
+PAINT_CACHE_ENABLED = True
+
+def paint_cached_layer(painter, key, width, height, paint_func):
+    """Draw a static layer of size width x height at the painter origin.
+
+    paint_func(painter) renders the layer. The result is kept in QPixmapCache
+    under key plus the size and device pixel ratio, so it only runs on a miss.
+    """
+    if not PAINT_CACHE_ENABLED:
+        paint_func(painter)
+        return
+
+    dpr = painter.device().devicePixelRatioF()
+    cache_key = f"{key}|{width}x{height}@{dpr:g}"
+    pixmap = QPixmapCache.find(cache_key)
+
+    if pixmap is None:
+        pixmap = QPixmap(max(1, round(width * dpr)), max(1, round(height * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        layer_painter = QPainter(pixmap)
+        layer_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        paint_func(layer_painter)
+        layer_painter.end()
+
+        QPixmapCache.insert(cache_key, pixmap)
+
+    painter.drawPixmap(0, 0, pixmap)
 
 class CircularProgressBar(QWidget):
     def __init__(self, parent=None, value=0, width=200, height=200, progress_width=10, 
@@ -41,6 +92,11 @@ class CircularProgressBar(QWidget):
         self.animation.setDuration(1000)
         self.animation.setEasingCurve(QEasingCurve.Type.OutBack)
         
+        # Paint objects that don't change between frames
+        self.text_font = QFont("Segoe UI", self.font_size, QFont.Weight.Bold)
+        self._arc_pen = None
+        self._arc_pen_key = None
+        
     def setValue(self, value):
         self.animation.setStartValue(self._value)  # Use _value here
         self.animation.setEndValue(value)
@@ -55,28 +111,46 @@ class CircularProgressBar(QWidget):
     
     # Define the property correctly
     value = pyqtProperty(int, get_value, set_value)
-        
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Setup coordinate system
+    
+    def arc_pen(self):
+        """Return the progress arc pen, rebuilt only when its color or width changes"""
+        pen_key = (self.progress_color.rgba(), self.progress_width)
+        if pen_key != self._arc_pen_key:
+            self._arc_pen = QPen(self.progress_color, self.progress_width, Qt.PenStyle.SolidLine)
+            self._arc_pen_key = pen_key
+        return self._arc_pen
+    
+    def paint_background(self, painter):
+        """Paint the static background circle"""
         painter.translate(self.width / 2, self.height / 2)
-        
-        # Draw background circle
-        bg_color = QColor("#3A3F44")
         painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(bg_color)
+        painter.setBrush(QColor("#3A3F44"))
         
         # Calculate the ellipse dimensions (using integers)
         radius_x = int(self.width / 2 - self.progress_width / 2)
         radius_y = int(self.height / 2 - self.progress_width / 2)
         
-        # Draw the background circle
         painter.drawEllipse(-radius_x, -radius_y, radius_x * 2, radius_y * 2)
         
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        # Draw background circle (cached, only repainted on a size change)
+        painter.save()
+        paint_cached_layer(
+            painter,
+            f"progress-bg|{self.progress_width}",
+            self.width, self.height,
+            self.paint_background
+        )
+        painter.restore()
+        
+        # Setup coordinate system
+        painter.translate(self.width / 2, self.height / 2)
+        
         # Draw progress arc
-        painter.setPen(QPen(self.progress_color, self.progress_width, Qt.PenStyle.SolidLine))
+        painter.setPen(self.arc_pen())
         painter.setBrush(Qt.BrushStyle.NoBrush)
         
         # Calculate span angle (full circle = 5760, since Qt uses 16th of degrees)
@@ -97,7 +171,7 @@ class CircularProgressBar(QWidget):
         
         # Draw text
         painter.setPen(self.text_color)
-        painter.setFont(QFont("Segoe UI", self.font_size, QFont.Weight.Bold))
+        painter.setFont(self.text_font)
         
         # Convert values to integers for QRect
         text_rect_x = int(-self.width / 2)
@@ -112,6 +186,8 @@ class CircularProgressBar(QWidget):
         )
 
 
+BUTTON_TEXT_COLOR = QColor("white")
+
 class StylizedButton(QPushButton):
     def __init__(self, text="", parent=None, icon=None, gradient=True,
                 primary_color="#1DCDFE", secondary_color="#2ecc71"):
@@ -157,10 +233,8 @@ class StylizedButton(QPushButton):
         self.animation.start()
         return super().leaveEvent(event)
         
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
+    def paint_body(self, painter):
+        """Paint the rounded button body with its gradient or flat fill"""
         # Calculate rect with rounded corners
         path = QPainterPath()
         path.addRoundedRect(0, 0, self.width(), self.height(), 10, 10)
@@ -174,8 +248,20 @@ class StylizedButton(QPushButton):
         else:
             painter.fillPath(path, QBrush(QColor(self.primary_color)))
         
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        # Body is cached per size, colors and fill style; primary_color and
+        # secondary_color can be reassigned freely since they are in the key
+        if self.gradient:
+            body_key = f"button-body|gradient|{self.primary_color}|{self.secondary_color}"
+        else:
+            body_key = f"button-body|flat|{self.primary_color}"
+        paint_cached_layer(painter, body_key, self.width(), self.height(), self.paint_body)
+        
         # Draw text centered
-        painter.setPen(QColor("white"))
+        painter.setPen(BUTTON_TEXT_COLOR)
         painter.setFont(self.font())
         
         # If has icon, adjust text position
@@ -260,13 +346,117 @@ class AnimatedToggleSwitch(QWidget):
     
     
 
+class HoverScaleEffect(QGraphicsEffect):
+    """Graphics effect that scales a widget's rendering around its center.
+
+    Unlike animating geometry, this never touches the widget's size or
+    position, so the surrounding layout is not invalidated.
+    """
+    MAX_SCALE = 1.05
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._scale = 1.0
+    
+    def get_scale(self):
+        return self._scale
+    
+    def set_scale(self, scale):
+        self._scale = scale
+        self.update()
+    
+    scale = pyqtProperty(float, get_scale, set_scale)
+    
+    def boundingRectFor(self, rect):
+        # Reserve room for the largest scale so the bounds never change mid-animation
+        margin_x = rect.width() * (self.MAX_SCALE - 1) / 2
+        margin_y = rect.height() * (self.MAX_SCALE - 1) / 2
+        return rect.adjusted(-margin_x, -margin_y, margin_x, margin_y)
+    
+    def draw(self, painter):
+        if self._scale == 1.0:
+            self.drawSource(painter)
+            return
+        
+        pixmap, offset = self.sourcePixmap(Qt.CoordinateSystem.LogicalCoordinates)
+        center = self.sourceBoundingRect(Qt.CoordinateSystem.LogicalCoordinates).center()
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.translate(center)
+        painter.scale(self._scale, self._scale)
+        painter.translate(-center)
+        painter.drawPixmap(QPointF(offset), pixmap)
+        painter.restore()
+
+
+class HoverAnimationManager(QObject):
+    """Owns one reusable scale animation per widget.
+    
+    Hovering in or out retargets the widget's existing animation from its
+    current scale, so fast mouse sweeps never stack competing animations.
+    """
+    _shared = None
+    
+    def __init__(self, duration=100, hover_scale=1.04, parent=None):
+        super().__init__(parent)
+        self.duration = duration
+        self.hover_scale = hover_scale
+        self.animations = {}
+    
+    @classmethod
+    def shared(cls):
+        """Return the manager shared by all recipe cards"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    def attach(self, widget):
+        """Install the scale effect on widget and create its single animation"""
+        key = id(widget)
+        if key in self.animations:
+            return
+        
+        effect = HoverScaleEffect(widget)
+        widget.setGraphicsEffect(effect)
+        
+        # Parented to the effect, so Qt frees it together with the widget
+        animation = QPropertyAnimation(effect, b"scale", effect)
+        animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+        self.animations[key] = animation
+        widget.destroyed.connect(lambda _=None, key=key: self.animations.pop(key, None))
+    
+    def set_hovered(self, widget, hovered):
+        """Animate widget toward its hover or resting scale from wherever it is now"""
+        animation = self.animations.get(id(widget))
+        if animation is None:
+            return
+        
+        effect = animation.targetObject()
+        target = self.hover_scale if hovered else 1.0
+        current = effect.scale
+        
+        animation.stop()
+        if current == target:
+            return
+        
+        # Scale the duration by the remaining distance so a retarget mid-flight
+        # moves at the same speed as a full animation
+        distance = abs(target - current) / (self.hover_scale - 1.0)
+        animation.setDuration(max(1, int(self.duration * min(distance, 1.0))))
+        animation.setStartValue(current)
+        animation.setEndValue(target)
+        animation.start()
+    
+
 class RecipeCardWidget(QFrame):
     clicked = pyqtSignal(int)  # Signal to emit when clicked, with recipe ID
     
-    def __init__(self, recipe_id, name, image_path=None, parent=None):
+    def __init__(self, recipe_id, name, image_path=None, parent=None, hover_animations=None, details=None):
         super().__init__(parent)
         self.recipe_id = recipe_id
         self.name = name
+        self.hover_animations = hover_animations or HoverAnimationManager.shared()
         
         # Set up appearance
         self.setFrameShape(QFrame.Shape.StyledPanel)
@@ -282,6 +472,9 @@ class RecipeCardWidget(QFrame):
                 color: white;
                 padding: 10px;
             }
+            #recipeCardDetails {
+                color: #AAA;
+            }
             #recipeCard:hover {
                 background-color: #40454B;
             }
@@ -291,16 +484,14 @@ class RecipeCardWidget(QFrame):
         # Layout
         layout = QVBoxLayout(self)
         
-        # Image (if available)
+        # Image (if available), decoded off the GUI thread by the thumbnail service
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_label.hide()
+        layout.addWidget(self.image_label)
+        self.thumbnail_key = None
         if image_path:
-            image_label = QLabel()
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                pixmap = pixmap.scaled(250, 150, Qt.AspectRatioMode.KeepAspectRatio, 
-                                     Qt.TransformationMode.SmoothTransformation)
-                image_label.setPixmap(pixmap)
-                image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                layout.addWidget(image_label)
+            self.set_image_path(image_path)
         
         # Title
         title_label = QLabel(name)
@@ -309,143 +500,332 @@ class RecipeCardWidget(QFrame):
         title_label.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
         layout.addWidget(title_label)
         
+        # Secondary line, e.g. a nutrition estimate
+        self.details_label = QLabel()
+        self.details_label.setObjectName("recipeCardDetails")
+        self.details_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.details_label.setFont(QFont("Segoe UI", 9))
+        layout.addWidget(self.details_label)
+        self.set_details(details)
+        
         # Set fixed size
         self.setFixedSize(280, 200)
         
+        # Hover scale is painted by a graphics effect, not a geometry change
+        self.hover_animations.attach(self)
+        
+    def set_details(self, text):
+        """Show text under the title, or hide the line when text is empty"""
+        self.details_label.setText(text or "")
+        self.details_label.setVisible(bool(text))
+    
+    def set_image_path(self, image_path):
+        """Show the image at image_path, e.g. once a remote image has been downloaded"""
+        thumbnail_service = ThumbnailService.shared()
+        self.thumbnail_key, pixmap = thumbnail_service.request(image_path, QSize(250, 150))
+        if pixmap is not None:
+            self.image_label.setPixmap(pixmap)
+            self.image_label.show()
+        elif self.thumbnail_key is not None:
+            thumbnail_service.notify(self.thumbnail_key, self, self.set_thumbnail)
+    
+    def set_thumbnail(self, key, pixmap):
+        """Show a thumbnail delivered by the thumbnail service"""
+        # The card may have been given another image since it asked for this one
+        if key != self.thumbnail_key:
+            return
+        if not pixmap.isNull():
+            self.image_label.setPixmap(pixmap)
+            self.image_label.show()
+        
     def mousePressEvent(self, event):
         self.clicked.emit(self.recipe_id)
         return super().mousePressEvent(event)
     
     def enterEvent(self, event):
         # Scale up animation
-        animation = QPropertyAnimation(self, b"geometry")
-        animation.setDuration(100)
-        animation.setStartValue(self.geometry())
-        
-        target_geo = self.geometry()
-        target_geo.setX(target_geo.x() - 5)
-        target_geo.setY(target_geo.y() - 5)
-        target_geo.setWidth(target_geo.width() + 10)
-        target_geo.setHeight(target_geo.height() + 10)
-        
-        animation.setEndValue(target_geo)
-        animation.start()
-        
+        self.hover_animations.set_hovered(self, True)
         return super().enterEvent(event)
     
     def leaveEvent(self, event):
         # Scale down animation
-        animation = QPropertyAnimation(self, b"geometry")
-        animation.setDuration(100)
-        animation.setStartValue(self.geometry())
-        
-        target_geo = self.geometry()
-        target_geo.setX(target_geo.x() + 5)
-        target_geo.setY(target_geo.y() + 5)
-        target_geo.setWidth(target_geo.width() - 10)
-        target_geo.setHeight(target_geo.height() - 10)
-        
-        animation.setEndValue(target_geo)
-        animation.start()
-        
+        self.hover_animations.set_hovered(self, False)
         return super().leaveEvent(event)
 
+class RecipeRenderer:
+    """Renders ingredient and instruction lists into read-only text edits.
+    
+    A full render builds a fresh QTextDocument with a cursor and swaps it in,
+    so the editor lays out once instead of once per QTextEdit.append. Single
+    items can then be appended in place for incremental updates.
+    """
+    @staticmethod
+    def format_ingredient(ingredient):
+        return f"• {ingredient}"
+    
+    @staticmethod
+    def format_instruction(number, instruction):
+        # Each step is followed by an empty line
+        return f"{number}. {instruction}\n"
+    
+    def render_ingredients(self, text_edit, ingredients):
+        self.render_lines(text_edit, [self.format_ingredient(item) for item in ingredients])
+    
+    def render_instructions(self, text_edit, instructions):
+        self.render_lines(text_edit, [
+            self.format_instruction(number, item)
+            for number, item in enumerate(instructions, 1)
+        ])
+    
+    def append_ingredient(self, text_edit, ingredient):
+        self.append_line(text_edit, self.format_ingredient(ingredient))
+    
+    def append_instruction(self, text_edit, number, instruction):
+        self.append_line(text_edit, self.format_instruction(number, instruction))
+    
+    def render_lines(self, text_edit, lines):
+        """Replace the editor's document with one holding a block per line"""
+        document = QTextDocument(text_edit)
+        document.setDefaultFont(text_edit.font())
+        document.setDocumentMargin(text_edit.document().documentMargin())
+        
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        cursor.insertText("\n".join(lines))
+        cursor.endEditBlock()
+        
+        # Documents from earlier renders are ours to free; Qt deletes the
+        # editor's original document itself when it's replaced
+        old_document = text_edit.document()
+        owns_old_document = old_document.parent() is text_edit
+        text_edit.setDocument(document)
+        if owns_old_document:
+            old_document.deleteLater()
+    
+    def append_line(self, text_edit, line):
+        """Append one line as new blocks at the end, laying out only those blocks"""
+        document = text_edit.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not document.isEmpty():
+            cursor.insertBlock()
+        cursor.insertText(line)
+
+
 class AIWorker(QThread):
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
     
-    def __init__(self, api_key, prompt, parent=None):
+    def __init__(self, service, ingredients, diets, parent=None):
         super().__init__(parent)
-        self.api_key = api_key
-        self.prompt = prompt
+        self.service = service
+        self.ingredients = ingredients
+        self.diets = diets
     
     def run(self):
         try:
-            # Configure the API
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            # Call API
-            response = model.generate_content(self.prompt)
-            response_text = response.text
-            
-            # Try to parse JSON
-            try:
-                # Find JSON content 
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                
-                if json_start >= 0 and json_end > json_start:
-                    json_text = response_text[json_start:json_end]
-                    recipe_data = json.loads(json_text)
-                    
-                    # Ensure all required fields are present
-                    required_fields = ["recipe_name", "prep_time", "cook_time", 
-                                      "ingredients", "instructions"]
-                    
-                    for field in required_fields:
-                        if field not in recipe_data:
-                            if field == "recipe_name":
-                                recipe_data["recipe_name"] = "Untitled Recipe"
-                            elif field == "prep_time":
-                                recipe_data["prep_time"] = "15 minutes"
-                            elif field == "cook_time":
-                                recipe_data["cook_time"] = "30 minutes"
-                            elif field == "ingredients":
-                                recipe_data["ingredients"] = ["Ingredients not specified"]
-                            elif field == "instructions":
-                                recipe_data["instructions"] = ["Instructions not available"]
-                    
-                    self.finished.emit(recipe_data)
-                else:
-                    # No valid JSON found, create a simple recipe
-                    self.error.emit("Could not parse AI response as JSON")
-            except json.JSONDecodeError:
-                self.error.emit("Invalid JSON in AI response")
+            self.finished.emit(self.service.generate_recipe(self.ingredients, self.diets))
+        except RecipeParseError as e:
+            self.error.emit(str(e))
         except Exception as e:
             self.error.emit(f"Error: {str(e)}")
 
-class SpeechRecognitionWorker(QThread):
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+class WarmupTask:
+    """One step of the startup warm-up graph"""
+    def __init__(self, name, label, func, critical=True, depends_on=(), background=False):
+        self.name = name
+        self.label = label  # Shown on the splash while the task runs
+        self.func = func
+        self.critical = critical  # The splash waits for critical tasks only
+        self.depends_on = tuple(depends_on)
+        self.background = background  # Run on a thread instead of the GUI thread
+
+
+class StartupWarmup(QObject):
+    """Runs warm-up tasks in dependency order and reports real progress.
     
-    def run(self):
-        recognizer = sr.Recognizer()
+    GUI-thread tasks run one per event-loop turn so the splash keeps painting;
+    background tasks run on daemon threads. critical_finished fires as soon as
+    every critical task is done, finished once everything is.
+    """
+    progress = pyqtSignal(int, int, str)  # critical tasks done, critical total, current label
+    critical_finished = pyqtSignal()
+    finished = pyqtSignal()
+    background_task_done = pyqtSignal(str)
+    
+    def __init__(self, tasks, parent=None):
+        super().__init__(parent)
+        self.tasks = {task.name: task for task in tasks}
+        self.done = set()
+        self.started = set()
+        self.failed = {}
+        self.critical_total = sum(1 for task in tasks if task.critical)
+        self.is_critical_finished = False
+        self.background_task_done.connect(self.mark_done)
+    
+    def start(self, synchronous=False):
+        """Start the warm-up; synchronous runs every GUI-thread task before returning"""
+        if synchronous:
+            while self.run_next():
+                pass
+        else:
+            QTimer.singleShot(0, self.step)
+    
+    def step(self):
+        if self.run_next():
+            QTimer.singleShot(0, self.step)
+    
+    def ready_tasks(self):
+        return [
+            task for name, task in self.tasks.items()
+            if name not in self.started and all(dep in self.done for dep in task.depends_on)
+        ]
+    
+    def run_next(self):
+        """Start ready background tasks and run one GUI-thread task; False when idle"""
+        ready = self.ready_tasks()
+        for task in ready:
+            if task.background:
+                self.started.add(task.name)
+                threading.Thread(target=self.run_background, args=(task,), daemon=True).start()
+        
+        foreground = [task for task in ready if not task.background]
+        if not foreground:
+            return False
+        
+        # Critical tasks first so the splash can go away as early as possible
+        task = min(foreground, key=lambda task: not task.critical)
+        self.started.add(task.name)
+        self.progress.emit(self.critical_done_count(), self.critical_total, task.label)
         try:
-            with sr.Microphone() as source:
-                self.finished.emit("Listening...")
-                
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source)
-                
-                # Listen for audio
-                audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                
-                self.finished.emit("Processing...")
-                
-                # Recognize speech
-                text = recognizer.recognize_google(audio)
-                self.finished.emit(text)
-        except sr.WaitTimeoutError:
-            self.error.emit("No speech detected")
-        except sr.UnknownValueError:
-            self.error.emit("Could not understand audio")
-        except sr.RequestError:
-            self.error.emit("Could not request results; check your network connection")
+            task.func()
         except Exception as e:
-            self.error.emit(f"Error: {str(e)}")
+            self.failed[task.name] = e
+            print(f"Warm-up task '{task.name}' failed: {e}", file=sys.stderr)
+        self.mark_done(task.name)
+        return True
+    
+    def run_background(self, task):
+        try:
+            task.func()
+        except Exception as e:
+            self.failed[task.name] = e
+        self.background_task_done.emit(task.name)
+    
+    def critical_done_count(self):
+        return sum(1 for name in self.done if self.tasks[name].critical)
+    
+    def mark_done(self, name):
+        self.done.add(name)
+        done_count = self.critical_done_count()
+        self.progress.emit(done_count, self.critical_total, "")
+        
+        if not self.is_critical_finished and done_count == self.critical_total:
+            self.is_critical_finished = True
+            self.critical_finished.emit()
+        
+        if len(self.done) == len(self.tasks):
+            self.finished.emit()
+        elif self.tasks[name].background:
+            # A finished background task may unblock GUI-thread tasks
+            QTimer.singleShot(0, self.step)
+
+
+def preload_module(name):
+    """Import a module so its first real use doesn't pay the import cost"""
+    __import__(name)
+
+
+def load_nutrient_table():
+    """Load the shared nutrient table ahead of the first nutrition estimate"""
+    from nutrition import NutritionEngine
+    
+    NutritionEngine.shared()
+
+
+# Recipes in the "Similar recipes" strip under a recipe
+SIMILAR_RECIPES_SHOWN = 8
+
+# How often the cooking timers are checked and redrawn; they keep time by deadline, not by ticks
+TIMER_TICK_MS = 250
+
+# Time filters on history and favorites: (label, minimum, maximum total minutes)
+TIME_FILTERS = [
+    ("Any time", None, None),
+    ("15 min or less", None, 15),
+    ("30 min or less", None, 30),
+    ("45 min or less", None, 45),
+    ("1 hour or less", None, 60),
+    ("Over 1 hour", 61, None)
+]
 
 class ModernRecipeApp(QMainWindow):
-    def __init__(self):
+    # Emitted from fetcher threads; delivered on the GUI thread
+    remote_image_fetched = pyqtSignal(str, str)  # URL, local path
+    meal_plan_ready = pyqtSignal(object)  # MealPlan, or the exception planning raised
+    duplicates_found = pyqtSignal(object)  # Clusters of recipe IDs, or the exception the search raised
+    
+    def __init__(self, show_splash=True):
         super().__init__()
         
         # Set window properties
         self.setWindowTitle("AI Recipe Maker")
         self.setMinimumSize(1200, 800)
         
+        # Recipes, favorites, settings, the shopping list and generation live in the
+        # headless service; the window shows them. API key from the environment for now
+        self.service = RecipeService(DATABASE_PATH, create_recipe_backend(os.environ.get("RECIPE_BACKEND", "gemini")),
+                                     os.environ.get("GEMINI_API_KEY", ""))
+        
         # Initialize variables
         self.current_recipe = None
-        self.favorites = []
+        self.recipe_cache = self.service.recipe_cache  # recipe ID -> recipe data, filled by warm-up and loads
+        self.recipe_renderer = RecipeRenderer()
+        self.displayed_ingredients = []
+        self.recipe_base_servings = None
+        self.recipe_images = RecipeImageCache()
+        self.displayed_recipe_name = None
+        self.recipe_image_key = None
+        
+        # Recipe images are generated in the background after a recipe is saved
+        self.image_pipeline = ImageGenerationPipeline(parent=self)
+        self.image_pipeline.image_ready.connect(self.handle_generated_image)
+        ThumbnailService.shared().thumbnail_ready.connect(self.handle_recipe_image_ready)
+        
+        # Remote image URLs are downloaded through one pooled session
+        self.image_fetcher = ImageFetcher()
+        self.remote_image_fetched.connect(self.handle_remote_image_fetched)
+        self.meal_plan_ready.connect(self.handle_meal_plan)
+        self.duplicates_found.connect(self.handle_duplicates_found)
+        self.recipe_image_url = None
+        self.cards_awaiting_images = {}  # remote URL -> recipe cards to update
+        
+        # Widgets of the shopping list (the list itself is the service's)
+        self.shopping_checkboxes = {}  # ingredient key -> QCheckBox
+        self.shopping_section_labels = {}  # section -> QLabel
+        self.shopping_recipe_rows = {}  # recipe ID -> QFrame
+        
+        # Rows the startup backfills gave parsed times and diet flags
+        self.backfilled_durations = 0
+        self.backfilled_diet_flags = 0
+        
+        # Kitchen timers live here, not in the cooking window, so they outlive it
+        self.timer_engine = TimerEngine()
+        self.timer_tick = QTimer(self)
+        self.timer_tick.setInterval(TIMER_TICK_MS)
+        self.timer_tick.timeout.connect(self.tick_cooking_timers)
+        self.cooking_window = None
+        self.cooking_timer_list = None
+        
+        # One speech session for the app, so calibration happens only once
+        self.speech_backend = os.environ.get("SPEECH_BACKEND", "google")
+        self.speech_service = SpeechService(backend=create_speech_backend(self.speech_backend), parent=self)
+        self.speech_service.status.connect(self.handle_speech_status)
+        self.speech_service.recognized.connect(self.handle_speech_result)
+        self.speech_service.phrase_recognized.connect(self.append_spoken_ingredients)
+        self.speech_service.capture_stopped.connect(self.handle_dictation_stopped)
+        self.speech_service.error.connect(self.handle_speech_error)
+        self.dictating = False
         self.dark_mode = True
         self.filter_options = {
             "vegetarian": False,
@@ -455,14 +835,6 @@ class ModernRecipeApp(QMainWindow):
             "low_carb": False
         }
         
-        # API key - In production, this should be handled more securely
-        self.api_key = ""  # Replace with your API key or get from environment
-        if not self.api_key:
-            self.api_key = os.environ.get("GEMINI_API_KEY", "")
-        
-        # Initialize database
-        self.init_database()
-        
         # Load fonts
         QFontDatabase.addApplicationFont(":/fonts/Montserrat-Bold.ttf")
         QFontDatabase.addApplicationFont(":/fonts/Montserrat-Regular.ttf")
@@ -471,56 +843,110 @@ class ModernRecipeApp(QMainWindow):
         # Setup UI
         self.setup_ui()
         
-        # Load favorites
-        self.load_favorites()
-        
-        # Show splash animation
-        self.show_splash_animation()
+        # Database, caches and slow imports are prepared by the warm-up; the
+        # splash tracks it and goes away once the critical tasks are done
+        self.warmup = StartupWarmup(self.create_warmup_tasks(), self)
+        self.warmup.background_task_done.connect(self.handle_warmup_task_done)
+        if show_splash:
+            self.show_splash_animation()
+        else:
+            self.warmup.start(synchronous=True)
+    
+    @property
+    def favorites(self):
+        """Favorited recipe IDs (empty until the database is open)"""
+        return self.service.favorites or ()
+    
+    # The service's numpy-backed parts, created on first use rather than before the first paint
+    @property
+    def scaled_recipes(self):
+        return self.service.scaled_recipes
+    
+    @property
+    def shopping_list(self):
+        return self.service.shopping_list
+    
+    @property
+    def pantry_index(self):
+        return self.service.pantry_index
+    
+    @property
+    def similarity_index(self):
+        return self.service.similarity_index
+    
+    @property
+    def pantry(self):
+        """Pantry contents, ingredient key -> name as entered (empty until the database is open)"""
+        return self.service.pantry.items if self.service.pantry is not None else {}
+    
+    def create_warmup_tasks(self):
+        """Build the startup warm-up task graph"""
+        return [
+            WarmupTask("database", "Opening recipe library...", self.init_database),
+            WarmupTask("migrations", "Updating database...", self.run_migrations,
+                       depends_on=["database"]),
+            WarmupTask("favorites", "Loading favorites...", self.load_favorites,
+                       depends_on=["migrations"]),
+            WarmupTask("recipes", "Loading recent recipes...", self.service.prime_recipe_cache,
+                       depends_on=["migrations"]),
+            WarmupTask("llm_client", "Loading AI client...",
+                       lambda: preload_module("google.generativeai"),
+                       critical=False, background=True,
+                       # Started after the critical tasks so it doesn't compete with them for the GIL
+                       depends_on=["favorites", "recipes"]),
+            WarmupTask("placeholders", "Preparing images...", self.prerender_placeholders,
+                       critical=False),
+            WarmupTask("image_gc", "Cleaning up images...",
+                       lambda: self.image_store.collect_garbage(),
+                       critical=False, background=True, depends_on=["migrations"]),
+            WarmupTask("nutrition", "Loading nutrient table...", load_nutrient_table,
+                       critical=False),
+            WarmupTask("pantry", "Loading pantry...", self.load_pantry,
+                       critical=False, depends_on=["migrations"]),
+            WarmupTask("pantry_index", "Indexing recipe ingredients...", self.service.build_pantry_index,
+                       critical=False, background=True, depends_on=["migrations"]),
+            WarmupTask("similarity_index", "Indexing similar recipes...", self.service.build_similarity_index,
+                       critical=False, background=True, depends_on=["migrations"]),
+            WarmupTask("durations", "Reading recipe times...", self.backfill_recipe_durations,
+                       critical=False, background=True, depends_on=["migrations"]),
+            WarmupTask("diet_flags", "Classifying recipes...", self.backfill_recipe_diet_flags,
+                       critical=False, background=True, depends_on=["migrations"])
+        ]
+    
+    def handle_warmup_task_done(self, name):
+        """React to background warm-up tasks that feed the UI"""
+        if name == "pantry_index":
+            self.update_pantry_matches()
+        elif name == "similarity_index" and 1 in self.built_pages:
+            self.show_similar_recipes()
+        elif (name == "durations" and self.backfilled_durations
+              or name == "diet_flags" and self.backfilled_diet_flags):
+            # Filters on pages already shown missed the rows just backfilled
+            if 2 in self.built_pages and self.recipe_filters_active(self.favorites_time_filter,
+                                                                     self.favorites_diet_filters):
+                self.load_favorites_page()
+            if 3 in self.built_pages and self.recipe_filters_active(self.history_time_filter,
+                                                                     self.history_diet_filters):
+                self.load_history()
         
     def init_database(self):
-        """Initialize SQLite database"""
+        """Open the recipe library"""
         try:
-            self.conn = sqlite3.connect('recipes.db')
-            self.cursor = self.conn.cursor()
-            
-            # Create tables if they don't exist
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS recipes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                ingredients TEXT NOT NULL,
-                instructions TEXT NOT NULL,
-                image_url TEXT,
-                prep_time TEXT,
-                cook_time TEXT,
-                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+            self.service.open()
             
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS favorites (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                recipe_id INTEGER,
-                FOREIGN KEY (recipe_id) REFERENCES recipes (id)
-            )
-            ''')
-            
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dark_mode BOOLEAN DEFAULT 1,
-                vegetarian BOOLEAN DEFAULT 0,
-                vegan BOOLEAN DEFAULT 0,
-                gluten_free BOOLEAN DEFAULT 0,
-                keto BOOLEAN DEFAULT 0,
-                low_carb BOOLEAN DEFAULT 0
-            )
-            ''')
-            
-            self.conn.commit()
+            # Generated images go into the multi-resolution image store
+            self.image_store = ImageStore(DATABASE_PATH)
+            self.image_pipeline.store = self.image_store
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to initialize database: {e}")
     
+    def run_migrations(self):
+        """Apply any schema migrations this database hasn't seen yet"""
+        try:
+            self.service.migrate()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to update database: {e}")
+    
     def setup_ui(self):
         """Set up the entire user interface"""
         # Create central widget
@@ -543,24 +969,47 @@ class ModernRecipeApp(QMainWindow):
         self.content_stack = QStackedWidget()
         main_layout.addWidget(self.content_stack)
         
-        # Create all pages
-        self.create_home_page()
-        self.create_recipe_view_page()
-        self.create_favorites_page()
-        self.create_history_page()
-        self.create_shopping_list_page()
-        self.create_settings_page()
-        
-        # Add pages to stack
-        self.content_stack.addWidget(self.home_page)
-        self.content_stack.addWidget(self.recipe_view_page)
-        self.content_stack.addWidget(self.favorites_page)
-        self.content_stack.addWidget(self.history_page)
-        self.content_stack.addWidget(self.shopping_list_page)
-        self.content_stack.addWidget(self.settings_page)
+        # Pages are built on first navigation; until then the stack holds an
+        # empty placeholder at each page's index
+        self.page_builders = [
+            (self.create_home_page, "home_page"),
+            (self.create_recipe_view_page, "recipe_view_page"),
+            (self.create_favorites_page, "favorites_page"),
+            (self.create_history_page, "history_page"),
+            (self.create_shopping_list_page, "shopping_list_page"),
+            (self.create_settings_page, "settings_page")
+        ]
+        self.built_pages = set()
+        for _ in self.page_builders:
+            self.content_stack.addWidget(QWidget())
         
         # Show home page by default
-        self.content_stack.setCurrentIndex(0)
+        self.show_page(0)
+    
+    def ensure_page(self, index):
+        """Build the page at index if it hasn't been built yet"""
+        if index in self.built_pages:
+            return
+        
+        builder, attribute = self.page_builders[index]
+        builder()
+        page = getattr(self, attribute)
+        
+        # Swap the placeholder for the real page, keeping the index
+        placeholder = self.content_stack.widget(index)
+        self.content_stack.insertWidget(index, page)
+        self.content_stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        
+        self.built_pages.add(index)
+    
+    def show_page(self, index):
+        """Switch the content stack to a page, building it on first use"""
+        self.ensure_page(index)
+        self.content_stack.setCurrentIndex(index)
+        
+        if index in (2, 3):  # Favorites and History
+            self.prefetch_page_images(index)
     
     def create_sidebar(self):
         """Create the sidebar with navigation buttons"""
@@ -614,7 +1063,7 @@ class ModernRecipeApp(QMainWindow):
                 gradient=False,
                 primary_color="#2D3035"
             )
-            button.clicked.connect(lambda checked, page=item["page"]: self.content_stack.setCurrentIndex(page))
+            button.clicked.connect(lambda checked, page=item["page"]: self.show_page(page))
             sidebar_layout.addWidget(button)
             self.nav_buttons.append(button)
         
@@ -656,7 +1105,9 @@ class ModernRecipeApp(QMainWindow):
                 padding: 15px;
             }
         """)
-        ingredients_layout = QVBoxLayout(ingredients_group)
+        ingredients_group_layout = QHBoxLayout(ingredients_group)
+        ingredients_layout = QVBoxLayout()
+        ingredients_group_layout.addLayout(ingredients_layout, 3)
         
         # Title for ingredients
         ing_title = QLabel("Ingredients")
@@ -681,6 +1132,15 @@ class ModernRecipeApp(QMainWindow):
         self.voice_button.clicked.connect(self.add_ingredients_by_voice)
         ing_button_row.addWidget(self.voice_button)
         
+        # Continuous dictation button
+        self.dictate_button = StylizedButton(
+            text="Dictate",
+            primary_color="#8E44AD",
+            secondary_color="#9B59B6"
+        )
+        self.dictate_button.clicked.connect(self.toggle_dictation)
+        ing_button_row.addWidget(self.dictate_button)
+        
         # Clear button
         self.clear_button = StylizedButton(
             text="Clear",
@@ -691,6 +1151,9 @@ class ModernRecipeApp(QMainWindow):
         ing_button_row.addWidget(self.clear_button)
         
         ingredients_layout.addLayout(ing_button_row)
+        
+        # Pantry and the recipes it covers, beside the ingredients input
+        ingredients_group_layout.addWidget(self.create_pantry_panel(), 2)
         home_layout.addWidget(ingredients_group)
         
         # Dietary preferences section
@@ -776,6 +1239,8 @@ class ModernRecipeApp(QMainWindow):
 
     def create_recipe_view_page(self):
         """Create the recipe view page"""
+        from scaling import MAX_SERVINGS
+        
         self.recipe_view_page = QWidget()
         recipe_layout = QVBoxLayout(self.recipe_view_page)
         recipe_layout.setContentsMargins(30, 30, 30, 30)
@@ -844,6 +1309,19 @@ class ModernRecipeApp(QMainWindow):
         
         recipe_details_layout.addLayout(time_layout)
         
+        # Nutrition estimate
+        nutrition_layout = QHBoxLayout()
+        
+        nutrition_label = QLabel("Nutrition:")
+        nutrition_label.setFont(QFont("Montserrat", 12, QFont.Weight.Bold))
+        nutrition_layout.addWidget(nutrition_label)
+        
+        self.nutrition_value = QLabel("N/A")
+        self.nutrition_value.setWordWrap(True)
+        nutrition_layout.addWidget(self.nutrition_value, 1)
+        
+        recipe_details_layout.addLayout(nutrition_layout)
+        
         # Action buttons
         action_layout = QHBoxLayout()
         
@@ -888,9 +1366,25 @@ class ModernRecipeApp(QMainWindow):
         """)
         ingredients_layout = QVBoxLayout(ingredients_frame)
         
+        ingredients_header = QHBoxLayout()
+        
         ingredients_title = QLabel("Ingredients")
         ingredients_title.setFont(QFont("Montserrat", 18, QFont.Weight.Bold))
-        ingredients_layout.addWidget(ingredients_title)
+        ingredients_header.addWidget(ingredients_title)
+        
+        ingredients_header.addStretch()
+        
+        # Servings; changing them rescales the ingredients locally
+        servings_label = QLabel("Servings:")
+        servings_label.setFont(QFont("Montserrat", 12, QFont.Weight.Bold))
+        ingredients_header.addWidget(servings_label)
+        
+        self.servings_spin = QSpinBox()
+        self.servings_spin.setRange(1, MAX_SERVINGS)
+        self.servings_spin.valueChanged.connect(self.show_scaled_ingredients)
+        ingredients_header.addWidget(self.servings_spin)
+        
+        ingredients_layout.addLayout(ingredients_header)
         
         self.ingredients_list = QTextEdit()
         self.ingredients_list.setReadOnly(True)
@@ -922,6 +1416,33 @@ class ModernRecipeApp(QMainWindow):
         
         self.recipe_content_layout.addWidget(instructions_frame)
         
+        # Similar recipes strip, filled in by show_similar_recipes
+        self.similar_recipes_frame = QFrame()
+        self.similar_recipes_frame.setObjectName("similarRecipesFrame")
+        self.similar_recipes_frame.setStyleSheet("""
+            #similarRecipesFrame {
+                background-color: #2D3035;
+                border-radius: 15px;
+                padding: 15px;
+            }
+        """)
+        similar_layout = QVBoxLayout(self.similar_recipes_frame)
+        
+        similar_title = QLabel("Similar Recipes")
+        similar_title.setFont(QFont("Montserrat", 18, QFont.Weight.Bold))
+        similar_layout.addWidget(similar_title)
+        
+        self.similar_recipes_list = QListWidget()
+        self.similar_recipes_list.setFlow(QListWidget.Flow.LeftToRight)
+        self.similar_recipes_list.setWrapping(False)
+        self.similar_recipes_list.setSpacing(6)
+        self.similar_recipes_list.setFixedHeight(60)
+        self.similar_recipes_list.itemClicked.connect(self.open_pantry_match)
+        similar_layout.addWidget(self.similar_recipes_list)
+        
+        self.similar_recipes_frame.hide()
+        self.recipe_content_layout.addWidget(self.similar_recipes_frame)
+        
         # Set the content widget
         recipe_scroll.setWidget(recipe_content)
         recipe_layout.addWidget(recipe_scroll)
@@ -938,6 +1459,15 @@ class ModernRecipeApp(QMainWindow):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         favorites_layout.addWidget(title_label)
         
+        # Diet and time filters
+        filter_layout = QHBoxLayout()
+        filter_layout.addStretch()
+        self.favorites_diet_filters = self.create_diet_filter_checkboxes(filter_layout, self.load_favorites_page)
+        self.favorites_time_filter = self.create_time_filter_combo()
+        self.favorites_time_filter.currentIndexChanged.connect(self.load_favorites_page)
+        filter_layout.addWidget(self.favorites_time_filter)
+        favorites_layout.addLayout(filter_layout)
+        
         # Scroll area for recipe cards
         favorites_scroll = QScrollArea()
         favorites_scroll.setWidgetResizable(True)
@@ -971,6 +1501,23 @@ class ModernRecipeApp(QMainWindow):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         history_layout.addWidget(title_label)
         
+        # Search, diet and time filters; typing reloads after a short pause
+        filter_layout = QHBoxLayout()
+        self.history_search_input = QLineEdit()
+        self.history_search_input.setPlaceholderText("Search recipes by name")
+        self.history_search_timer = QTimer(self)
+        self.history_search_timer.setSingleShot(True)
+        self.history_search_timer.setInterval(250)
+        self.history_search_timer.timeout.connect(self.load_history)
+        self.history_search_input.textChanged.connect(self.history_search_timer.start)
+        filter_layout.addWidget(self.history_search_input, 1)
+        
+        self.history_diet_filters = self.create_diet_filter_checkboxes(filter_layout, self.load_history)
+        self.history_time_filter = self.create_time_filter_combo()
+        self.history_time_filter.currentIndexChanged.connect(self.load_history)
+        filter_layout.addWidget(self.history_time_filter)
+        history_layout.addLayout(filter_layout)
+        
         # Scroll area for recipe history
         history_scroll = QScrollArea()
         history_scroll.setWidgetResizable(True)
@@ -1002,6 +1549,33 @@ class ModernRecipeApp(QMainWindow):
         refresh_button.clicked.connect(self.load_history)
         history_layout.addWidget(refresh_button)
 
+    def create_time_filter_combo(self):
+        """Combo box of TIME_FILTERS; the item data is (minimum, maximum) total minutes"""
+        combo = QComboBox()
+        for label, minimum, maximum in TIME_FILTERS:
+            combo.addItem(label, (minimum, maximum))
+        combo.setToolTip("Total prep and cook time")
+        return combo
+    
+    def create_diet_filter_checkboxes(self, layout, slot):
+        """Add a checkbox per diet to layout, each calling slot when toggled; returns {diet: QCheckBox}"""
+        checkboxes = {}
+        for diet, label in DIET_LABELS.items():
+            checkbox = QCheckBox(label)
+            checkbox.toggled.connect(lambda checked: slot())
+            layout.addWidget(checkbox)
+            checkboxes[diet] = checkbox
+        return checkboxes
+    
+    def recipe_filter_values(self, time_combo, diet_checkboxes):
+        """(minimum, maximum, diets) a page's time and diet filters ask for"""
+        minimum, maximum = time_combo.currentData()
+        return minimum, maximum, [diet for diet, checkbox in diet_checkboxes.items() if checkbox.isChecked()]
+    
+    def recipe_filters_active(self, time_combo, diet_checkboxes):
+        """True if a page's filters narrow its recipes at all"""
+        return bool(time_combo.currentIndex()) or any(checkbox.isChecked() for checkbox in diet_checkboxes.values())
+
     def create_shopping_list_page(self):
         """Create the shopping list page"""
         self.shopping_list_page = QWidget()
@@ -1014,6 +1588,73 @@ class ModernRecipeApp(QMainWindow):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         shopping_layout.addWidget(title_label)
         
+        # Recipes on the list, each removable
+        self.shopping_recipes_frame = QFrame()
+        self.shopping_recipes_frame.setObjectName("shoppingRecipes")
+        self.shopping_recipes_frame.setStyleSheet("""
+            #shoppingRecipes {
+                background-color: #2D3035;
+                border-radius: 10px;
+                padding: 10px;
+            }
+        """)
+        self.shopping_recipes_layout = QVBoxLayout(self.shopping_recipes_frame)
+        self.shopping_recipes_layout.setSpacing(5)
+        self.shopping_recipes_frame.hide()
+        shopping_layout.addWidget(self.shopping_recipes_frame)
+        
+        # Meal planner: picks recipes for the week and adds them to the list
+        planner_frame = QFrame()
+        planner_frame.setObjectName("mealPlanner")
+        planner_frame.setStyleSheet("""
+            #mealPlanner {
+                background-color: #2D3035;
+                border-radius: 10px;
+                padding: 10px;
+            }
+        """)
+        planner_layout = QVBoxLayout(planner_frame)
+        planner_controls = QHBoxLayout()
+        
+        planner_controls.addWidget(QLabel("Plan"))
+        self.plan_days_spin = QSpinBox()
+        self.plan_days_spin.setRange(1, 14)
+        self.plan_days_spin.setValue(7)
+        self.plan_days_spin.setSuffix(" days")
+        planner_controls.addWidget(self.plan_days_spin)
+        
+        planner_controls.addWidget(QLabel("up to"))
+        self.plan_minutes_spin = QSpinBox()
+        self.plan_minutes_spin.setRange(0, 240)
+        self.plan_minutes_spin.setSingleStep(15)
+        self.plan_minutes_spin.setSuffix(" min")
+        self.plan_minutes_spin.setSpecialValueText("any time")
+        planner_controls.addWidget(self.plan_minutes_spin)
+        
+        self.plan_favorites_checkbox = QCheckBox("Favorites only")
+        planner_controls.addWidget(self.plan_favorites_checkbox)
+        planner_controls.addStretch()
+        
+        self.plan_button = StylizedButton(
+            text="Plan Meals",
+            primary_color="#2ecc71",
+            secondary_color="#27ae60"
+        )
+        self.plan_button.setToolTip("Picks saved recipes that share ingredients and cook quickly, "
+                                    "using the dietary preferences and pantry from the home page")
+        self.plan_button.clicked.connect(self.plan_meals)
+        planner_controls.addWidget(self.plan_button)
+        planner_layout.addLayout(planner_controls)
+        
+        # Planned meals; click one to open it
+        self.meal_plan_list = QListWidget()
+        self.meal_plan_list.setMaximumHeight(160)
+        self.meal_plan_list.itemClicked.connect(self.open_pantry_match)
+        self.meal_plan_list.hide()
+        planner_layout.addWidget(self.meal_plan_list)
+        
+        shopping_layout.addWidget(planner_frame)
+        
         # Scroll area for shopping items
         shopping_scroll = QScrollArea()
         shopping_scroll.setWidgetResizable(True)
@@ -1031,6 +1672,7 @@ class ModernRecipeApp(QMainWindow):
         self.empty_shopping_list_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.empty_shopping_list_label.setStyleSheet("color: #888;")
         self.shopping_container_layout.addWidget(self.empty_shopping_list_label)
+        self.shopping_container_layout.addStretch()
         
         shopping_scroll.setWidget(self.shopping_container)
         shopping_layout.addWidget(shopping_scroll)
@@ -1089,7 +1731,7 @@ class ModernRecipeApp(QMainWindow):
         
         self.api_key_input = QLineEdit()
         self.api_key_input.setPlaceholderText("Enter your Google Gemini API key")
-        self.api_key_input.setText(self.api_key)
+        self.api_key_input.setText(self.service.api_key)
         self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
         api_key_layout.addWidget(self.api_key_input)
         
@@ -1120,6 +1762,24 @@ class ModernRecipeApp(QMainWindow):
         
         settings_frame_layout.addLayout(appearance_layout)
         
+        # Speech recognizer setting
+        speech_layout = QHBoxLayout()
+        
+        speech_label = QLabel("Speech Recognizer:")
+        speech_label.setFont(QFont("Montserrat", 12))
+        speech_layout.addWidget(speech_label)
+        
+        speech_layout.addStretch()
+        
+        self.speech_backend_combo = QComboBox()
+        for name, backend in SPEECH_BACKENDS.items():
+            self.speech_backend_combo.addItem(backend.label, name)
+        self.speech_backend_combo.setCurrentIndex(max(0, self.speech_backend_combo.findData(self.speech_backend)))
+        self.speech_backend_combo.currentIndexChanged.connect(self.set_speech_backend)
+        speech_layout.addWidget(self.speech_backend_combo)
+        
+        settings_frame_layout.addLayout(speech_layout)
+        
         # Default dietary preferences
         diet_pref_label = QLabel("Default Dietary Preferences:")
         diet_pref_label.setFont(QFont("Montserrat", 12, QFont.Weight.Bold))
@@ -1150,6 +1810,25 @@ class ModernRecipeApp(QMainWindow):
         
         settings_frame_layout.addLayout(diet_grid)
         
+        # Library maintenance
+        library_layout = QHBoxLayout()
+        
+        library_label = QLabel("Recipe Library:")
+        library_label.setFont(QFont("Montserrat", 12))
+        library_layout.addWidget(library_label)
+        
+        library_layout.addStretch()
+        
+        self.dedup_button = StylizedButton(
+            text="Find Duplicate Recipes",
+            primary_color="#3498DB",
+            secondary_color="#2980B9"
+        )
+        self.dedup_button.clicked.connect(self.find_duplicate_recipes)
+        library_layout.addWidget(self.dedup_button)
+        
+        settings_frame_layout.addLayout(library_layout)
+        
         # Add space
         settings_frame_layout.addStretch()
         
@@ -1327,52 +2006,217 @@ class ModernRecipeApp(QMainWindow):
         """)
         splash_layout.addSpacing(20)
         splash_layout.addWidget(progress_bar, 0, Qt.AlignmentFlag.AlignCenter)
+        
+        # Current warm-up step
+        status_label = QLabel("")
+        status_label.setStyleSheet("color: #888; background: transparent;")
+        status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        splash_layout.addWidget(status_label)
         splash_layout.addStretch(1)
         
         # Show overlay
         self.splash_overlay.show()
         
-        # Animate progress bar
-        self.splash_timer = QTimer()
-        self.splash_progress = 0
-        
-        def update_progress():
-            self.splash_progress += 4  # Increment progress
-            progress_bar.setValue(self.splash_progress)
-            
-            # When complete, remove splash
-            if self.splash_progress >= 100:
-                self.splash_timer.stop()
-                # Hide splash with fade out animation
-                self.splash_fade = QPropertyAnimation(self.splash_overlay, b"windowOpacity")
-                self.splash_fade.setStartValue(1.0)
-                self.splash_fade.setEndValue(0.0)
-                self.splash_fade.setDuration(500)
-                self.splash_fade.finished.connect(self.splash_overlay.deleteLater)
-                self.splash_fade.start()
-        
-        self.splash_timer.timeout.connect(update_progress)
-        self.splash_timer.start(30)  # Update every 30ms
+        # Progress follows the real warm-up work
+        def update_progress(done, total, label):
+            progress_bar.setValue(int(done * 100 / total) if total else 100)
+            if label:
+                status_label.setText(label)
+        
+        def hide_splash():
+            self.warmup.progress.disconnect(update_progress)
+            
+            # Short fade out, then remove the overlay
+            opacity = QGraphicsOpacityEffect(self.splash_overlay)
+            self.splash_overlay.setGraphicsEffect(opacity)
+            self.splash_fade = QPropertyAnimation(opacity, b"opacity")
+            self.splash_fade.setStartValue(1.0)
+            self.splash_fade.setEndValue(0.0)
+            self.splash_fade.setDuration(150)
+            self.splash_fade.finished.connect(self.splash_overlay.deleteLater)
+            self.splash_fade.start()
+        
+        self.warmup.progress.connect(update_progress)
+        self.warmup.critical_finished.connect(hide_splash)
+        self.warmup.start()
 
+    def create_pantry_panel(self):
+        """Create the pantry panel with recipes that can be cooked from it"""
+        panel = QFrame()
+        panel_layout = QVBoxLayout(panel)
+        panel_layout.setContentsMargins(10, 0, 0, 0)
+        
+        pantry_title = QLabel("My Pantry")
+        pantry_title.setFont(QFont("Montserrat", 14, QFont.Weight.Bold))
+        panel_layout.addWidget(pantry_title)
+        
+        # Entry for new pantry items
+        self.pantry_input = QLineEdit()
+        self.pantry_input.setPlaceholderText("Add items, separated by commas, and press Enter")
+        self.pantry_input.returnPressed.connect(self.add_pantry_items)
+        panel_layout.addWidget(self.pantry_input)
+        
+        # Pantry items; double-click removes one
+        self.pantry_list = QListWidget()
+        self.pantry_list.setMaximumHeight(90)
+        self.pantry_list.setToolTip("Double-click an item to remove it")
+        self.pantry_list.itemDoubleClicked.connect(self.remove_pantry_item)
+        panel_layout.addWidget(self.pantry_list)
+        
+        matches_title = QLabel("Cook Now")
+        matches_title.setFont(QFont("Montserrat", 12, QFont.Weight.Bold))
+        panel_layout.addWidget(matches_title)
+        
+        # Saved recipes ranked by pantry coverage; click to open
+        self.pantry_matches_list = QListWidget()
+        self.pantry_matches_list.setWordWrap(True)
+        self.pantry_matches_list.itemClicked.connect(self.open_pantry_match)
+        panel_layout.addWidget(self.pantry_matches_list)
+        
+        # Filled in by load_pantry and the pantry index warm-up
+        return panel
+    
+    def load_pantry(self):
+        """Load pantry items from the database"""
+        try:
+            self.service.pantry.load()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to load pantry: {e}")
+            return
+        
+        if 0 in self.built_pages:
+            self.refresh_pantry_list()
+            self.update_pantry_matches()
+    
+    def backfill_recipe_diet_flags(self):
+        """Classify recipes saved before diet flags existed (runs on a worker thread)"""
+        self.backfilled_diet_flags = self.service.backfill_diet_flags()
+    
+    def backfill_recipe_durations(self):
+        """Parse the times of recipes saved before the minutes columns existed (runs on a worker thread)"""
+        self.backfilled_durations = self.service.backfill_durations()
+    
+    def add_pantry_items(self):
+        """Add the comma-separated items typed into the pantry entry"""
+        from pantry_index import pantry_key
+        
+        added = False
+        items = []
+        for text in self.pantry_input.text().split(","):
+            name = text.strip()
+            key = pantry_key(name) if name else None
+            if key:
+                items.append((key, name))
+        try:
+            added = self.service.pantry.add(items)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to update pantry: {e}")
+        
+        self.pantry_input.clear()
+        if added:
+            self.refresh_pantry_list()
+            self.update_pantry_matches()
+    
+    def remove_pantry_item(self, item):
+        """Remove a pantry item"""
+        key = item.data(Qt.ItemDataRole.UserRole)
+        try:
+            self.service.pantry.remove(key)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to update pantry: {e}")
+            return
+        
+        self.refresh_pantry_list()
+        self.update_pantry_matches()
+    
+    def refresh_pantry_list(self):
+        """Show the current pantry items"""
+        self.pantry_list.clear()
+        for key, name in self.pantry.items():
+            item = QListWidgetItem(name)
+            item.setData(Qt.ItemDataRole.UserRole, key)
+            self.pantry_list.addItem(item)
+    
+    def update_pantry_matches(self):
+        """Rank saved recipes by how much of each the pantry covers"""
+        if 0 not in self.built_pages:
+            return
+        self.pantry_matches_list.clear()
+        
+        if not self.pantry_index.ready:
+            self.pantry_matches_list.addItem("Indexing your recipes...")
+            return
+        if not self.pantry:
+            self.pantry_matches_list.addItem("Add what's in your pantry to see recipes you can cook.")
+            return
+        
+        matches = self.pantry_index.rank(self.pantry.keys(), max_missing=2, limit=20)
+        if not matches:
+            self.pantry_matches_list.addItem("No saved recipes are within two items of your pantry.")
+            return
+        
+        try:
+            names = self.service.recipe_names([match.recipe_id for match in matches])
+        except sqlite3.Error:
+            names = {}
+        
+        for match in matches:
+            name = names.get(match.recipe_id, f"Recipe {match.recipe_id}")
+            if match.missing:
+                text = f"{name}\n    missing {', '.join(match.missing)}"
+            else:
+                text = f"{name}\n    you have everything"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, match.recipe_id)
+            self.pantry_matches_list.addItem(item)
+    
+    def open_pantry_match(self, item):
+        """Open the recipe behind a pantry match"""
+        recipe_id = item.data(Qt.ItemDataRole.UserRole)
+        if recipe_id is not None:
+            self.load_recipe(recipe_id)
+    
     def add_ingredients_by_voice(self):
         """Use speech recognition to add ingredients"""
         # Show status
         self.voice_button.setText("Listening...")
         self.voice_button.setEnabled(False)
         
-        # Start worker thread
-        self.speech_worker = SpeechRecognitionWorker()
-        self.speech_worker.finished.connect(self.handle_speech_result)
-        self.speech_worker.error.connect(self.handle_speech_error)
-        self.speech_worker.start()
+        self.dictate_button.setEnabled(False)
+        
+        # Queue a request on the speech session's worker thread
+        self.speech_service.listen()
 
-    def handle_speech_result(self, text):
-        """Handle the result from speech recognition"""
-        if text == "Listening..." or text == "Processing...":
-            # Status update, not a result
-            self.voice_button.setText(text)
+    def toggle_dictation(self):
+        """Start or stop continuous voice capture of ingredients"""
+        if self.dictating:
+            # Phrases already captured are still recognized and added
+            self.speech_service.stop_continuous()
+            self.dictate_button.setText("Finishing...")
+            self.dictate_button.setEnabled(False)
             return
         
+        self.dictating = True
+        self.dictate_button.setText("Stop Dictation")
+        self.voice_button.setEnabled(False)
+        self.speech_service.start_continuous()
+
+    def handle_dictation_stopped(self):
+        """Reset the voice buttons once dictation has finished"""
+        self.dictating = False
+        self.dictate_button.setText("Dictate")
+        self.dictate_button.setEnabled(True)
+        self.voice_button.setEnabled(True)
+
+    def handle_speech_status(self, status):
+        """Show speech session progress on the voice button"""
+        if self.dictating:
+            # The dictate button keeps offering to stop while capturing
+            return
+        self.voice_button.setText(status)
+
+    def append_spoken_ingredients(self, text):
+        """Append recognized speech to the ingredients list"""
         # Get current ingredients
         current_text = self.ingredients_input.toPlainText().strip()
         
@@ -1384,16 +2228,32 @@ class ModernRecipeApp(QMainWindow):
         
         # Update textbox
         self.ingredients_input.setPlainText(new_text)
+
+    def handle_speech_result(self, text):
+        """Handle the result from speech recognition"""
+        self.append_spoken_ingredients(text)
         
-        # Reset button
+        # Reset buttons
         self.voice_button.setText("Add by Voice")
         self.voice_button.setEnabled(True)
+        self.dictate_button.setEnabled(True)
 
     def handle_speech_error(self, error_message):
         """Handle speech recognition errors"""
         QMessageBox.warning(self, "Voice Input", error_message)
+        if self.dictating:
+            # Dictation keeps going; capture_stopped resets the buttons
+            return
         self.voice_button.setText("Add by Voice")
         self.voice_button.setEnabled(True)
+        self.dictate_button.setEnabled(True)
+
+    def set_speech_backend(self, index):
+        """Switch the speech recognizer used for voice input"""
+        name = self.speech_backend_combo.itemData(index)
+        if name and name != self.speech_backend:
+            self.speech_backend = name
+            self.speech_service.set_backend(create_speech_backend(name))
 
     def update_filter_option(self, key, state):
         """Update filter options when checkboxes are clicked"""
@@ -1408,7 +2268,7 @@ class ModernRecipeApp(QMainWindow):
             QMessageBox.warning(self, "Input Required", "Please enter some ingredients.")
             return
         
-        if not self.api_key:
+        if not self.service.can_generate:
             QMessageBox.warning(self, "API Key Required", 
                             "Please set your Google Gemini API key in Settings.")
             return
@@ -1433,32 +2293,9 @@ class ModernRecipeApp(QMainWindow):
         self.progress_timer.timeout.connect(update_progress)
         self.progress_timer.start(100)  # Update every 100ms
         
-        # Get active filters
-        active_filters = []
-        for filter_name, is_active in self.filter_options.items():
-            if is_active:
-                active_filters.append(filter_name.replace("_", " ").title())
-        
-        # Build prompt
-        prompt = f"Create a detailed recipe using these ingredients: {ingredients}."
-        
-        if active_filters:
-            prompt += f" The recipe should be {', '.join(active_filters)}."
-        
-        prompt += """ Return the response as a JSON object with the following structure:
-        {
-            "recipe_name": "Name of the recipe",
-            "prep_time": "Preparation time",
-            "cook_time": "Cooking time",
-            "ingredients": ["Ingredient 1", "Ingredient 2", ...],
-            "instructions": ["Step 1", "Step 2", ...],
-            "image_prompt": "A detailed prompt to generate an image for this dish"
-        }
-        Only respond with the JSON object, no introduction or additional text.
-        """
-        
-        # Start the AI worker thread
-        self.ai_worker = AIWorker(self.api_key, prompt)
+        # Prompt building and reading the reply happen in the service, on the worker thread
+        diets = [filter_name for filter_name, is_active in self.filter_options.items() if is_active]
+        self.ai_worker = AIWorker(self.service, ingredients, diets)
         self.ai_worker.finished.connect(self.handle_recipe_result)
         self.ai_worker.error.connect(self.handle_recipe_error)
         self.ai_worker.start()
@@ -1473,13 +2310,17 @@ class ModernRecipeApp(QMainWindow):
         QTimer.singleShot(500, lambda: self.reset_recipe_ui())
         
         # Save recipe to database
-        self.save_recipe_to_db(recipe_data)
+        recipe_id = self.save_recipe_to_db(recipe_data)
         
         # Display the recipe
         self.display_recipe(recipe_data)
         
         # Switch to recipe view page
-        self.content_stack.setCurrentIndex(1)  # Recipe View page
+        self.show_page(1)  # Recipe View page
+        
+        # Generate the dish image in the background; the view updates when it arrives
+        if recipe_id is not None:
+            self.image_pipeline.submit(recipe_id, recipe_data.get("image_prompt"))
 
     def handle_recipe_error(self, error_message):
         """Handle recipe generation errors"""
@@ -1501,37 +2342,24 @@ class ModernRecipeApp(QMainWindow):
         self.generate_button.setText("Generate Recipe")
 
     def save_recipe_to_db(self, recipe_data):
-        """Save recipe to database"""
+        """Save recipe to database and return its ID (None on failure)"""
         try:
-            # Convert lists to JSON strings
-            ingredients_json = json.dumps(recipe_data.get("ingredients", []))
-            instructions_json = json.dumps(recipe_data.get("instructions", []))
-            
-            # Insert recipe into database
-            self.cursor.execute("""
-            INSERT INTO recipes (name, ingredients, instructions, prep_time, cook_time)
-            VALUES (?, ?, ?, ?, ?)
-            """, (
-                recipe_data.get("recipe_name", "Untitled Recipe"),
-                ingredients_json,
-                instructions_json,
-                recipe_data.get("prep_time", "N/A"),
-                recipe_data.get("cook_time", "N/A")
-            ))
-            
-            self.conn.commit()
-            
-            # Get the ID of the newly inserted recipe
-            recipe_id = self.cursor.lastrowid
-            
-            # Store the ID for reference
-            self.current_recipe = recipe_id
-            
+            recipe_id = self.service.save_recipe(recipe_data)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to save recipe: {e}")
+            return None
+        
+        # Store the ID for reference; the service has indexed it for pantry matches
+        self.current_recipe = recipe_id
+        self.update_pantry_matches()
+        return recipe_id
 
     def display_recipe(self, recipe_data):
         """Display the recipe in the recipe view page"""
+        from scaling import recipe_servings
+        
+        self.ensure_page(1)
+        
         # Update recipe title
         self.recipe_title.setText(recipe_data.get("recipe_name", "Untitled Recipe"))
         
@@ -1539,18 +2367,23 @@ class ModernRecipeApp(QMainWindow):
         self.prep_time_value.setText(recipe_data.get("prep_time", "N/A"))
         self.cook_time_value.setText(recipe_data.get("cook_time", "N/A"))
         
-        # Update ingredients
-        self.ingredients_list.clear()
-        for ingredient in recipe_data.get("ingredients", []):
-            self.ingredients_list.append(f"• {ingredient}")
+        # Start at the servings the recipe was written for
+        self.displayed_ingredients = recipe_data.get("ingredients", [])
+        self.recipe_base_servings = recipe_servings(recipe_data.get("servings"))
+        self.servings_spin.blockSignals(True)
+        self.servings_spin.setValue(self.recipe_base_servings)
+        self.servings_spin.blockSignals(False)
         
-        # Update instructions
-        self.instructions_list.clear()
-        for i, instruction in enumerate(recipe_data.get("instructions", []), 1):
-            self.instructions_list.append(f"{i}. {instruction}\n")
+        # Update ingredients and instructions, one layout pass each
+        self.recipe_renderer.render_ingredients(self.ingredients_list, self.displayed_ingredients)
+        self.recipe_renderer.render_instructions(self.instructions_list, recipe_data.get("instructions", []))
+        self.show_nutrition(self.displayed_ingredients, self.recipe_base_servings)
+        self.show_similar_recipes()
         
-        # Set placeholder image
-        self.set_placeholder_image()
+        # Set placeholder image, replaced by the stored image once it's decoded
+        self.set_placeholder_image(recipe_data.get("recipe_name", "Untitled Recipe"))
+        if recipe_data.get("image_url"):
+            self.show_recipe_image(recipe_data["image_url"])
         
         # Update favorite button state
         if self.current_recipe in self.favorites:
@@ -1563,77 +2396,169 @@ class ModernRecipeApp(QMainWindow):
             self.favorite_button.secondary_color = "#D35400"
         self.favorite_button.update()
 
-    def set_placeholder_image(self):
-        """Set a placeholder image for the recipe"""
-        # Create a placeholder image with a gradient background and food icon
-        image = QImage(300, 200, QImage.Format.Format_ARGB32)
-        image.fill(Qt.GlobalColor.transparent)
-        
-        painter = QPainter(image)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Create gradient background
-        gradient = QLinearGradient(0, 0, 300, 200)
-        gradient.setColorAt(0, QColor(45, 48, 53))
-        gradient.setColorAt(1, QColor(32, 35, 40))
-        painter.fillRect(0, 0, 300, 200, gradient)
-        
-        # Draw a plate icon or food symbol in the center
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(QColor(200, 200, 200, 80))
-        painter.drawEllipse(100, 50, 100, 100)
-        
-        painter.setPen(QPen(QColor(150, 150, 150), 3))
-        painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.drawEllipse(115, 65, 70, 70)
-        
-        # Draw a fork and knife
-        painter.drawLine(150, 80, 150, 120)
-        painter.drawLine(130, 100, 170, 100)
+    def show_scaled_ingredients(self, servings):
+        """Show the displayed recipe's ingredients rescaled to servings, without asking the AI again"""
+        ingredients = self.scaled_recipes.get(self.current_recipe, self.displayed_ingredients,
+                                              self.recipe_base_servings, servings)
+        self.recipe_renderer.render_ingredients(self.ingredients_list, ingredients)
+    
+    def show_nutrition(self, ingredients, servings):
+        """Show the per-serving nutrition estimate for the displayed recipe"""
+        from nutrition import NutritionEngine, per_serving
+        
+        nutrition = NutritionEngine.shared().estimate(ingredients)
+        if not nutrition.matched:
+            self.nutrition_value.setText("N/A")
+            self.nutrition_value.setToolTip("")
+            return
         
-        painter.end()
+        serving = per_serving(nutrition, servings)
+        self.nutrition_value.setText(
+            f"~{serving.kcal:.0f} kcal · {serving.protein:.0f} g protein · {serving.fat:.0f} g fat · "
+            f"{serving.carbs:.0f} g carbs per serving"
+        )
+        self.nutrition_value.setToolTip(
+            f"Estimated from {nutrition.matched} of {nutrition.total} ingredients, "
+            f"for a recipe that serves {servings}"
+        )
+    
+    def show_similar_recipes(self):
+        """Fill the similar recipes strip for the displayed recipe"""
+        self.similar_recipes_list.clear()
+        matches = []
+        if self.similarity_index.ready and self.current_recipe is not None:
+            matches = self.similarity_index.similar(self.current_recipe, SIMILAR_RECIPES_SHOWN)
+        if not matches:
+            self.similar_recipes_frame.hide()
+            return
         
-        # Set the image
-        pixmap = QPixmap.fromImage(image)
+        try:
+            names = self.service.recipe_names([match.recipe_id for match in matches])
+        except sqlite3.Error:
+            names = {}
+        
+        for match in matches:
+            if match.recipe_id not in names:
+                continue
+            item = QListWidgetItem(names[match.recipe_id])
+            item.setData(Qt.ItemDataRole.UserRole, match.recipe_id)
+            item.setToolTip(f"{match.score:.0%} similar")
+            self.similar_recipes_list.addItem(item)
+        self.similar_recipes_frame.setVisible(self.similar_recipes_list.count() > 0)
+    
+    def recipe_nutrition(self, recipes):
+        """Cached nutrition totals for {recipe ID: ingredients JSON}; empty on errors"""
+        try:
+            ingredients = {recipe_id: json.loads(ingredients_json) for recipe_id, ingredients_json in recipes.items()}
+            return self.service.nutrition_totals(ingredients)
+        except (sqlite3.Error, json.JSONDecodeError):
+            # Nutrition is an annotation; the lists still work without it
+            return {}
+    
+    def set_placeholder_image(self, recipe_name=None):
+        """Set the recipe's placeholder art, or the generic placeholder without a name"""
+        self.displayed_recipe_name = recipe_name
+        self.recipe_image_key = None
+        self.recipe_image_url = None
+        dpr = self.recipe_image.devicePixelRatioF()
+        if recipe_name:
+            pixmap = self.recipe_images.recipe_placeholder(recipe_name, dpr, self.dark_mode)
+        else:
+            pixmap = self.recipe_images.placeholder(dpr, self.dark_mode)
         self.recipe_image.setPixmap(pixmap)
+    
+    def image_path_for(self, image_url, size):
+        """Local file to show image_url at size, or None while a remote image downloads"""
+        if is_remote_url(image_url):
+            image_path = self.image_fetcher.cached_path(image_url)
+            if image_path is None:
+                self.fetch_remote_image(image_url)
+            return image_path
+        return self.image_store.resolve(image_url, size)
+    
+    def fetch_remote_image(self, url):
+        """Download a remote image in the background, then emit remote_image_fetched"""
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                self.remote_image_fetched.emit(url, future.result())
+        self.image_fetcher.fetch_async(url).add_done_callback(done)
+    
+    def handle_remote_image_fetched(self, url, image_path):
+        """Show a freshly downloaded image wherever it is waiting to be displayed"""
+        if url == self.recipe_image_url:
+            self.show_recipe_image(url)
+        for card in self.cards_awaiting_images.pop(url, []):
+            card.set_image_path(image_path)
+    
+    def prefetch_page_images(self, index):
+        """Start downloading remote images for the cards a page is about to show"""
+        if self.service.conn is None:
+            return
+        try:
+            if index == 2:
+                # First four rows of the three-column favorites grid
+                recipe_ids = list(self.favorites)[:12]
+                if not recipe_ids:
+                    return
+                urls = self.service.recipes.image_urls(recipe_ids)
+            else:
+                urls = self.service.recipes.image_urls(limit=20)
+        except sqlite3.Error:
+            return
+        self.image_fetcher.prefetch(urls)
+    
+    def show_recipe_image(self, image_url):
+        """Show a stored recipe image, decoded off the GUI thread if not cached"""
+        self.recipe_image_url = image_url
+        dpr = self.recipe_image.devicePixelRatioF()
+        size = QSize(round(300 * dpr), round(200 * dpr))
+        image_path = self.image_path_for(image_url, size)
+        if image_path is None:
+            return
+        self.recipe_image_key, pixmap = ThumbnailService.shared().request(image_path, size)
+        if pixmap is not None:
+            self.handle_recipe_image_ready(self.recipe_image_key, pixmap)
+    
+    def handle_recipe_image_ready(self, key, pixmap):
+        """Swap the decoded recipe image in, if it's still the one being shown"""
+        if key is None or key != self.recipe_image_key or pixmap.isNull():
+            return
+        pixmap = QPixmap(pixmap)
+        pixmap.setDevicePixelRatio(self.recipe_image.devicePixelRatioF())
+        self.recipe_image.setPixmap(pixmap)
+    
+    def handle_generated_image(self, recipe_id, image_url):
+        """Record a generated image and show it if its recipe is on screen"""
+        try:
+            self.service.set_image_url(recipe_id, image_url)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to save recipe image: {e}")
+            return
+        
+        if recipe_id == self.current_recipe and 1 in self.built_pages:
+            self.show_recipe_image(image_url)
+    
+    def prerender_placeholders(self):
+        """Paint the generic placeholder for the current screen and theme ahead of time"""
+        self.recipe_images.placeholder(self.devicePixelRatioF(), self.dark_mode)
 
     def load_recipe(self, recipe_id):
-        """Load a recipe from the database by ID"""
+        """Load a recipe by ID, from the cache or the database"""
         try:
-            # Query recipe data
-            self.cursor.execute("""
-            SELECT name, ingredients, instructions, image_url, prep_time, cook_time
-            FROM recipes WHERE id = ?
-            """, (recipe_id,))
-            
-            result = self.cursor.fetchone()
-            if result:
-                name, ingredients_json, instructions_json, image_url, prep_time, cook_time = result
-                
-                # Parse JSON strings
-                ingredients = json.loads(ingredients_json)
-                instructions = json.loads(instructions_json)
-                
-                # Create recipe data structure
-                recipe_data = {
-                    "recipe_name": name,
-                    "ingredients": ingredients,
-                    "instructions": instructions,
-                    "prep_time": prep_time,
-                    "cook_time": cook_time
-                }
-                
-                # Store the current recipe ID
-                self.current_recipe = recipe_id
-                
-                # Display the recipe
-                self.display_recipe(recipe_data)
-                
-                # Switch to recipe view
-                self.content_stack.setCurrentIndex(1)  # Recipe View page
-                
+            recipe_data = self.service.get_recipe(recipe_id)
         except (sqlite3.Error, json.JSONDecodeError) as e:
             QMessageBox.critical(self, "Error", f"Failed to load recipe: {e}")
+            return
+        
+        if recipe_data:
+            # Store the current recipe ID
+            self.current_recipe = recipe_id
+            
+            # Display the recipe
+            self.display_recipe(recipe_data)
+            
+            # Switch to recipe view
+            self.show_page(1)  # Recipe View page
 
     def toggle_favorite(self):
         """Toggle the current recipe as favorite"""
@@ -1644,9 +2569,7 @@ class ModernRecipeApp(QMainWindow):
         if self.current_recipe in self.favorites:
             # Remove from favorites
             try:
-                self.cursor.execute("DELETE FROM favorites WHERE recipe_id = ?", (self.current_recipe,))
-                self.conn.commit()
-                self.favorites.remove(self.current_recipe)
+                self.service.set_favorite(self.current_recipe, False)
                 
                 # Update button
                 self.favorite_button.setText("Add to Favorites")
@@ -1666,9 +2589,7 @@ class ModernRecipeApp(QMainWindow):
         else:
             # Add to favorites
             try:
-                self.cursor.execute("INSERT INTO favorites (recipe_id) VALUES (?)", (self.current_recipe,))
-                self.conn.commit()
-                self.favorites.append(self.current_recipe)
+                self.service.set_favorite(self.current_recipe, True)
                 
                 # Update button
                 self.favorite_button.setText("Remove from Favorites")
@@ -1689,13 +2610,17 @@ class ModernRecipeApp(QMainWindow):
     def load_favorites(self):
         """Load favorite recipes from the database"""
         try:
-            self.cursor.execute("SELECT recipe_id FROM favorites")
-            self.favorites = [row[0] for row in self.cursor.fetchall()]
+            self.service.favorites.load()
         except sqlite3.Error:
-            self.favorites = []
+            self.service.favorites.ids = []
 
     def load_favorites_page(self):
         """Load favorites into the favorites page"""
+        from nutrition import nutrition_summary
+        
+        self.ensure_page(2)
+        self.cards_awaiting_images.clear()
+        
         # Clear existing content
         for i in reversed(range(self.favorites_grid_layout.count())): 
             widget = self.favorites_grid_layout.itemAt(i).widget()
@@ -1716,24 +2641,39 @@ class ModernRecipeApp(QMainWindow):
             row, col = 0, 0
             max_cols = 3  # 3 cards per row
             
-            for recipe_id in self.favorites:
-                self.cursor.execute("SELECT name FROM recipes WHERE id = ?", (recipe_id,))
-                result = self.cursor.fetchone()
+            # One query for every card, filtered in SQL on the total_minutes and diet_flags columns
+            favorite_rows = self.service.favorites.recipes(
+                *self.recipe_filter_values(self.favorites_time_filter, self.favorites_diet_filters)
+            )
+            
+            if not favorite_rows:
+                no_matches_label = QLabel("No favorites match these filters.")
+                no_matches_label.setFont(QFont("Montserrat", 14))
+                no_matches_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                no_matches_label.setStyleSheet("color: #888;")
+                self.favorites_grid_layout.addWidget(no_matches_label, 0, 0, 1, 3, Qt.AlignmentFlag.AlignCenter)
+                return
+            
+            # Nutrition for every card in one batch
+            nutrition = self.recipe_nutrition({recipe_id: ingredients_json
+                                               for recipe_id, _, _, ingredients_json, _ in favorite_rows})
+            
+            for recipe_id, recipe_name, image_url, _, servings in favorite_rows:
+                # Create recipe card, using the card-sized image variant
+                image_path = self.image_path_for(image_url, QSize(250, 150))
+                card = RecipeCardWidget(recipe_id, recipe_name, image_path,
+                                        details=nutrition_summary(nutrition.get(recipe_id), servings))
+                if image_path is None and is_remote_url(image_url):
+                    self.cards_awaiting_images.setdefault(image_url, []).append(card)
+                card.clicked.connect(self.load_recipe)
                 
-                if result:
-                    recipe_name = result[0]
-                    
-                    # Create recipe card
-                    card = RecipeCardWidget(recipe_id, recipe_name)
-                    card.clicked.connect(self.load_recipe)
-                    
-                    self.favorites_grid_layout.addWidget(card, row, col)
-                    
-                    # Update position
-                    col += 1
-                    if col >= max_cols:
-                        col = 0
-                        row += 1
+                self.favorites_grid_layout.addWidget(card, row, col)
+                
+                # Update position
+                col += 1
+                if col >= max_cols:
+                    col = 0
+                    row += 1
             
             # Add stretch to bottom
             self.favorites_grid_layout.setRowStretch(row + 1, 1)
@@ -1743,6 +2683,10 @@ class ModernRecipeApp(QMainWindow):
 
     def load_history(self):
         """Load recipe history"""
+        from nutrition import nutrition_summary
+        
+        self.ensure_page(3)
+        
         # Clear existing history items
         for i in reversed(range(self.history_container_layout.count())):
             widget = self.history_container_layout.itemAt(i).widget()
@@ -1750,15 +2694,19 @@ class ModernRecipeApp(QMainWindow):
                 widget.setParent(None)
         
         try:
-            # Get recent recipes from database
-            self.cursor.execute(
-                "SELECT id, name, date_added FROM recipes ORDER BY date_added DESC LIMIT 20"
+            # Get recent recipes from database, narrowed by the search and time filter
+            search = self.history_search_input.text().strip()
+            history = self.service.recipes.history(
+                search, *self.recipe_filter_values(self.history_time_filter, self.history_diet_filters)
             )
-            history = self.cursor.fetchall()
+            nutrition = self.recipe_nutrition({recipe_id: ingredients_json
+                                               for recipe_id, _, _, ingredients_json, _ in history})
             
             if not history:
                 # Show empty message
-                self.no_history_label = QLabel("You haven't created any recipes yet.")
+                filtered = search or self.recipe_filters_active(self.history_time_filter, self.history_diet_filters)
+                self.no_history_label = QLabel("No recipes match your search and filters." if filtered
+                                               else "You haven't created any recipes yet.")
                 self.no_history_label.setFont(QFont("Montserrat", 14))
                 self.no_history_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
                 self.no_history_label.setStyleSheet("color: #888;")
@@ -1766,7 +2714,7 @@ class ModernRecipeApp(QMainWindow):
                 return
             
             # Add history items
-            for recipe_id, name, date in history:
+            for recipe_id, name, date, _, servings in history:
                 # Create history item frame
                 history_item = QFrame()
                 history_item.setObjectName("historyItem")
@@ -1791,6 +2739,12 @@ class ModernRecipeApp(QMainWindow):
                 
                 item_layout.addStretch()
                 
+                # Per-serving nutrition estimate
+                nutrition_text = QLabel(nutrition_summary(nutrition.get(recipe_id), servings))
+                nutrition_text.setFont(QFont("Montserrat", 10))
+                nutrition_text.setStyleSheet("color: #AAA;")
+                item_layout.addWidget(nutrition_text)
+                
                 # View button
                 view_btn = StylizedButton("View Recipe", gradient=False, primary_color="#3498DB")
                 view_btn.setFixedWidth(120)
@@ -1812,59 +2766,264 @@ class ModernRecipeApp(QMainWindow):
             return
         
         try:
-            # Get recipe ingredients
-            self.cursor.execute("SELECT name, ingredients FROM recipes WHERE id = ?", (self.current_recipe,))
-            result = self.cursor.fetchone()
+            recipe_data = self.service.get_recipe(self.current_recipe)
             
-            if result:
-                recipe_name, ingredients_json = result
-                ingredients = json.loads(ingredients_json)
-                
-                # Remove empty label if it exists
-                if hasattr(self, 'empty_shopping_list_label'):
-                    self.empty_shopping_list_label.setParent(None)
-                    delattr(self, 'empty_shopping_list_label')
-                
-                # Create shopping list item
-                item_frame = QFrame()
-                item_frame.setObjectName("shoppingItem")
-                item_frame.setStyleSheet("""
-                    #shoppingItem {
-                        background-color: #2D3035;
-                        border-radius: 10px;
-                        padding: 15px;
-                    }
-                """)
+            if recipe_data:
+                recipe_name = recipe_data["recipe_name"]
                 
-                item_layout = QVBoxLayout(item_frame)
-                
-                # Recipe name header
-                header = QLabel(recipe_name)
-                header.setFont(QFont("Montserrat", 14, QFont.Weight.Bold))
-                item_layout.addWidget(header)
-                
-                # Ingredients with checkboxes
-                for ingredient in ingredients:
-                    check_layout = QHBoxLayout()
-                    
-                    checkbox = QCheckBox(ingredient)
-                    checkbox.setFont(QFont("Montserrat", 12))
-                    check_layout.addWidget(checkbox)
-                    
-                    item_layout.addLayout(check_layout)
-                
-                # Add to shopping list container
-                self.shopping_container_layout.insertWidget(self.shopping_container_layout.count() - 1, item_frame)
+                # At the servings chosen in the recipe view
+                self.ensure_page(4)
+                self.merge_into_shopping_list(self.current_recipe, recipe_name, self.servings_spin.value())
                 
                 # Switch to shopping list page
-                self.content_stack.setCurrentIndex(4)  # Shopping List page
+                self.show_page(4)  # Shopping List page
                 
                 QMessageBox.information(self, "Added to Shopping List", 
-                                    f"Ingredients for {recipe_name} added to your shopping list.")
+                                    f"Ingredients for {recipe_name} ({self.servings_spin.value()} servings) "
+                                    "added to your shopping list.")
                 
         except (sqlite3.Error, json.JSONDecodeError) as e:
             QMessageBox.critical(self, "Error", f"Failed to add to shopping list: {e}")
 
+    def merge_into_shopping_list(self, recipe_id, recipe_name, servings=None):
+        """Merge a recipe into the list, at servings if given; adding a recipe again replaces its earlier entry"""
+        already_listed = recipe_id in self.shopping_list
+        changed = self.service.add_to_shopping_list(recipe_id, servings)
+        if not already_listed:
+            self.add_shopping_recipe_row(recipe_id, recipe_name)
+        self.update_shopping_items(changed)
+    
+    def plan_meals(self):
+        """Plan meals on a worker thread; handle_meal_plan picks up the result"""
+        from meal_planner import MealPlanner, PlanConstraints, recipe_minutes
+        
+        if not self.pantry_index.ready:
+            QMessageBox.information(self, "Meal Planner", "Your recipes are still being indexed. "
+                                    "Please try again in a moment.")
+            return
+        
+        constraints = PlanConstraints(
+            days=self.plan_days_spin.value(),
+            max_minutes=self.plan_minutes_spin.value() or None,
+            diets=[diet for diet, active in self.filter_options.items() if active],
+            favorites_only=self.plan_favorites_checkbox.isChecked()
+        )
+        favorites = list(self.favorites)
+        pantry_keys = set(self.pantry)
+        
+        def run():
+            try:
+                conn = self.service.connect()
+                try:
+                    minutes = recipe_minutes(conn)
+                finally:
+                    conn.close()
+                planner = MealPlanner(self.pantry_index, minutes, favorites, pantry_keys)
+                self.meal_plan_ready.emit(planner.plan(constraints))
+            except Exception as e:
+                self.meal_plan_ready.emit(e)
+        
+        self.plan_button.setEnabled(False)
+        self.plan_button.setText("Planning...")
+        threading.Thread(target=run, daemon=True).start()
+    
+    def handle_meal_plan(self, plan):
+        """Show a finished meal plan and add its recipes to the shopping list"""
+        self.plan_button.setEnabled(True)
+        self.plan_button.setText("Plan Meals")
+        
+        if isinstance(plan, Exception):
+            QMessageBox.critical(self, "Meal Planner", f"Failed to plan meals: {plan}")
+            return
+        if not plan.recipe_ids:
+            QMessageBox.information(self, "Meal Planner", "No saved recipes match these settings.")
+            return
+        
+        try:
+            recipes = {recipe_id: self.service.get_recipe(recipe_id) for recipe_id in plan.recipe_ids}
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to load planned recipes: {e}")
+            return
+        
+        self.meal_plan_list.clear()
+        for day, (recipe_id, minutes) in enumerate(zip(plan.recipe_ids, plan.minutes), 1):
+            if not recipes.get(recipe_id):
+                continue
+            name = recipes[recipe_id]["recipe_name"]
+            self.merge_into_shopping_list(recipe_id, name)
+            item = QListWidgetItem(f"Day {day}: {name} ({minutes:.0f} min)")
+            item.setData(Qt.ItemDataRole.UserRole, recipe_id)
+            self.meal_plan_list.addItem(item)
+        self.meal_plan_list.show()
+    
+    def find_duplicate_recipes(self):
+        """Search the library for near-duplicates on a worker thread; handle_duplicates_found asks what to merge"""
+        from dedup import find_duplicates
+        
+        def run():
+            try:
+                conn = self.service.connect()
+                try:
+                    self.duplicates_found.emit(find_duplicates(conn))
+                finally:
+                    conn.close()
+            except Exception as e:
+                self.duplicates_found.emit(e)
+        
+        self.dedup_button.setEnabled(False)
+        self.dedup_button.setText("Searching...")
+        threading.Thread(target=run, daemon=True).start()
+    
+    def handle_duplicates_found(self, clusters):
+        """Offer to merge the duplicates a search found, then merge them"""
+        self.dedup_button.setEnabled(True)
+        self.dedup_button.setText("Find Duplicate Recipes")
+        
+        if isinstance(clusters, Exception):
+            QMessageBox.critical(self, "Duplicate Recipes", f"Failed to search for duplicates: {clusters}")
+            return
+        try:
+            groups = self.service.duplicate_groups(clusters)
+            if not groups:
+                QMessageBox.information(self, "Duplicate Recipes", "No duplicate recipes were found.")
+                return
+            names = self.service.recipe_names([keep_id for keep_id, _ in groups])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to read duplicate recipes: {e}")
+            return
+        
+        duplicate_count = sum(len(duplicate_ids) for _, duplicate_ids in groups)
+        lines = [f"{names.get(keep_id, 'Untitled Recipe')} ({len(duplicate_ids)} more)"
+                 for keep_id, duplicate_ids in groups]
+        if len(lines) > 10:
+            lines = lines[:10] + [f"...and {len(groups) - 10} more groups"]
+        answer = QMessageBox.question(
+            self, "Duplicate Recipes",
+            f"Found {duplicate_count} duplicate recipes in {len(groups)} groups:\n\n" + "\n".join(lines) +
+            "\n\nMerge each group into one recipe? Favorites are kept.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        
+        merged = 0
+        for keep_id, duplicate_ids in groups:
+            try:
+                changed = self.service.merge_duplicates(keep_id, duplicate_ids)
+            except sqlite3.Error as e:
+                QMessageBox.critical(self, "Database Error", f"Failed to merge duplicate recipes: {e}")
+                break
+            self.forget_merged_recipes(keep_id, duplicate_ids, changed)
+            merged += len(duplicate_ids)
+        
+        if 2 in self.built_pages:
+            self.load_favorites_page()
+        if 3 in self.built_pages:
+            self.load_history()
+        if merged:
+            QMessageBox.information(self, "Duplicate Recipes", f"Merged {merged} duplicate recipes.")
+    
+    def forget_merged_recipes(self, keep_id, duplicate_ids, changed):
+        """Drop merged-away recipes from the open views; changed are the shopping keys the merge touched"""
+        for recipe_id in duplicate_ids:
+            if recipe_id in self.shopping_recipe_rows:
+                self.remove_shopping_recipe_row(recipe_id)
+        if changed:
+            self.update_shopping_items(changed)
+        self.update_pantry_matches()
+        if self.current_recipe in duplicate_ids:
+            self.load_recipe(keep_id)
+    
+    def add_shopping_recipe_row(self, recipe_id, recipe_name):
+        """Show a recipe in the list's recipe strip with a remove button"""
+        row = QFrame()
+        row_layout = QHBoxLayout(row)
+        row_layout.setContentsMargins(0, 0, 0, 0)
+        
+        name_label = QLabel(recipe_name)
+        name_label.setFont(QFont("Montserrat", 12, QFont.Weight.Bold))
+        row_layout.addWidget(name_label)
+        row_layout.addStretch()
+        
+        remove_button = QPushButton("Remove")
+        remove_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        remove_button.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                color: #E74C3C;
+                border: 1px solid #E74C3C;
+                border-radius: 5px;
+                padding: 3px 10px;
+            }
+            QPushButton:hover {
+                background-color: #E74C3C;
+                color: white;
+            }
+        """)
+        remove_button.clicked.connect(lambda: self.remove_from_shopping_list(recipe_id))
+        row_layout.addWidget(remove_button)
+        
+        self.shopping_recipes_layout.addWidget(row)
+        self.shopping_recipe_rows[recipe_id] = row
+        self.shopping_recipes_frame.show()
+
+    def remove_from_shopping_list(self, recipe_id):
+        """Take one recipe's ingredients off the shopping list"""
+        changed = self.shopping_list.remove_recipe(recipe_id)
+        self.remove_shopping_recipe_row(recipe_id)
+        self.update_shopping_items(changed)
+    
+    def remove_shopping_recipe_row(self, recipe_id):
+        """Take a recipe out of the list's recipe strip"""
+        row = self.shopping_recipe_rows.pop(recipe_id, None)
+        if row:
+            row.setParent(None)
+        self.shopping_recipes_frame.setVisible(bool(self.shopping_recipe_rows))
+
+    def update_shopping_items(self, changed):
+        """Update the checkboxes of changed ingredients and keep them in store order"""
+        from shopping_list import item_label
+        
+        for key in changed:
+            item = self.shopping_list.item(key)
+            checkbox = self.shopping_checkboxes.get(key)
+            if item is None:
+                if checkbox:
+                    checkbox.setParent(None)
+                    del self.shopping_checkboxes[key]
+            elif checkbox:
+                checkbox.setText(item_label(item))
+                checkbox.setToolTip("For " + ", ".join(item.recipes))
+            else:
+                checkbox = QCheckBox(item_label(item))
+                checkbox.setFont(QFont("Montserrat", 12))
+                checkbox.setToolTip("For " + ", ".join(item.recipes))
+                self.shopping_checkboxes[key] = checkbox
+        
+        # Lay out section headers and items; widgets already in place aren't touched
+        order = []
+        sections = self.shopping_list.sections()
+        for section, items in sections:
+            header = self.shopping_section_labels.get(section)
+            if header is None:
+                header = QLabel(section)
+                header.setFont(QFont("Montserrat", 14, QFont.Weight.Bold))
+                header.setStyleSheet("color: #1DCDFE; margin-top: 10px;")
+                self.shopping_section_labels[section] = header
+            order.append(header)
+            order.extend(self.shopping_checkboxes[item.key] for item in items)
+        
+        visible_sections = {section for section, _ in sections}
+        for section in list(self.shopping_section_labels):
+            if section not in visible_sections:
+                self.shopping_section_labels.pop(section).setParent(None)
+        
+        # Index 0 is the empty label
+        for index, widget in enumerate(order, start=1):
+            if self.shopping_container_layout.indexOf(widget) != index:
+                self.shopping_container_layout.insertWidget(index, widget)
+        self.empty_shopping_list_label.setVisible(not order)
+
     def clear_shopping_list(self):
         """Clear the shopping list"""
         # Ask for confirmation
@@ -1876,24 +3035,23 @@ class ModernRecipeApp(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             # Remove all shopping items
-            for i in reversed(range(self.shopping_container_layout.count())):
-                widget = self.shopping_container_layout.itemAt(i).widget()
-                if widget and widget != self.empty_shopping_list_label:
-                    widget.setParent(None)
-            
-            # Add empty message back
-            if not hasattr(self, 'empty_shopping_list_label') or not self.empty_shopping_list_label.isVisible():
-                self.empty_shopping_list_label = QLabel("Your shopping list is empty.")
-                self.empty_shopping_list_label.setFont(QFont("Montserrat", 14))
-                self.empty_shopping_list_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.empty_shopping_list_label.setStyleSheet("color: #888;")
-                self.shopping_container_layout.addWidget(self.empty_shopping_list_label)
+            for widget in list(self.shopping_checkboxes.values()) + list(self.shopping_section_labels.values()):
+                widget.setParent(None)
+            for row in self.shopping_recipe_rows.values():
+                row.setParent(None)
+            self.shopping_checkboxes.clear()
+            self.shopping_section_labels.clear()
+            self.shopping_recipe_rows.clear()
+            self.shopping_list.clear()
+            
+            # Show empty message again
+            self.shopping_recipes_frame.hide()
+            self.empty_shopping_list_label.show()
 
     def export_shopping_list(self):
         """Export the shopping list to a file"""
         # Check if shopping list is empty
-        if (hasattr(self, 'empty_shopping_list_label') and 
-            self.empty_shopping_list_label.isVisible()):
+        if not len(self.shopping_list):
             QMessageBox.information(self, "Empty List", "Your shopping list is empty.")
             return
         
@@ -1906,33 +3064,9 @@ class ModernRecipeApp(QMainWindow):
             return  # User canceled
         
         try:
+            checked = {key for key, checkbox in self.shopping_checkboxes.items() if checkbox.isChecked()}
             with open(file_path, 'w') as file:
-                file.write("SHOPPING LIST\n")
-                file.write("=============\n\n")
-                
-                # Go through each shopping item
-                for i in range(self.shopping_container_layout.count()):
-                    widget = self.shopping_container_layout.itemAt(i).widget()
-                    if isinstance(widget, QFrame) and widget.objectName() == "shoppingItem":
-                        # Get the recipe name from the first label
-                        recipe_name = None
-                        for child in widget.children():
-                            if isinstance(child, QLabel):
-                                recipe_name = child.text()
-                                break
-                        
-                        if recipe_name:
-                            file.write(f"{recipe_name}\n")
-                            file.write("-" * len(recipe_name) + "\n")
-                            
-                            # Write ingredients
-                            for child in widget.findChildren(QCheckBox):
-                                ingredient = child.text()
-                                checked = child.isChecked()
-                                status = "[x]" if checked else "[ ]"
-                                file.write(f"{status} {ingredient}\n")
-                            
-                            file.write("\n")
+                file.write(self.shopping_list.export_text(checked))
                 
             QMessageBox.information(self, "Export Successful", f"Shopping list exported to {file_path}")
         except Exception as e:
@@ -1940,30 +3074,36 @@ class ModernRecipeApp(QMainWindow):
     
     def start_cooking_mode(self):
         """Start the step-by-step cooking mode"""
+        from scaling import recipe_servings
+        
         if not self.current_recipe:
             QMessageBox.information(self, "No Recipe", "No recipe is currently selected.")
             return
         
         try:
             # Get recipe details
-            self.cursor.execute("""
-                SELECT name, instructions, prep_time, cook_time 
-                FROM recipes WHERE id = ?
-            """, (self.current_recipe,))
-            
-            result = self.cursor.fetchone()
-            if not result:
+            recipe_data = self.service.get_recipe(self.current_recipe)
+            if recipe_data is None:
                 QMessageBox.critical(self, "Error", "Recipe not found!")
                 return
-                
-            name, instructions_json, prep_time, cook_time = result
-            instructions = json.loads(instructions_json)
+            
+            name = recipe_data["recipe_name"]
+            instructions = recipe_data["instructions"]
+            prep_time, cook_time = recipe_data["prep_time"], recipe_data["cook_time"]
+            
+            # Ingredients at the servings chosen in the recipe view
+            servings = self.servings_spin.value()
+            ingredients = self.scaled_recipes.get(self.current_recipe, recipe_data["ingredients"],
+                                                  recipe_servings(recipe_data.get("servings")), servings)
             
             if not instructions:
                 QMessageBox.warning(self, "No Instructions", "This recipe has no cooking instructions.")
                 return
             
-            # Create cooking mode window
+            # Create cooking mode window, replacing an open one (its timers carry over)
+            if self.cooking_window is not None:
+                self.cooking_window.close()
+                self.cooking_window.deleteLater()
             cooking_window = QMainWindow(self)
             cooking_window.setWindowTitle(f"Cooking: {name}")
             cooking_window.setMinimumSize(800, 600)
@@ -2000,6 +3140,35 @@ class ModernRecipeApp(QMainWindow):
             
             main_layout.addWidget(title_bar)
             
+            # Ingredients list beside the steps
+            ingredients_frame = QFrame()
+            ingredients_frame.setObjectName("cookingIngredientsFrame")
+            ingredients_frame.setStyleSheet("""
+                #cookingIngredientsFrame {
+                    background-color: #2D3035;
+                    border-radius: 15px;
+                    padding: 15px;
+                }
+            """)
+            ingredients_frame.setFixedWidth(280)
+            ingredients_layout = QVBoxLayout(ingredients_frame)
+            
+            ingredients_title = QLabel(f"Ingredients ({servings} servings)")
+            ingredients_title.setFont(QFont("Montserrat", 14, QFont.Weight.Bold))
+            ingredients_layout.addWidget(ingredients_title)
+            
+            ingredients_text = QLabel("\n".join(self.recipe_renderer.format_ingredient(item)
+                                                for item in ingredients))
+            ingredients_text.setFont(QFont("Montserrat", 12))
+            ingredients_text.setWordWrap(True)
+            ingredients_text.setAlignment(Qt.AlignmentFlag.AlignTop)
+            
+            ingredients_scroll = QScrollArea()
+            ingredients_scroll.setWidgetResizable(True)
+            ingredients_scroll.setFrameShape(QFrame.Shape.NoFrame)
+            ingredients_scroll.setWidget(ingredients_text)
+            ingredients_layout.addWidget(ingredients_scroll)
+            
             # Step display
             step_frame = QFrame()
             step_frame.setObjectName("stepFrame")
@@ -2056,20 +3225,37 @@ class ModernRecipeApp(QMainWindow):
                     padding: 10px;
                 }
             """)
-            timer_layout = QHBoxLayout(timer_frame)
+            timer_layout = QVBoxLayout(timer_frame)
+            
+            timer_buttons_layout = QHBoxLayout()
             
-            timer_label = QLabel("Timer:")
+            timer_label = QLabel("Timers:")
             timer_label.setFont(QFont("Montserrat", 14))
-            timer_layout.addWidget(timer_label)
+            timer_buttons_layout.addWidget(timer_label)
+            
+            # One-click timers for the times the current step mentions, rebuilt per step
+            step_timer_buttons = QHBoxLayout()
+            timer_buttons_layout.addLayout(step_timer_buttons)
             
-            timer_display = QLabel("00:00")
-            timer_display.setFont(QFont("Montserrat", 14, QFont.Weight.Bold))
-            timer_layout.addWidget(timer_display)
+            timer_buttons_layout.addStretch()
             
-            timer_start_btn = StylizedButton("Start Timer")
-            timer_layout.addWidget(timer_start_btn)
+            custom_timer_btn = StylizedButton("Custom Timer")
+            custom_timer_btn.clicked.connect(self.start_custom_timer)
+            timer_buttons_layout.addWidget(custom_timer_btn)
             
-            timer_layout.addStretch()
+            cancel_timer_btn = StylizedButton("Cancel Timer", gradient=False, primary_color="#E74C3C")
+            cancel_timer_btn.clicked.connect(self.cancel_cooking_timer)
+            timer_buttons_layout.addWidget(cancel_timer_btn)
+            
+            timer_layout.addLayout(timer_buttons_layout)
+            
+            # Running timers from every step, and from earlier cooking windows
+            timer_list = QListWidget()
+            timer_list.setFixedHeight(90)
+            timer_list.setFont(QFont("Montserrat", 13))
+            timer_list.setToolTip("Double-click a timer to pause or resume it")
+            timer_list.itemDoubleClicked.connect(self.toggle_cooking_timer)
+            timer_layout.addWidget(timer_list)
             
             step_layout.addWidget(timer_frame)
             
@@ -2095,12 +3281,14 @@ class ModernRecipeApp(QMainWindow):
             
             step_layout.addLayout(nav_layout)
             
-            main_layout.addWidget(step_frame)
+            content_layout = QHBoxLayout()
+            content_layout.addWidget(ingredients_frame)
+            content_layout.addWidget(step_frame, 1)
+            main_layout.addLayout(content_layout)
             
-            # Timer section
-            timer_running = [False]
-            timer_seconds = [0]
-            timer_id = [None]
+            # Times mentioned in each step, parsed once for the one-click timers
+            timers_by_step = [step_timers(instruction) for instruction in instructions]
+            recipe_id = self.current_recipe
             
             # Update functions
             def update_step(step_index):
@@ -2116,60 +3304,19 @@ class ModernRecipeApp(QMainWindow):
                         next_button.setText("Finish")
                     else:
                         next_button.setText("Next Step")
-            
-            def handle_timer():
-                if timer_running[0]:
-                    timer_seconds[0] -= 1
-                    minutes = timer_seconds[0] // 60
-                    seconds = timer_seconds[0] % 60
-                    timer_display.setText(f"{minutes:02d}:{seconds:02d}")
                     
-                    if timer_seconds[0] <= 0:
-                        stop_timer()
-                        timer_display.setText("00:00")
-                        QMessageBox.information(cooking_window, "Timer", "Time's up!")
-            
-            def start_timer():
-                if timer_running[0]:
-                    # Stop the timer
-                    stop_timer()
-                    timer_start_btn.setText("Start Timer")
-                else:
-                    # Ask for minutes
-                    time_text, ok = QInputDialog.getText(
-                        cooking_window, "Set Timer", "Enter time in minutes:"
-                    )
-                    
-                    if ok:
-                        try:
-                            minutes = float(time_text)
-                            timer_seconds[0] = int(minutes * 60)
-                            
-                            if timer_seconds[0] > 0:
-                                # Start the timer
-                                timer_running[0] = True
-                                timer_start_btn.setText("Stop Timer")
-                                
-                                # Update display
-                                minutes = timer_seconds[0] // 60
-                                seconds = timer_seconds[0] % 60
-                                timer_display.setText(f"{minutes:02d}:{seconds:02d}")
-                                
-                                # Create timer
-                                timer_id[0] = QTimer()
-                                timer_id[0].timeout.connect(handle_timer)
-                                timer_id[0].start(1000)  # 1 second
-                            else:
-                                QMessageBox.warning(cooking_window, "Invalid Input", 
-                                                 "Please enter a positive number of minutes.")
-                        except ValueError:
-                            QMessageBox.warning(cooking_window, "Invalid Input", 
-                                             "Please enter a valid number of minutes.")
-            
-            def stop_timer():
-                timer_running[0] = False
-                if timer_id[0]:
-                    timer_id[0].stop()
+                    # A button per time in the step; a timer already running for it isn't started twice
+                    while step_timer_buttons.count():
+                        step_timer_buttons.takeAt(0).widget().deleteLater()
+                    for step_timer in timers_by_step[step_index]:
+                        button = StylizedButton(f"{step_timer.label} {step_timer.text}", gradient=False,
+                                                primary_color="#3498DB")
+                        button.clicked.connect(
+                            lambda checked, timer=step_timer, step=step_index: self.start_cooking_timer(
+                                f"Step {step + 1}: {timer.label}", timer.seconds, (recipe_id, step, timer.seconds)
+                            )
+                        )
+                        step_timer_buttons.addWidget(button)
             
             # Save current step
             current_step = [0]
@@ -2193,21 +3340,89 @@ class ModernRecipeApp(QMainWindow):
             # Connect signals
             next_button.clicked.connect(next_step)
             prev_button.clicked.connect(prev_step)
-            timer_start_btn.clicked.connect(start_timer)
             
             # Show first step
             update_step(0)
             
-            # Show cooking window
+            # Show cooking window, with any timers still running from before
+            self.cooking_window = cooking_window
+            self.cooking_timer_list = timer_list
             cooking_window.show()
+            self.update_cooking_timers()
             
         except (sqlite3.Error, json.JSONDecodeError) as e:
             QMessageBox.critical(self, "Error", f"Failed to start cooking mode: {e}")
     
+    def visible_cooking_window(self):
+        """The open cooking mode window, or None"""
+        if self.cooking_window is not None and self.cooking_window.isVisible():
+            return self.cooking_window
+        return None
+    
+    def start_cooking_timer(self, label, seconds, key=None):
+        """Start a kitchen timer; every timer shares the one scheduler tick"""
+        self.timer_engine.start(label, seconds, key)
+        if not self.timer_tick.isActive():
+            self.timer_tick.start()
+        self.update_cooking_timers()
+    
+    def start_custom_timer(self):
+        """Ask for a number of minutes and start a timer for them"""
+        minutes, ok = QInputDialog.getDouble(self.visible_cooking_window() or self, "Set Timer",
+                                             "Enter time in minutes:", 5.0, 0.1, 1440.0, 1)
+        if ok:
+            self.start_cooking_timer("Timer", round(minutes * 60))
+    
+    def toggle_cooking_timer(self, item):
+        """Pause or resume the timer behind a timer list item"""
+        self.timer_engine.toggle_pause(item.data(Qt.ItemDataRole.UserRole))
+        if self.timer_engine.counting() and not self.timer_tick.isActive():
+            self.timer_tick.start()
+        self.update_cooking_timers()
+    
+    def cancel_cooking_timer(self):
+        """Cancel the timer selected in the timer list"""
+        item = self.cooking_timer_list.currentItem() if self.visible_cooking_window() else None
+        if item is None:
+            return
+        self.timer_engine.cancel(item.data(Qt.ItemDataRole.UserRole))
+        self.update_cooking_timers()
+    
+    def tick_cooking_timers(self):
+        """The scheduler tick: announce timers that have ended and redraw the countdowns"""
+        finished = self.timer_engine.tick()
+        if not self.timer_engine.counting():
+            self.timer_tick.stop()
+        self.update_cooking_timers()
+        for timer in finished:
+            QApplication.beep()
+            QMessageBox.information(self.visible_cooking_window() or self, "Timer", f"{timer.label}: time's up!")
+    
+    def update_cooking_timers(self):
+        """Show the running timers in the cooking window, if it's open"""
+        if self.visible_cooking_window() is None:
+            return
+        timers, now = self.timer_engine.active()
+        timer_list = self.cooking_timer_list
+        lines = [f"{timer.label} - {format_remaining(timer.remaining(now))}" + (" (paused)" if timer.paused else "")
+                 for timer in timers]
+        
+        # Rebuild only when timers come or go, so the selection survives the tick
+        timer_ids = [timer.timer_id for timer in timers]
+        if [timer_list.item(row).data(Qt.ItemDataRole.UserRole) for row in range(timer_list.count())] != timer_ids:
+            timer_list.clear()
+            for timer_id, line in zip(timer_ids, lines):
+                item = QListWidgetItem(line)
+                item.setData(Qt.ItemDataRole.UserRole, timer_id)
+                timer_list.addItem(item)
+        else:
+            for row, line in enumerate(lines):
+                if timer_list.item(row).text() != line:
+                    timer_list.item(row).setText(line)
+    
     def save_api_key(self):
         """Save the API key"""
-        api_key = self.api_key_input.text().strip()
-        self.api_key = api_key
+        self.service.api_key = self.api_key_input.text().strip()
         QMessageBox.information(self, "API Key Saved", "Your API key has been saved.")
     
     def save_settings(self):
@@ -2223,44 +3438,7 @@ class ModernRecipeApp(QMainWindow):
                     self.filter_checkboxes[key].setChecked(value)
             
             # Save to database
-            self.cursor.execute("SELECT COUNT(*) FROM user_preferences")
-            count = self.cursor.fetchone()[0]
-            
-            if count == 0:
-                # Insert new preferences
-                self.cursor.execute("""
-                INSERT INTO user_preferences (
-                    dark_mode, vegetarian, vegan, gluten_free, keto, low_carb
-                ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    self.dark_mode,
-                    self.filter_options["vegetarian"],
-                    self.filter_options["vegan"],
-                    self.filter_options["gluten_free"],
-                    self.filter_options["keto"],
-                    self.filter_options["low_carb"]
-                ))
-            else:
-                # Update preferences
-                self.cursor.execute("""
-                UPDATE user_preferences SET 
-                    dark_mode = ?, 
-                    vegetarian = ?, 
-                    vegan = ?, 
-                    gluten_free = ?, 
-                    keto = ?, 
-                    low_carb = ?
-                WHERE id = 1
-                """, (
-                    self.dark_mode,
-                    self.filter_options["vegetarian"],
-                    self.filter_options["vegan"],
-                    self.filter_options["gluten_free"],
-                    self.filter_options["keto"],
-                    self.filter_options["low_carb"]
-                ))
-            
-            self.conn.commit()
+            self.service.preferences.save(self.dark_mode, self.filter_options)
             QMessageBox.information(self, "Settings Saved", "Your settings have been saved.")
         
         except sqlite3.Error as e:
@@ -2273,17 +3451,71 @@ class ModernRecipeApp(QMainWindow):
             self.apply_dark_theme()
         else:
             self.apply_light_theme()
+        
+        # Placeholder art is themed too
+        if self.displayed_recipe_name:
+            self.set_placeholder_image(self.displayed_recipe_name)
+
+class StartupReporter(QObject):
+    """Records cold-start milestones and prints them as JSON.
+    
+    Times are in milliseconds since the module started executing. The report
+    is printed once the window has painted and the critical warm-up tasks are
+    done ("ready"). Enabled with --startup-report; the app exits right after
+    reporting so CI can run it.
+    """
+    def __init__(self, app, window, imports_done):
+        super().__init__(window)
+        self.app = app
+        self.milestones = {"imports": imports_done}
+        window.installEventFilter(self)
+        
+        if window.warmup.is_critical_finished:
+            self.mark("ready")
+        else:
+            window.warmup.critical_finished.connect(lambda: self.mark("ready"))
+    
+    def mark(self, name):
+        self.milestones[name] = time.perf_counter()
+        if "first_paint" in self.milestones and "ready" in self.milestones:
+            QTimer.singleShot(0, self.report)
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "first_paint" not in self.milestones:
+            # Heavy optional modules that should not be loaded before first paint
+            self.deferred_modules_loaded = [
+                name for name in ("speech_recognition", "google.generativeai", "PIL", "requests", "numpy")
+                if name in sys.modules
+            ]
+            self.mark("first_paint")
+        return False
+    
+    def report(self):
+        report = {
+            f"{name}_ms": round((timestamp - STARTUP_T0) * 1000, 1)
+            for name, timestamp in self.milestones.items()
+        }
+        report["deferred_modules_loaded"] = self.deferred_modules_loaded
+        print(json.dumps(report), flush=True)
+        self.app.quit()
 
 # Main application entry point
 def main():
+    imports_done = time.perf_counter()
+    
     # Create Qt application
     app = QApplication(sys.argv)
     
     # Set application icon and style
     app.setStyle("Fusion")
     
-    # Create main window
-    window = ModernRecipeApp()
+    # Create main window; --no-splash skips the splash for headless or benchmark runs
+    window = ModernRecipeApp(show_splash="--no-splash" not in sys.argv)
+    
+    if "--startup-report" in sys.argv:
+        reporter = StartupReporter(app, window, imports_done)
+        reporter.mark("window_created")
+    
     window.show()
     
     # Run the application
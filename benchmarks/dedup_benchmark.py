@@ -0,0 +1,116 @@
+"""Benchmark near-duplicate detection.
+
+Fills a temporary database with synthetic recipes, a share of which are
+regenerated copies of earlier ones (quantities changed, ingredients
+reordered, a few instruction words reworded), then runs find_duplicates()
+and reports rows per second, peak memory and precision/recall of the pairs
+it finds against the planted duplicates.
+
+    python benchmarks/dedup_benchmark.py [--recipes N] [--duplicates 0.1]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import find_duplicates
+from ingredient_parse_benchmark import INGREDIENTS
+
+DISHES = ["Stew", "Curry", "Salad", "Soup", "Pasta", "Bake", "Stir-Fry", "Tacos", "Risotto", "Skillet"]
+STYLES = ["Spicy", "Creamy", "Rustic", "Quick", "Smoky", "Lemony", "Garlicky", "Herbed", "Classic", ""]
+VERBS = ["Chop", "Dice", "Slice", "Brown", "Saute", "Simmer", "Roast", "Whisk", "Fold in", "Season"]
+PLACES = ["in a large pot", "in a skillet", "on a baking sheet", "in a bowl", "over medium heat"]
+REWORDINGS = {"large": "big", "skillet": "pan", "bowl": "mixing bowl", "medium": "moderate", "minutes": "min"}
+
+
+def synthesize_recipe(rng):
+    ingredients = rng.sample(INGREDIENTS, rng.randint(5, 12))
+    name = f"{rng.choice(STYLES)} {ingredients[0].title()} {rng.choice(DISHES)}".strip()
+    lines = [f"{rng.choice(['1', '2', '1/2', '200 g', '1 cup', '2 tbsp'])} {ingredient}" for ingredient in ingredients]
+    steps = [f"{rng.choice(VERBS)} the {rng.choice(ingredients)} {rng.choice(PLACES)} for {rng.randint(2, 40)} minutes."
+             for _ in range(rng.randint(4, 9))]
+    return name, lines, steps
+
+
+def regenerate(rng, recipe):
+    """A near-identical copy, as a repeated generation would produce"""
+    name, lines, steps = recipe
+    lines = [f"{rng.choice(['1', '3', '1/4', '250 g', '2 cups'])} {line.split(' ', 1)[1]}" for line in lines]
+    rng.shuffle(lines)
+    steps = [" ".join(REWORDINGS.get(word, word) if rng.random() < 0.25 else word for word in step.split())
+             for step in steps]
+    return name, lines, steps
+
+
+def create_library(path, count, duplicate_share, seed=8):
+    """The database and the set of planted duplicate ID pairs"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        instructions TEXT NOT NULL,
+        image_url TEXT,
+        prep_time TEXT,
+        cook_time TEXT,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    originals, groups, rows = [], {}, []
+    for recipe_id in range(1, count + 1):
+        if originals and rng.random() < duplicate_share:
+            original_id = rng.choice(originals)
+            recipe = regenerate(rng, rows[original_id - 1])
+            groups.setdefault(original_id, [original_id]).append(recipe_id)
+        else:
+            recipe = synthesize_recipe(rng)
+            originals.append(recipe_id)
+        rows.append(recipe)
+    conn.executemany("INSERT INTO recipes (name, ingredients, instructions) VALUES (?, ?, ?)",
+                     [(name, json.dumps(lines), json.dumps(steps)) for name, lines, steps in rows])
+    conn.commit()
+    planted = {pair for group in groups.values() for pair in itertools.combinations(sorted(group), 2)}
+    return conn, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of recipes that are copies")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        conn, planted = create_library(os.path.join(directory, "recipes.db"), args.recipes, args.duplicates)
+        print(f"{args.recipes} recipes, {len(planted)} planted duplicate pairs")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        clusters = find_duplicates(conn)
+        elapsed = time.perf_counter() - start
+        rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+        print(f"find_duplicates: {elapsed:.1f} s ({args.recipes / elapsed:,.0f} recipes/s), "
+              f"peak memory grew {rss_growth:.0f} MB, {len(clusters)} clusters")
+
+        found = {pair for cluster in clusters for pair in itertools.combinations(cluster, 2)}
+        true_positives = len(found & planted)
+        print(f"pairs: precision {true_positives / max(len(found), 1):.1%}, "
+              f"recall {true_positives / max(len(planted), 1):.1%}")
+        conn.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark dietary classification and diet filters.
+
+Fills a temporary database with synthetic recipes, applies the schema
+migrations and backfills diet_flags, then answers "vegetarian and
+gluten-free, newest 20" for the history page three ways: diet_flags IN
+(...) through the index, a bitwise test on every row, and classifying every
+recipe's ingredients in Python.
+
+    python benchmarks/diet_filter_benchmark.py [--recipes N] [--diets vegetarian,gluten_free]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dietary import DIET_BITS, backfill_diet_flags, classify, flags_condition
+from ingredient_parse_benchmark import synthesize_lines
+from recipe_service import SCHEMA_MIGRATIONS
+
+
+def create_library(path, count, seed=4):
+    rng = random.Random(seed)
+    lines = synthesize_lines(count * 3, seed)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        instructions TEXT NOT NULL,
+        image_url TEXT,
+        prep_time TEXT,
+        cook_time TEXT,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.executemany(
+        "INSERT INTO recipes (name, ingredients, instructions, date_added) VALUES (?, ?, '[]', ?)",
+        [(f"Recipe {index}", json.dumps(rng.sample(lines, rng.randint(3, 10))),
+          f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00")
+         for index in range(count)]
+    )
+    conn.commit()
+    return conn
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--diets", default="vegetarian,gluten_free")
+    args = parser.parse_args()
+    diets = args.diets.split(",")
+    mask = sum(DIET_BITS[diet] for diet in diets)
+
+    directory = tempfile.mkdtemp()
+    try:
+        conn = create_library(os.path.join(directory, "recipes.db"), args.recipes)
+        for script in SCHEMA_MIGRATIONS:
+            conn.executescript(script)
+
+        start = time.perf_counter()
+        updated = backfill_diet_flags(conn)
+        print(f"backfill: {updated} recipes classified in {time.perf_counter() - start:.2f} s")
+
+        condition, parameters = flags_condition("diet_flags", diets)
+        indexed, indexed_ms = timed(lambda: conn.execute(
+            f"SELECT id, name, date_added FROM recipes WHERE {condition} ORDER BY date_added DESC LIMIT 20",
+            parameters).fetchall())
+        bitwise, bitwise_ms = timed(lambda: conn.execute(
+            "SELECT id, name, date_added FROM recipes WHERE diet_flags & ? = ? ORDER BY date_added DESC LIMIT 20",
+            (mask, mask)).fetchall())
+
+        def python_scan():
+            rows = conn.execute("SELECT id, name, date_added, ingredients FROM recipes").fetchall()
+            matches = [row for row in rows if classify(json.loads(row[3])) & mask == mask]
+            matches.sort(key=lambda row: row[2], reverse=True)
+            return [row[:3] for row in matches[:20]]
+
+        parsed, python_ms = timed(python_scan, repeat=3)
+        assert [row[2] for row in indexed] == [row[2] for row in bitwise] == [row[2] for row in parsed]
+
+        matching = conn.execute(f"SELECT COUNT(*) FROM recipes WHERE {condition}", parameters).fetchone()[0]
+        print(f"{' and '.join(diets)} ({matching} of {args.recipes} recipes), newest 20:")
+        print(f"  diet_flags index:    {indexed_ms:8.2f} ms")
+        print(f"  bitwise, every row:  {bitwise_ms:8.2f} ms")
+        print(f"  classify in Python:  {python_ms:8.2f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark recipe time filters.
+
+Fills a temporary database with synthetic recipes whose times are free text,
+applies the schema migrations, backfills the parsed minutes columns and then
+answers "N minutes or less" for the history page four ways: walking the
+(date_added, total_minutes) index newest-first, which SQLite picks on its
+own; through the total_minutes index, which finds every match and sorts it;
+with indexes ignored (full table scan); and by parsing every row's text in
+Python.
+
+    python benchmarks/duration_filter_benchmark.py [--recipes N] [--max-minutes N]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from durations import backfill_durations, duration_columns
+from recipe_service import SCHEMA_MIGRATIONS
+
+TIMES = ["5 minutes", "10 mins", "15 minutes", "20 min", "25 minutes", "30 mins", "45 minutes",
+         "1 hour", "1 hr 20 mins", "1½ hours", "2 hours", "10-15 minutes", "PT35M", "N/A", "Overnight"]
+
+HISTORY_QUERY = ("SELECT id, name, date_added, ingredients, servings FROM recipes {index} "
+                 "WHERE total_minutes <= ? ORDER BY date_added DESC LIMIT 20")
+
+
+def create_library(path, count, seed=8):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        instructions TEXT NOT NULL,
+        image_url TEXT,
+        prep_time TEXT,
+        cook_time TEXT,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.executemany(
+        "INSERT INTO recipes (name, ingredients, instructions, prep_time, cook_time, date_added) "
+        "VALUES (?, '[]', '[]', ?, ?, ?)",
+        [(f"Recipe {index}", rng.choice(TIMES), rng.choice(TIMES),
+          f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00")
+         for index in range(count)]
+    )
+    conn.commit()
+    return conn
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--max-minutes", type=int, default=15)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        conn = create_library(os.path.join(directory, "recipes.db"), args.recipes)
+        for script in SCHEMA_MIGRATIONS:
+            conn.executescript(script)
+
+        start = time.perf_counter()
+        updated = backfill_durations(conn)
+        print(f"backfill: {updated} recipes in {time.perf_counter() - start:.2f} s")
+
+        plan = conn.execute("EXPLAIN QUERY PLAN " + HISTORY_QUERY.format(index=""), (args.max_minutes,)).fetchall()
+        newest, newest_ms = timed(lambda: conn.execute(
+            HISTORY_QUERY.format(index=""), (args.max_minutes,)).fetchall())
+        indexed, indexed_ms = timed(lambda: conn.execute(
+            HISTORY_QUERY.format(index="INDEXED BY idx_recipes_total_minutes"), (args.max_minutes,)).fetchall())
+        scanned, scanned_ms = timed(lambda: conn.execute(
+            HISTORY_QUERY.format(index="NOT INDEXED"), (args.max_minutes,)).fetchall())
+
+        def python_scan():
+            rows = conn.execute("SELECT id, name, date_added, prep_time, cook_time FROM recipes").fetchall()
+            matches = [row for row in rows
+                       if (duration_columns(row[3], row[4])[2] or float("inf")) <= args.max_minutes]
+            matches.sort(key=lambda row: row[2], reverse=True)
+            return [row[:3] for row in matches[:20]]
+
+        parsed, python_ms = timed(python_scan, repeat=3)
+        assert ([row[2] for row in newest] == [row[2] for row in indexed] == [row[2] for row in scanned]
+                == [row[2] for row in parsed])
+
+        print(f"{args.max_minutes} min or less, newest 20 ({'; '.join(row[3] for row in plan)}):")
+        print(f"  date_added index:    {newest_ms:8.2f} ms")
+        print(f"  total_minutes index: {indexed_ms:8.2f} ms")
+        print(f"  full table scan:     {scanned_ms:8.2f} ms")
+        print(f"  parse in Python:     {python_ms:8.2f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark remote image downloads against a local HTTP server.
+
+Serves generated images from a temporary directory with a threaded HTTP/1.1
+server that supports ETag and Last-Modified, then times:
+
+- sequential downloads with a new connection per image (the naive approach)
+- a cold ImageFetcher prefetch (pooled session, bounded worker pool)
+- a warm prefetch that revalidates every file (304 responses)
+
+    python benchmarks/image_fetch_benchmark.py [--images N] [--size KB] [--delay MS]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from image_fetcher import ImageFetcher
+
+
+class ETagHandler(SimpleHTTPRequestHandler):
+    """Static file handler with keep-alive, ETags and simulated latency"""
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+
+    def send_head(self):
+        time.sleep(self.delay)
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            etag = '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_images(directory, count, size_kb):
+    for i in range(count):
+        # Incompressible payload, so transfer size is realistic
+        data = hashlib.sha256(str(i).encode()).digest() * (size_kb * 1024 // 32)
+        with open(os.path.join(directory, f"image_{i}.jpg"), "wb") as file:
+            file.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--size", type=int, default=200, help="image size in KB")
+    parser.add_argument("--delay", type=float, default=20, help="server latency per request in ms")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as serve_dir, tempfile.TemporaryDirectory() as cache_dir:
+        make_images(serve_dir, args.images, args.size)
+
+        ETagHandler.delay = args.delay / 1000
+        handler = lambda *a, **k: ETagHandler(*a, directory=serve_dir, **k)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base_url}/image_{i}.jpg" for i in range(args.images)]
+
+        start = time.perf_counter()
+        for url in urls:
+            requests.get(url, headers={"Connection": "close"}).content
+        sequential = time.perf_counter() - start
+
+        fetcher = ImageFetcher(cache_dir=cache_dir, max_workers=args.workers, max_age=0)
+        start = time.perf_counter()
+        wait(fetcher.prefetch(urls))
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        futures = fetcher.prefetch(urls)
+        wait(futures)
+        warm = time.perf_counter() - start
+        errors = [f.exception() for f in futures if f.exception()]
+
+        fetcher.shutdown()
+        server.shutdown()
+
+    total_mb = args.images * args.size / 1024
+    print(f"{args.images} images x {args.size} KB ({total_mb:.1f} MB), {args.delay:g} ms latency")
+    print(f"  sequential, new connection each  {sequential * 1000:>8.0f} ms")
+    print(f"  ImageFetcher cold prefetch       {cold * 1000:>8.0f} ms  ({sequential / cold:.1f}x)")
+    print(f"  ImageFetcher revalidate (304s)   {warm * 1000:>8.0f} ms")
+    if errors:
+        print(f"  {len(errors)} errors, first: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
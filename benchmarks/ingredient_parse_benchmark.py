@@ -0,0 +1,112 @@
+"""Benchmark the ingredient parser.
+
+Parses a synthetic library of ingredient lines (varied quantities, units,
+unicode fractions, ranges, descriptors and notes over a few hundred
+ingredients), or every ingredient stored in a recipes database with --db.
+Reports throughput with cold caches and again with warm ones.
+
+    python benchmarks/ingredient_parse_benchmark.py [--lines N] [--db recipes.db]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingredient_parser
+from ingredient_parser import parse_ingredient
+
+INGREDIENTS = [
+    "onion", "red onion", "garlic", "carrot", "celery", "potato", "sweet potato", "tomato",
+    "cherry tomato", "bell pepper", "jalapeno", "zucchini", "eggplant", "mushroom", "spinach",
+    "kale", "cabbage", "broccoli", "cauliflower", "green bean", "pea", "corn", "lemon", "lime",
+    "orange", "apple", "banana", "strawberry", "blueberry", "avocado", "cucumber", "lettuce",
+    "chicken breast", "chicken thigh", "ground beef", "pork chop", "bacon", "salmon fillet",
+    "shrimp", "tofu", "egg", "butter", "milk", "heavy cream", "sour cream", "yogurt",
+    "cheddar cheese", "parmesan", "mozzarella", "feta", "rice", "pasta", "spaghetti", "quinoa",
+    "bread crumb", "all-purpose flour", "sugar", "brown sugar", "honey", "maple syrup",
+    "olive oil", "vegetable oil", "sesame oil", "soy sauce", "vinegar", "balsamic vinegar",
+    "chicken stock", "vegetable broth", "coconut milk", "black bean", "chickpea", "lentil",
+    "salt", "pepper", "paprika", "cumin", "oregano", "thyme", "basil", "parsley", "cilantro",
+    "rosemary", "cinnamon", "nutmeg", "ginger", "chili flake", "baking powder", "baking soda",
+    "vanilla extract", "cocoa powder", "chocolate chip", "walnut", "almond", "peanut butter"
+]
+UNITS = ["cup", "cups", "c.", "tbsp", "Tbsp", "T", "tablespoons", "tsp", "teaspoon", "t",
+         "g", "grams", "kg", "oz", "ounces", "lb", "lbs", "ml", "l", "cloves", "can", "pinch",
+         "slices", "bunch", ""]
+QUANTITIES = ["1", "2", "3", "4", "1/2", "1/4", "3/4", "1 1/2", "2 1/2", "½", "¼", "1½",
+              "2-3", "1 to 2", "0.5", "250", "400", "a", "two", ""]
+DESCRIPTORS = ["", "", "", "chopped", "finely chopped", "diced", "minced", "sliced", "large",
+               "small", "fresh", "grated", "melted"]
+NOTES = ["", "", "", ", divided", ", at room temperature", ", peeled and diced", " to taste",
+         " (optional)", ", for garnish", " (about 2 cups)", ", drained and rinsed"]
+
+
+def synthesize_lines(count, seed=11):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        parts = [rng.choice(QUANTITIES), rng.choice(UNITS), rng.choice(DESCRIPTORS)]
+        name = rng.choice(INGREDIENTS)
+        if rng.random() < 0.5:
+            name += "s"
+        parts.append(name)
+        lines.append(" ".join(part for part in parts if part) + rng.choice(NOTES))
+    return lines
+
+
+def library_lines(db_path):
+    conn = sqlite3.connect(db_path)
+    lines = []
+    for (ingredients_json,) in conn.execute("SELECT ingredients FROM recipes"):
+        try:
+            lines.extend(str(item) for item in json.loads(ingredients_json))
+        except ValueError:
+            pass
+    conn.close()
+    return lines
+
+
+def clear_caches():
+    ingredient_parser._number_cache.clear()
+    ingredient_parser._key_cache.clear()
+    ingredient_parser._describe_cache.clear()
+
+
+def time_parse(lines):
+    start = time.perf_counter()
+    for line in lines:
+        parse_ingredient(line)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=500000)
+    parser.add_argument("--db", help="parse the ingredients of every recipe in this database")
+    parser.add_argument("--show", type=int, default=8, help="print this many sample parses")
+    args = parser.parse_args()
+
+    lines = library_lines(args.db) if args.db else synthesize_lines(args.lines)
+    if not lines:
+        sys.exit("No ingredient lines to parse")
+
+    for line in lines[:args.show]:
+        parsed = parse_ingredient(line)
+        print(f"  {line!r:50} -> {parsed.quantity}-{parsed.quantity_max} {parsed.unit} "
+              f"| {parsed.name} | {parsed.note} | key={parsed.key}")
+
+    clear_caches()
+    cold = time_parse(lines)
+    warm = time_parse(lines)
+    print(f"{len(lines)} lines ({len(set(lines))} distinct)")
+    print(f"cold caches: {cold:.3f}s, {len(lines) / cold:,.0f} lines/s")
+    print(f"warm caches: {warm:.3f}s, {len(lines) / warm:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark the meal planner.
+
+Plans weeks over a synthetic library (Zipf-distributed ingredients, random
+times and favorites) for several time budgets, and compares the plans with
+picking eligible recipes at random: fewer ingredients to buy and less time
+in the kitchen is better.
+
+    python benchmarks/meal_plan_benchmark.py [--recipes N] [--days N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_planner import MealPlanner, PlanConstraints
+from pantry_benchmark import synthesize_library
+from pantry_index import PantryIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=50000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--max-minutes", type=int, default=60)
+    args = parser.parse_args()
+
+    library, _, _ = synthesize_library(args.recipes, args.vocabulary)
+    rng = random.Random(21)
+    minutes = {recipe_id: rng.choice([15, 20, 30, 45, 60, 90, 120]) for recipe_id in library}
+    favorites = set(rng.sample(sorted(library), len(library) // 50))
+
+    index = PantryIndex()
+    index.load_keys(library)
+    planner = MealPlanner(index, minutes, favorites)
+    constraints = PlanConstraints(days=args.days, max_minutes=args.max_minutes)
+    print(f"{len(library)} recipes, {len(index.keys)} ingredients, planning {args.days} days "
+          f"of at most {args.max_minutes} minutes")
+
+    # Baseline: random eligible recipes, scored with the planner's own cost
+    planner.plan(constraints, time_budget=0.0, seed=0)
+    eligible = np.flatnonzero(planner.eligible)
+    costs = []
+    for _ in range(200):
+        rows = [int(row) for row in rng.sample(list(eligible), args.days)]
+        costs.append(planner.plan_cost(rows))
+    print(f"random plans:   cost {np.mean(costs):6.1f} (best of 200: {min(costs):.1f})")
+
+    for budget in (0.0, 0.05, 0.25, 1.0):
+        start = time.perf_counter()
+        plan = planner.plan(constraints, time_budget=budget, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"budget {budget:4.2f}s:  cost {plan.cost:6.1f}, {len(plan.shopping_keys)} ingredients to buy, "
+              f"{sum(plan.minutes):.0f} min cooking, took {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark nutrition estimates.
+
+Estimates a synthetic library (or every recipe in --db) three ways: one
+recipe at a time, as one batched matrix product, and through the SQLite
+cache, cold and then warm. The warm cache is what history and favorites pay
+to annotate a page of cards.
+
+    python benchmarks/nutrition_benchmark.py [--recipes N] [--db recipes.db]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingredient_parse_benchmark import synthesize_lines
+from nutrition import NutritionEngine
+from recipe_service import BASE_TABLES, SCHEMA_MIGRATIONS
+
+
+def library_from_db(db_path):
+    conn = sqlite3.connect(db_path)
+    recipes = {}
+    for recipe_id, ingredients_json in conn.execute("SELECT id, ingredients FROM recipes"):
+        try:
+            recipes[recipe_id] = json.loads(ingredients_json)
+        except ValueError:
+            pass
+    conn.close()
+    return recipes
+
+
+def synthesize_library(count, seed=13):
+    rng = random.Random(seed)
+    lines = synthesize_lines(count * 15, seed)
+    recipes = {}
+    position = 0
+    for recipe_id in range(count):
+        size = rng.randint(6, 15)
+        recipes[recipe_id] = lines[position:position + size]
+        position += size
+    return recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=20, help="cards per history/favorites page")
+    parser.add_argument("--db", help="estimate the recipes in this database instead")
+    args = parser.parse_args()
+
+    recipes = library_from_db(args.db) if args.db else synthesize_library(args.recipes)
+    if not recipes:
+        sys.exit("No recipes to estimate")
+    lines = sum(len(ingredients) for ingredients in recipes.values())
+
+    start = time.perf_counter()
+    engine = NutritionEngine()
+    print(f"nutrient table: {len(engine.keys)} rows loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"{len(recipes)} recipes, {lines} ingredient lines")
+
+    # Warm the parser caches so both paths time the same work
+    engine.estimate_many(list(recipes.values()))
+
+    start = time.perf_counter()
+    single = [engine.estimate(ingredients) for ingredients in recipes.values()]
+    one_at_a_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = engine.estimate_many(list(recipes.values()))
+    batch = time.perf_counter() - start
+    assert all(abs(a.kcal - b.kcal) < 1e-6 for a, b in zip(single, batched))
+    matched = sum(result.matched for result in batched) / max(1, sum(result.total for result in batched))
+    print(f"one at a time: {one_at_a_time * 1000:8.1f} ms")
+    print(f"batched:       {batch * 1000:8.1f} ms ({one_at_a_time / batch:.1f}x, "
+          f"{matched:.0%} of lines matched)")
+
+    conn = sqlite3.connect(":memory:")
+    for statement in BASE_TABLES:
+        conn.execute(statement)
+    for script in SCHEMA_MIGRATIONS:
+        conn.executescript(script)
+
+    start = time.perf_counter()
+    engine.cached_totals(conn, recipes)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    engine.cached_totals(conn, recipes)
+    warm = time.perf_counter() - start
+    print(f"cache cold:    {cold * 1000:8.1f} ms (estimate and store every recipe)")
+    print(f"cache warm:    {warm * 1000:8.1f} ms (hash check and read only)")
+
+    page = dict(list(recipes.items())[:args.page])
+    start = time.perf_counter()
+    for _ in range(100):
+        engine.cached_totals(conn, page)
+    print(f"page of {len(page)}:    {(time.perf_counter() - start) * 10:8.3f} ms per page from the cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Offscreen paint benchmark for the custom widgets.
+
+Renders CircularProgressBar and StylizedButton into an offscreen pixmap the
+way an animation or hover would, once with the paint cache disabled and once
+with it enabled, and prints the mean frame time of each.
+
+    python benchmarks/paint_benchmark.py [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QPixmap, QPixmapCache
+from PyQt6.QtCore import Qt
+
+import MordernRecipeApp as app_module
+from MordernRecipeApp import CircularProgressBar, StylizedButton
+
+
+def time_frames(widget, frames, step):
+    """Render widget frames times, calling step(i) before each, return ms per frame"""
+    target = QPixmap(widget.size())
+    target.fill(Qt.GlobalColor.transparent)
+    start = time.perf_counter()
+    for i in range(frames):
+        step(i)
+        widget.render(target)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def run(app, frames):
+    progress_bar = CircularProgressBar(value=0)
+    button = StylizedButton(text="Generate Recipe", primary_color="#2ecc71",
+                            secondary_color="#27ae60")
+    button.resize(240, 60)
+
+    cases = [
+        ("CircularProgressBar", progress_bar, lambda i: progress_bar.set_value(i % 101)),
+        ("StylizedButton", button, lambda i: None),
+    ]
+
+    print(f"{'widget':<22}{'uncached ms':>14}{'cached ms':>12}{'speedup':>10}")
+    for name, widget, step in cases:
+        # Polish and layout events would otherwise land in the first timed frame
+        app.processEvents()
+        app_module.PAINT_CACHE_ENABLED = False
+        uncached = time_frames(widget, frames, step)
+
+        QPixmapCache.clear()
+        app_module.PAINT_CACHE_ENABLED = True
+        cached = time_frames(widget, frames, step)
+
+        print(f"{name:<22}{uncached:>14.3f}{cached:>12.3f}{uncached / cached:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    run(app, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark pantry coverage ranking.
+
+Indexes a synthetic library (ingredient keys drawn from a Zipf-like
+distribution over a large vocabulary, so a few staples are common and most
+ingredients rare) and times ranking random pantries against all of it with
+the packed bitset index, next to a plain Python set comparison per recipe.
+
+    python benchmarks/pantry_benchmark.py [--recipes N] [--vocabulary N] [--db recipes.db]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pantry_index import PantryIndex, STAPLES, recipe_keys
+
+
+def synthesize_library(recipes, vocabulary, seed=5):
+    """Return {recipe ID: ingredient keys} with 5-15 ingredients per recipe"""
+    rng = random.Random(seed)
+    names = [f"ingredient {index}" for index in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    library = {}
+    for recipe_id in range(recipes):
+        library[recipe_id] = set(rng.choices(names, weights, k=rng.randint(5, 15)))
+    return library, names, weights
+
+
+def library_from_db(db_path):
+    conn = sqlite3.connect(db_path)
+    library = {}
+    for recipe_id, ingredients_json in conn.execute("SELECT id, ingredients FROM recipes"):
+        try:
+            library[recipe_id] = recipe_keys(json.loads(ingredients_json))
+        except ValueError:
+            pass
+    conn.close()
+    names = sorted({key for keys in library.values() for key in keys})
+    return library, names, [1.0] * len(names)
+
+
+def rank_with_sets(library, pantry, max_missing=2, limit=20):
+    """The straightforward version: set difference per recipe"""
+    have_set = pantry | STAPLES
+    scored = []
+    for recipe_id, keys in library.items():
+        missing = len(keys - have_set)
+        if missing <= max_missing and missing < len(keys):
+            scored.append((missing, -(len(keys) - missing), recipe_id))
+    return sorted(scored)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--pantry", type=int, default=40, help="items per random pantry")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--db", help="index the recipes of this database instead")
+    args = parser.parse_args()
+
+    library, names, weights = (library_from_db(args.db) if args.db
+                               else synthesize_library(args.recipes, args.vocabulary))
+    if not library:
+        sys.exit("No recipes to index")
+
+    index = PantryIndex()
+    start = time.perf_counter()
+    index.load_keys(library)
+    build = time.perf_counter() - start
+    print(f"{len(library)} recipes, {len(index.keys)} ingredient keys, "
+          f"{index.words.nbytes / 1e6:.1f} MB of bitsets, built in {build * 1000:.0f} ms")
+
+    rng = random.Random(9)
+    pantries = [set(rng.choices(names, weights, k=args.pantry)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    results = [index.rank(pantry) for pantry in pantries]
+    bitset = (time.perf_counter() - start) / len(pantries)
+
+    set_queries = max(1, len(pantries) // 10)
+    start = time.perf_counter()
+    expected = [rank_with_sets(library, pantry) for pantry in pantries[:set_queries]]
+    sets = (time.perf_counter() - start) / set_queries
+
+    for matches, reference in zip(results, expected):
+        assert [(len(m.missing), -m.have) for m in matches] == [entry[:2] for entry in reference]
+
+    found = sum(len(matches) for matches in results) / len(results)
+    print(f"bitset rank: {bitset * 1000:8.2f} ms per pantry ({found:.1f} matches)")
+    print(f"set rank:    {sets * 1000:8.2f} ms per pantry ({sets / bitset:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
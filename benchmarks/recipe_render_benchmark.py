@@ -0,0 +1,89 @@
+"""Benchmark recipe view rendering for long recipes.
+
+Compares the old per-line QTextEdit.append rendering against RecipeRenderer's
+single document build, for recipes with 200 instruction steps.
+
+    python benchmarks/recipe_render_benchmark.py [--steps N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QTextEdit
+
+from MordernRecipeApp import RecipeRenderer
+
+
+def make_recipe(steps):
+    ingredients = [f"{i % 7 + 1} cups ingredient number {i}" for i in range(steps // 4)]
+    instructions = [
+        f"Step text {i}: stir the mixture gently over medium heat for {i % 15 + 1} minutes "
+        f"until it thickens, then season to taste and set aside."
+        for i in range(steps)
+    ]
+    return ingredients, instructions
+
+
+def render_with_append(ingredients_list, instructions_list, ingredients, instructions):
+    """The previous display_recipe implementation"""
+    ingredients_list.clear()
+    for ingredient in ingredients:
+        ingredients_list.append(f"• {ingredient}")
+
+    instructions_list.clear()
+    for i, instruction in enumerate(instructions, 1):
+        instructions_list.append(f"{i}. {instruction}\n")
+
+
+def render_with_renderer(renderer, ingredients_list, instructions_list, ingredients, instructions):
+    renderer.render_ingredients(ingredients_list, ingredients)
+    renderer.render_instructions(instructions_list, instructions)
+
+
+def time_ms(app, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+        # Include the layout and paint the change triggers
+        app.processEvents()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    ingredients_list = QTextEdit()
+    instructions_list = QTextEdit()
+    for text_edit in (ingredients_list, instructions_list):
+        text_edit.setReadOnly(True)
+        text_edit.resize(800, 400)
+        text_edit.show()
+
+    ingredients, instructions = make_recipe(args.steps)
+    renderer = RecipeRenderer()
+
+    append_ms = time_ms(app, lambda: render_with_append(
+        ingredients_list, instructions_list, ingredients, instructions), args.repeat)
+    renderer_ms = time_ms(app, lambda: render_with_renderer(
+        renderer, ingredients_list, instructions_list, ingredients, instructions), args.repeat)
+
+    # Incremental updates: add one step to an already rendered recipe
+    incremental_ms = time_ms(app, lambda: renderer.append_instruction(
+        instructions_list, args.steps + 1, instructions[0]), args.repeat)
+
+    print(f"{args.steps}-step recipe, mean of {args.repeat} renders")
+    print(f"  per-line append       {append_ms:>8.2f} ms")
+    print(f"  RecipeRenderer        {renderer_ms:>8.2f} ms  ({append_ms / renderer_ms:.1f}x)")
+    print(f"  append one step       {incremental_ms:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark serving-size scaling.
+
+Scales a synthetic library of recipes (see ingredient_parse_benchmark) from
+4 servings to every size from 1 to 12: cold, with every variant parsed and
+rounded, and warm, from the ScaledRecipes memo as when the servings are
+stepped back and forth. Also reports how far unit-aware rounding moves the
+amounts from the exact scaled values.
+
+    python benchmarks/scaling_benchmark.py [--recipes N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingredient_parse_benchmark import synthesize_lines
+from ingredient_parser import UNITS, parse_ingredient, parse_ingredients
+from scaling import ScaledRecipes, scale_ingredients
+
+BASE_SERVINGS = 4
+SIZES = range(1, 13)
+
+
+def amount(parsed):
+    """Quantity in the unit's base (ml, g) where it has one, else as written"""
+    return parsed.quantity * (UNITS[parsed.unit][1] if parsed.unit else 1.0)
+
+
+def rounding_errors(recipes):
+    """Relative error of every scaled quantity against the exact product"""
+    errors = []
+    for ingredients in recipes:
+        originals = parse_ingredients(ingredients)
+        for servings in SIZES:
+            factor = servings / BASE_SERVINGS
+            for original, line in zip(originals, scale_ingredients(ingredients, BASE_SERVINGS, servings)):
+                if original.quantity is None or not original.quantity:
+                    continue
+                scaled = parse_ingredient(line)
+                exact = amount(original) * factor
+                if scaled.quantity is not None:
+                    errors.append(abs(amount(scaled) - exact) / exact)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=12, help="ingredients per recipe")
+    args = parser.parse_args()
+
+    lines = synthesize_lines(args.recipes * args.lines)
+    recipes = [lines[start:start + args.lines] for start in range(0, len(lines), args.lines)]
+    variants = len(recipes) * len(SIZES)
+    print(f"{len(recipes)} recipes of {args.lines} ingredients, {len(SIZES)} sizes each")
+
+    memo = ScaledRecipes(capacity=variants)
+    start = time.perf_counter()
+    for recipe_id, ingredients in enumerate(recipes):
+        for servings in SIZES:
+            memo.get(recipe_id, ingredients, BASE_SERVINGS, servings)
+    cold = (time.perf_counter() - start) / variants
+    print(f"cold (parse and round): {cold * 1e6:7.1f} us per variant")
+
+    start = time.perf_counter()
+    for recipe_id, ingredients in enumerate(recipes):
+        for servings in SIZES:
+            memo.get(recipe_id, ingredients, BASE_SERVINGS, servings)
+    warm = (time.perf_counter() - start) / variants
+    print(f"warm (memoized):        {warm * 1e6:7.1f} us per variant ({cold / warm:.0f}x)")
+
+    errors = rounding_errors(recipes[:200])
+    # The tail is amounts below the smallest measure ("1/16 pinch" becomes 1 pinch)
+    within = sum(error <= 0.1 for error in errors) / len(errors)
+    print(f"rounding error: median {statistics.median(errors):.1%}, "
+          f"95th percentile {statistics.quantiles(errors, n=20)[-1]:.1%}, {within:.0%} within 10%")
+
+
+if __name__ == "__main__":
+    main()
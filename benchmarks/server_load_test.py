@@ -0,0 +1,190 @@
+"""Load test for the recipe server.
+
+Starts recipe_server.py on a temporary library with the offline backend,
+each generation sleeping --latency seconds like a model call, and runs
+--clients kiosks against it at once. Every kiosk keeps one keep-alive
+connection and loops over a mix of requests: generate a recipe, search the
+history, open a recipe, favorite it and add it to the shopping list.
+
+Then two bursts show the limits: one client sending more generations at
+once than --per-client allows (429s), and many clients together sending more
+than the workers and queue hold (503s).
+
+Reports requests per second, latency percentiles per endpoint and the
+status codes seen.
+
+    python benchmarks/server_load_test.py [--clients 16] [--requests 40] [--workers 4] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ingredient_parse_benchmark import INGREDIENTS
+
+SEARCH_WORDS = ["chicken", "rice", "garlic", "stew", "lemon", "pasta", "onion", ""]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection speaking JSON"""
+
+    def __init__(self, host, port, client_id):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """(status, JSON body) of one request"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nX-Client-Id: {self.client_id}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader = self.writer = None
+
+
+async def timed(results, endpoint, connection, method, path, payload=None):
+    start = time.perf_counter()
+    status, data = await connection.request(method, path, payload)
+    results[endpoint].append((time.perf_counter() - start, status))
+    return status, data
+
+
+async def kiosk(host, port, number, requests, results, seed):
+    """One client looping over a mix of requests"""
+    rng = random.Random(seed)
+    connection = Connection(host, port, f"kiosk-{number}")
+    recipe_ids = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < 0.25 or not recipe_ids:
+            payload = {"ingredients": ", ".join(rng.sample(INGREDIENTS, 4)),
+                       "diets": rng.choice([[], [], ["vegetarian"]])}
+            status, data = await timed(results, "generate", connection, "POST", "/recipes/generate", payload)
+            if status == 200:
+                recipe_ids.append(data["id"])
+        elif roll < 0.5:
+            path = f"/recipes?search={rng.choice(SEARCH_WORDS)}&max_minutes=90&limit=20"
+            await timed(results, "search", connection, "GET", path)
+        elif roll < 0.75:
+            await timed(results, "recipe", connection, "GET", f"/recipes/{rng.choice(recipe_ids)}")
+        elif roll < 0.85:
+            await timed(results, "favorite", connection, "PUT", f"/favorites/{rng.choice(recipe_ids)}")
+        else:
+            payload = {"recipe_id": rng.choice(recipe_ids), "servings": rng.choice([2, 4, 6])}
+            await timed(results, "shopping list", connection, "POST", "/shopping-list", payload)
+    await connection.close()
+
+
+async def burst(host, port, client_ids, count, results, endpoint):
+    """count generations sent at once, each on its own connection, spread over client_ids"""
+    connections = [Connection(host, port, client_ids[number % len(client_ids)]) for number in range(count)]
+    payload = {"ingredients": "chicken, rice, leek"}
+    await asyncio.gather(*(timed(results, endpoint, connection, "POST", "/recipes/generate", payload)
+                           for connection in connections))
+    for connection in connections:
+        await connection.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def report(results):
+    print(f"{'endpoint':<16}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}  statuses")
+    for endpoint, samples in results.items():
+        latencies = [latency * 1000 for latency, _ in samples]
+        statuses = Counter(status for _, status in samples)
+        print(f"{endpoint:<16}{len(samples):>9}{percentile(latencies, 0.5):>9.1f}"
+              f"{percentile(latencies, 0.95):>9.1f}{max(latencies):>9.1f}  "
+              + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+async def run(host, port, args):
+    results = defaultdict(list)
+    start = time.perf_counter()
+    await asyncio.gather(*(kiosk(host, port, number, args.requests, results, number)
+                           for number in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    total = sum(len(samples) for samples in results.values())
+    generated = sum(1 for _, status in results["generate"] if status == 200)
+    print(f"{args.clients} clients, {total} requests in {elapsed:.2f} s: {total / elapsed:,.0f} requests/s, "
+          f"{generated / elapsed:.1f} generations/s")
+    if args.latency:
+        print(f"({args.workers} workers at {args.latency} s per generation manage at most "
+              f"{args.workers / args.latency:.1f} generations/s)")
+    report(results)
+
+    limits = defaultdict(list)
+    await burst(host, port, ["greedy-kiosk"], args.per_client * 4, limits, "one client")
+    crowd = [f"crowd-{number}" for number in range(args.workers + args.queue)]
+    await burst(host, port, crowd, (args.workers + args.queue) * 2, limits, "many clients")
+    print()
+    print(f"bursts (per-client limit {args.per_client}, {args.workers} workers + queue of {args.queue}):")
+    report(limits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=40, help="requests per client")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--per-client", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per offline generation")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "recipe_server.py"), "--db", os.path.join(directory, "recipes.db"),
+         "--port", "0", "--backend", "offline", "--latency", str(args.latency), "--workers", str(args.workers),
+         "--queue", str(args.queue), "--per-client", str(args.per_client)],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        line = server.stdout.readline()
+        match = re.search(r"http://([^:]+):(\d+)", line)
+        if match is None:
+            raise SystemExit(f"Server didn't start: {line!r}")
+        asyncio.run(run(match.group(1), int(match.group(2)), args))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
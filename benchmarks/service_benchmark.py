@@ -0,0 +1,86 @@
+"""Benchmark the headless recipe service.
+
+Reports what a script pays to use the recipe library without the GUI:
+
+- import time of recipe_service in fresh interpreters, next to importing
+  the whole app module as scripts had to before, and whether Qt, PIL, numpy
+  or speech modules came along
+- generate, save and load round trips per second against a temporary
+  database, with the offline stand-in backend so no model is called
+
+    python benchmarks/service_benchmark.py [--runs N] [--recipes N]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ("PyQt6", "PIL", "numpy", "speech_recognition", "google.generativeai")
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def import_time(module, runs):
+    """Median milliseconds to import module in a fresh interpreter, and the heavy modules it loaded"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    times, loaded = [], ""
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                capture_output=True, text=True, env=env, cwd=ROOT, check=True)
+        elapsed, _, loaded = result.stdout.strip().partition(" ")
+        times.append(float(elapsed))
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--recipes", type=int, default=500)
+    args = parser.parse_args()
+
+    for module in ("recipe_service", "MordernRecipeApp"):
+        milliseconds, loaded = import_time(module, args.runs)
+        print(f"import {module:<16} {milliseconds:7.1f} ms  heavy modules: {loaded or 'none'}")
+
+    from recipe_service import OfflineRecipeBackend, RecipeService
+
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        service = RecipeService(os.path.join(directory, "recipes.db"), OfflineRecipeBackend())
+        service.open()
+        service.migrate()
+        print(f"service created and opened in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        recipe_ids = [service.save_recipe(service.generate_recipe(f"chicken, leek {number}, rice"))
+                      for number in range(args.recipes)]
+        generate_save = time.perf_counter() - start
+
+        service.recipe_cache.clear()
+        start = time.perf_counter()
+        for recipe_id in recipe_ids:
+            service.get_recipe(recipe_id)
+        cold_loads = time.perf_counter() - start
+        print(f"generate + save: {args.recipes / generate_save:8,.0f} recipes/s")
+        print(f"load (cold):     {args.recipes / cold_loads:8,.0f} recipes/s")
+        service.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
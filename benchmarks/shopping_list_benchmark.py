@@ -0,0 +1,69 @@
+"""Benchmark shopping list aggregation.
+
+Builds a list from many synthetic recipes and times three things:
+
+- adding every recipe one at a time (incremental totals)
+- removing and re-adding single recipes on a full list, as the GUI does
+- rebuilding the whole list from scratch for each change, the cost the
+  incremental update avoids
+
+    python benchmarks/shopping_list_benchmark.py [--recipes N] [--ingredients N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingredient_parse_benchmark import synthesize_lines
+from shopping_list import ShoppingList
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=200)
+    parser.add_argument("--ingredients", type=int, default=12, help="ingredients per recipe")
+    parser.add_argument("--changes", type=int, default=200, help="remove/re-add cycles to time")
+    args = parser.parse_args()
+
+    lines = synthesize_lines(args.recipes * args.ingredients)
+    recipes = {recipe_id: lines[recipe_id * args.ingredients:(recipe_id + 1) * args.ingredients]
+               for recipe_id in range(args.recipes)}
+
+    shopping_list = ShoppingList()
+    start = time.perf_counter()
+    for recipe_id, ingredients in recipes.items():
+        shopping_list.add_recipe(recipe_id, f"Recipe {recipe_id}", ingredients)
+    build = time.perf_counter() - start
+    print(f"{args.recipes} recipes, {len(lines)} lines -> {len(shopping_list)} items "
+          f"in {len(shopping_list.sections())} sections")
+    print(f"build:       {build * 1000:8.1f} ms ({len(lines) / build:,.0f} lines/s)")
+
+    rng = random.Random(3)
+    changed_total = 0
+    start = time.perf_counter()
+    for _ in range(args.changes):
+        recipe_id = rng.randrange(args.recipes)
+        changed = shopping_list.remove_recipe(recipe_id)
+        changed |= shopping_list.add_recipe(recipe_id, f"Recipe {recipe_id}", recipes[recipe_id])
+        changed_total += len(changed)
+        for key in changed:
+            shopping_list.item(key)
+    incremental = (time.perf_counter() - start) / args.changes
+    print(f"incremental: {incremental * 1000:8.3f} ms per change "
+          f"({changed_total / args.changes:.1f} items updated)")
+
+    start = time.perf_counter()
+    for _ in range(max(1, args.changes // 20)):
+        rebuilt = ShoppingList()
+        for recipe_id, ingredients in recipes.items():
+            rebuilt.add_recipe(recipe_id, f"Recipe {recipe_id}", ingredients)
+        rebuilt.items()
+    rebuild = (time.perf_counter() - start) / max(1, args.changes // 20)
+    print(f"rebuild:     {rebuild * 1000:8.3f} ms per change ({rebuild / incremental:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
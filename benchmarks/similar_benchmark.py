@@ -0,0 +1,123 @@
+"""Benchmark "similar recipes" lookups.
+
+Builds the TF-IDF index over a synthetic library (ingredient lines from the
+parser benchmark, dish names and instructions mixing common cooking words
+with a long tail of rare ones), writes it to disk and maps it back in, then
+times top-k queries. Recall is measured against an exhaustive query that
+scores every term instead of only the most distinctive ones.
+
+    python benchmarks/similar_benchmark.py [--recipes N] [--queries N]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import similar_recipes
+from ingredient_parse_benchmark import synthesize_lines
+from similar_recipes import SimilarityIndex, recipe_terms
+
+DISHES = ["curry", "stew", "soup", "salad", "cake", "pie", "tart", "risotto", "pasta", "tacos",
+          "casserole", "stir fry", "bowl", "roast", "bread", "muffins", "cookies", "skillet",
+          "gratin", "chili", "noodles", "burger", "sandwich", "pancakes", "frittata"]
+STYLES = ["thai", "creamy", "spicy", "quick", "smoky", "lemon", "garlic", "herb", "honey",
+          "roasted", "grilled", "classic", "easy", "rustic", "sheet pan", "one pot", "vegan"]
+VERBS = ["chop", "dice", "saute", "simmer", "roast", "whisk", "fold", "bake", "grill", "stir",
+         "season", "blend", "toast", "braise", "drizzle", "garnish", "marinate", "sear", "boil"]
+
+
+def rare_words(count, seed):
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "ta", "zu", "ne", "po", "shi", "ven", "dor", "gal"]
+    return ["".join(rng.choice(syllables) for _ in range(3)) for _ in range(count)]
+
+
+def synthesize_library(count, seed=17):
+    """Return [(recipe ID, name, ingredients, instructions)]"""
+    rng = random.Random(seed)
+    lines = synthesize_lines(count * 10, seed)
+    rare = rare_words(5000, seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(rare))]
+    library = []
+    for recipe_id in range(count):
+        ingredients = rng.sample(lines, rng.randint(5, 14))
+        name = f"{rng.choice(STYLES)} {rng.choice(rare)} {rng.choice(DISHES)}"
+        instructions = [f"{rng.choice(VERBS)} the {' '.join(rng.choices(rare, weights, k=2))} "
+                        f"then {rng.choice(VERBS)} everything" for _ in range(rng.randint(3, 8))]
+        library.append((recipe_id, name, ingredients, instructions))
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+
+    library = synthesize_library(args.recipes)
+    start = time.perf_counter()
+    records = [(recipe_id, recipe_terms(name, ingredients, instructions))
+               for recipe_id, name, ingredients, instructions in library]
+    tokenize = time.perf_counter() - start
+
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    index.build(records)
+    build = time.perf_counter() - start
+    print(f"{len(records)} recipes, {len(index.terms)} terms: tokenize {tokenize:.2f} s, build {build:.2f} s")
+
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        index.compact(directory)
+        print(f"compact and write:  {(time.perf_counter() - start) * 1000:7.0f} ms")
+
+        index = SimilarityIndex()
+        start = time.perf_counter()
+        index.open(directory)
+        print(f"open (mapped):      {(time.perf_counter() - start) * 1000:7.0f} ms, vs rebuilding "
+              f"{(tokenize + build) * 1000:.0f} ms")
+
+        rng = random.Random(3)
+        sample = rng.sample([recipe_id for recipe_id, _ in records], min(args.queries, len(records)))
+        latencies = []
+        results = {}
+        for recipe_id in sample:
+            start = time.perf_counter()
+            results[recipe_id] = index.similar(recipe_id, args.limit)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies) * 1000
+        print(f"query top {args.limit}:       p50 {np.percentile(latencies, 50):.2f} ms, "
+              f"p95 {np.percentile(latencies, 95):.2f} ms, max {latencies.max():.2f} ms")
+
+        # Exhaustive: every query term scored
+        similar_recipes.QUERY_TERMS = 10 ** 6
+        found = total = 0
+        start = time.perf_counter()
+        for recipe_id in sample:
+            exact = {match.recipe_id for match in index.similar(recipe_id, args.limit)}
+            found += len(exact & {match.recipe_id for match in results[recipe_id]})
+            total += len(exact)
+        exhaustive = (time.perf_counter() - start) * 1000 / len(sample)
+        print(f"exhaustive query:   {exhaustive:7.2f} ms mean; pruned queries recall {found / max(1, total):.1%}")
+
+        added = [(args.recipes + recipe_id, recipe_terms(name, ingredients, instructions))
+                 for recipe_id, name, ingredients, instructions in synthesize_library(200, seed=99)]
+        start = time.perf_counter()
+        for recipe_id, terms in added:
+            index.add_recipe(recipe_id, terms)
+        print(f"incremental add:    {(time.perf_counter() - start) * 1000 / 200:7.2f} ms per recipe")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
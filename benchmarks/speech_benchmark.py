@@ -0,0 +1,243 @@
+"""Benchmark continuous voice capture over WAV fixtures.
+
+Each fixture is played back in real time (or --speed times faster) through
+a paced audio source that behaves like a microphone: audio that isn't read
+in time is dropped. Two strategies are timed on every file:
+
+- sequential: listen() for a phrase, recognize it, then listen again (the
+  single-shot flow), so speech during recognition is lost
+- pipelined: SpeechService continuous mode, where voice activity detection
+  cuts phrases and a second thread recognizes them during capture
+
+By default the recognizer is simulated with a fixed per-phrase latency plus
+a cost proportional to phrase length, so the benchmark needs neither network
+nor models. Pass --backend sphinx or --backend whisper to time a real
+offline engine on recorded fixtures.
+
+    python benchmarks/speech_benchmark.py [--fixtures DIR] [--backend NAME] [--speed X]
+"""
+import argparse
+import glob
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from PyQt6.QtCore import QCoreApplication
+
+from speech_service import RecognizerBackend, SpeechService, SPEECH_BACKENDS
+
+SAMPLE_RATE = 16000
+
+
+class SimulatedBackend(RecognizerBackend):
+    """Stands in for a recognizer: sleeps like one and names the phrase"""
+    name = "simulated"
+
+    def __init__(self, latency, real_time_factor, speed):
+        self.latency = latency
+        self.real_time_factor = real_time_factor
+        self.speed = speed
+
+    def recognize(self, recognizer, audio):
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        time.sleep((self.latency + seconds * self.real_time_factor) / self.speed)
+        return f"phrase of {seconds:.1f}s"
+
+
+class PacedStream:
+    """Releases audio no faster than it would arrive from a microphone"""
+
+    def __init__(self, stream, sample_rate, sample_width, speed, overflow_seconds=1.0):
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_width
+        self.speed = speed
+        self.overflow_frames = int(overflow_seconds * sample_rate)
+        self.start = time.perf_counter()
+        self.position = 0  # Frames handed out or dropped so far
+        self.dropped = 0
+
+    def available(self):
+        return int((time.perf_counter() - self.start) * self.sample_rate * self.speed)
+
+    def read(self, size):
+        # Like a sound card buffer, anything older than the overflow window is lost
+        behind = self.available() - self.position
+        if behind > self.overflow_frames:
+            skip = behind - self.overflow_frames
+            self.stream.read(skip)
+            self.position += skip
+            self.dropped += skip
+
+        wait = (self.position + size - self.available()) / (self.sample_rate * self.speed)
+        if wait > 0:
+            time.sleep(wait)
+        data = self.stream.read(size)
+        self.position += len(data) // self.frame_bytes
+        return data
+
+
+class PacedAudioFile(sr.AudioFile):
+    """An AudioFile source that plays back in real time"""
+    last = None
+
+    def __init__(self, path, speed):
+        super().__init__(path)
+        self.speed = speed
+
+    def __enter__(self):
+        super().__enter__()
+        self.stream = self.paced = PacedStream(self.stream, self.SAMPLE_RATE, self.SAMPLE_WIDTH, self.speed)
+        PacedAudioFile.last = self
+        return self
+
+
+def synthesize_fixtures(directory, files, phrases, seed=7):
+    """Write WAVs of background noise with voiced bursts; return {path: phrase count}"""
+    rng = random.Random(seed)
+    fixtures = {}
+    for index in range(files):
+        samples = array("h")
+
+        def add(seconds, amplitude=0.0):
+            base = rng.uniform(110, 220)
+            for i in range(int(seconds * SAMPLE_RATE)):
+                t = i / SAMPLE_RATE
+                value = rng.gauss(0, 150)
+                if amplitude:
+                    # A few harmonics with syllable-rate modulation
+                    envelope = 0.55 + 0.45 * math.sin(2 * math.pi * 4 * t)
+                    voice = sum(math.sin(2 * math.pi * base * h * t) / h for h in (1, 2, 3))
+                    value += amplitude * envelope * voice
+                samples.append(max(-32768, min(32767, int(value))))
+
+        add(1.5)
+        for _ in range(phrases):
+            add(rng.uniform(0.8, 2.5), amplitude=rng.uniform(3000, 7000))
+            add(rng.uniform(0.9, 1.5))
+
+        path = os.path.join(directory, f"fixture_{index}.wav")
+        with wave.open(path, "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(SAMPLE_RATE)
+            file.writeframes(samples.tobytes())
+        fixtures[path] = phrases
+    return fixtures
+
+
+def run_sequential(path, backend, speed):
+    """Single-shot flow: listen, recognize, listen again"""
+    recognizer = sr.Recognizer()
+    texts = []
+    start = time.perf_counter()
+    with PacedAudioFile(path, speed) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1.0)
+        threshold = recognizer.energy_threshold
+        while True:
+            recognizer.energy_threshold = threshold
+            try:
+                audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            except sr.WaitTimeoutError:
+                break
+            if not audio.frame_data:
+                break
+            try:
+                texts.append(backend.recognize(recognizer, audio))
+            except sr.UnknownValueError:
+                pass
+            if source.paced.position >= source.FRAME_COUNT:
+                break
+        audio_end = source.paced.start + source.FRAME_COUNT / (SAMPLE_RATE * speed)
+        dropped = source.paced.dropped / source.SAMPLE_RATE
+    finished = time.perf_counter()
+    return texts, finished - start, max(0.0, finished - audio_end) * speed, dropped
+
+
+def run_pipelined(app, path, backend, speed):
+    """Continuous mode: VAD capture with recognition on a second thread"""
+    service = SpeechService(source_factory=lambda _: PacedAudioFile(path, speed), backend=backend)
+    texts = []
+    done = []
+    service.phrase_recognized.connect(texts.append)
+    service.capture_stopped.connect(lambda: done.append(time.perf_counter()))
+
+    start = time.perf_counter()
+    service.start_continuous()
+    while not done:
+        app.processEvents()
+        time.sleep(0.002)
+    service.shutdown(wait=True)
+
+    source = PacedAudioFile.last
+    audio_end = source.paced.start + source.FRAME_COUNT / (SAMPLE_RATE * speed)
+    dropped = source.paced.dropped / source.SAMPLE_RATE
+    return texts, done[0] - start, max(0.0, done[0] - audio_end) * speed, dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="directory of WAV files (synthesized if omitted)")
+    parser.add_argument("--files", type=int, default=3, help="synthesized fixture count")
+    parser.add_argument("--phrases", type=int, default=6, help="phrases per synthesized fixture")
+    parser.add_argument("--backend", default="simulated",
+                        choices=["simulated"] + sorted(SPEECH_BACKENDS))
+    parser.add_argument("--latency", type=float, default=1.2,
+                        help="simulated recognizer latency per phrase in seconds")
+    parser.add_argument("--rtf", type=float, default=0.3,
+                        help="simulated recognizer cost per second of audio")
+    parser.add_argument("--speed", type=float, default=4.0,
+                        help="playback speed relative to real time")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.fixtures:
+            fixtures = {path: None for path in sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))}
+        else:
+            fixtures = synthesize_fixtures(temp_dir, args.files, args.phrases)
+        if not fixtures:
+            sys.exit("No WAV fixtures found")
+
+        if args.backend == "simulated":
+            speed = args.speed
+            make_backend = lambda: SimulatedBackend(args.latency, args.rtf, speed)
+        else:
+            speed = 1.0  # Real engines take real time
+            make_backend = SPEECH_BACKENDS[args.backend]
+
+        print(f"{len(fixtures)} fixtures, backend {args.backend}, playback x{speed:g}")
+        print("(times in audio seconds: tail = end of audio to last phrase recognized)")
+        totals = {"sequential": [0, 0.0, 0.0], "pipelined": [0, 0.0, 0.0]}
+        for path, expected in fixtures.items():
+            name = os.path.basename(path)
+            for mode in ("sequential", "pipelined"):
+                if mode == "sequential":
+                    texts, wall, tail, dropped = run_sequential(path, make_backend(), speed)
+                else:
+                    texts, wall, tail, dropped = run_pipelined(app, path, make_backend(), speed)
+                found = f"{len(texts)}/{expected}" if expected is not None else str(len(texts))
+                print(f"  {name:20} {mode:10} phrases {found:>5}  total {wall * speed:6.1f}s  "
+                      f"tail {tail:5.2f}s  audio dropped {dropped:5.1f}s")
+                totals[mode][0] += len(texts)
+                totals[mode][1] += tail
+                totals[mode][2] += dropped
+
+        expected_total = sum(count for count in fixtures.values() if count is not None)
+        for mode, (phrases, tail, dropped) in totals.items():
+            print(f"{mode:10} phrases {phrases}"
+                  + (f"/{expected_total}" if expected_total else "")
+                  + f", mean tail {tail / len(fixtures):.2f}s, audio dropped {dropped:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
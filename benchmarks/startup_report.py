@@ -0,0 +1,113 @@
+"""Cold-start timing report for CI.
+
+Runs the app in fresh interpreters and reports:
+
+- the slowest imports, parsed from ``python -X importtime``
+- the in-process milestones printed by ``MordernRecipeApp.py --startup-report``
+  (imports done, window created, first paint)
+- the wall-clock time from spawning the process until it is painted and ready
+
+    python benchmarks/startup_report.py [--runs N] [--top N] [--json PATH]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "MordernRecipeApp.py")
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_times(top):
+    """Return the top imports by cumulative time (microseconds) for the app module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import MordernRecipeApp"],
+        capture_output=True, text=True, env=child_env(), cwd=ROOT, check=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:top]
+
+
+def first_paint_run(workdir, app_args=()):
+    """Start the app once and return its milestones plus wall-clock time to the report"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, APP, "--startup-report", *app_args],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        env=child_env(), cwd=workdir
+    )
+    # The report line is printed right after first paint and warm-up, so
+    # reading it times spawn-to-ready without counting interpreter teardown
+    line = process.stdout.readline()
+    wall_ms = (time.perf_counter() - start) * 1000
+    process.wait(timeout=60)
+
+    report = json.loads(line)
+    report["wall_clock_ms"] = round(wall_ms, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--workdir", default=ROOT,
+                        help="directory to run the app in (where recipes.db lives)")
+    parser.add_argument("--no-splash", action="store_true",
+                        help="start the app without the warm-up splash screen")
+    args = parser.parse_args()
+
+    app_args = ["--no-splash"] if args.no_splash else []
+    runs = [first_paint_run(args.workdir, app_args) for _ in range(args.runs)]
+    timed_keys = [key for key in runs[0] if key.endswith("_ms")]
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in timed_keys
+    }
+
+    report = {
+        "runs": args.runs,
+        "median": summary,
+        "deferred_modules_loaded": runs[-1]["deferred_modules_loaded"],
+        "slowest_imports": import_times(args.top)
+    }
+
+    print("Startup milestones (median of %d runs)" % args.runs)
+    for key, value in summary.items():
+        print(f"  {key:<24}{value:>10.1f}")
+    print("\nSlowest imports (cumulative)")
+    for row in report["slowest_imports"]:
+        print(f"  {row['module']:<48}{row['cumulative_us'] / 1000:>10.1f} ms")
+    if report["deferred_modules_loaded"]:
+        print("\nWARNING: loaded before first paint:", ", ".join(report["deferred_modules_loaded"]))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
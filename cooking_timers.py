@@ -0,0 +1,199 @@
+"""Kitchen timers for cooking mode.
+
+step_timers() reads the times mentioned in an instruction ("Cover and simmer
+for 20 minutes", "bake 35-40 min", "rest for 1 hour 15 minutes") so cooking
+mode can offer them as one-click timers. Each comes with a short label from
+the start of its clause ("Cover and simmer"); ranges time their lower end,
+which is when to start checking.
+
+TimerEngine runs any number of timers at once. A timer stores the deadline
+it ends at on the monotonic clock rather than counting ticks down, so late
+or skipped ticks under load never make it drift; one periodic tick() reports
+every timer that has ended. The engine belongs to the app, not to a cooking
+window, so timers keep running when the window is closed and show up again
+when it is reopened. The module has no Qt dependency.
+"""
+import math
+import re
+import time
+from collections import namedtuple
+
+from durations import AMOUNT_PATTERN, UNIT_MINUTES, spell_out_numbers
+from ingredient_parser import TEXT_NORMALIZATION, parse_number
+
+StepTimer = namedtuple("StepTimer", ["label", "seconds", "text"])
+
+# Clauses are timed separately: "Simmer for 20 minutes, then bake for 35 minutes"
+CLAUSE_PATTERN = re.compile(r"[.;!?]\s+|,\s*(?:and\s+)?(?:then\s+)?|\s+(?:and\s+)?then\s+")
+# Words that end a clause's label: "Bake in the oven for 35 minutes" -> "Bake"
+LABEL_STOP_WORDS = {"for", "until", "about", "approximately", "around", "roughly", "another",
+                    "additional", "more", "or", "in", "at", "on", "over", "under", "to", "into",
+                    "with", "according", "while", "before", "after", "a", "an", "half", "up"}
+LABEL_WORDS = 3
+# Times after these aren't a countdown ("stirring every 5 minutes")
+NOT_A_TIMER_BEFORE = ("every ", "each ", "per ")
+# Times that add up into one timer when only these separate them ("1 hour and 15 minutes")
+JOINERS = {"", "and"}
+
+
+def format_duration(seconds):
+    """Short duration for buttons: "45 sec", "20 min", "1 hr 15 min" """
+    if seconds < 60:
+        return f"{seconds} sec"
+    minutes = math.ceil(seconds / 60)
+    hours, minutes = divmod(minutes, 60)
+    if not hours:
+        return f"{minutes} min"
+    return f"{hours} hr {minutes} min" if minutes else f"{hours} hr"
+
+
+def format_remaining(seconds):
+    """Countdown display: "4:05", or "1:04:05" from an hour up"""
+    seconds = math.ceil(seconds)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def clause_label(words):
+    """Leading words of a clause, up to the first word that starts its timing"""
+    label = []
+    for word in words:
+        if word in LABEL_STOP_WORDS or word[:1].isdigit() or len(label) == LABEL_WORDS:
+            break
+        label.append(word)
+    return " ".join(label).capitalize()
+
+
+def make_step_timer(label, low_seconds, high_seconds):
+    """StepTimer for a time or range, timing its lower end"""
+    seconds = math.ceil(low_seconds - 1e-9)
+    text = format_duration(seconds)
+    if high_seconds > low_seconds:
+        high_text = format_duration(math.ceil(high_seconds - 1e-9))
+        low_value, _, low_unit = text.rpartition(" ")
+        # "35-40 min" rather than "35 min-40 min" when the unit matches
+        if high_text.endswith(" " + low_unit) and " " not in low_value:
+            text = f"{low_value}-{high_text}"
+        else:
+            text = f"{text}-{high_text}"
+    return StepTimer(label or "Timer", seconds, text)
+
+
+def step_timers(instruction):
+    """Timers an instruction mentions, in order, as StepTimer(label, seconds, text)"""
+    timers = []
+    label = ""
+    normalized = " ".join(instruction.translate(TEXT_NORMALIZATION).lower().split())
+    for clause in CLAUSE_PATTERN.split(normalized):
+        words = re.findall(r"[a-z][a-z'-]*|\d\S*", clause)
+        label = clause_label(words) or label  # "Cook the pasta, about 10 minutes" uses the clause before
+        spelled = spell_out_numbers(clause)
+        pending = None  # (low, high, end) of the amount being added up
+        for match in AMOUNT_PATTERN.finditer(spelled):
+            low, high, unit = match.groups()
+            if spelled[:match.start()].endswith(NOT_A_TIMER_BEFORE):
+                continue
+            low_seconds = parse_number(low) * UNIT_MINUTES[unit] * 60
+            high_seconds = parse_number(high) * UNIT_MINUTES[unit] * 60 if high else low_seconds
+            if pending is not None and spelled[pending[2]:match.start()].strip() in JOINERS:
+                pending = (pending[0] + low_seconds, pending[1] + high_seconds, match.end())
+                continue
+            if pending is not None:
+                timers.append(make_step_timer(label, *pending[:2]))
+            pending = (low_seconds, high_seconds, match.end())
+        if pending is not None:
+            timers.append(make_step_timer(label, *pending[:2]))
+    # The same time mentioned twice in a step is one timer
+    unique = {}
+    for timer in timers:
+        if timer.seconds > 0:
+            unique.setdefault(timer.seconds, timer)
+    return list(unique.values())
+
+
+class CookingTimer:
+    """One countdown, timed by its deadline on the engine's clock"""
+
+    def __init__(self, timer_id, label, seconds, deadline, key=None):
+        self.timer_id = timer_id
+        self.label = label
+        self.seconds = seconds
+        self.deadline = deadline
+        self.key = key  # e.g. (recipe ID, step, seconds) for timers started from a step
+        self.paused_remaining = None  # Seconds left while paused
+
+    @property
+    def paused(self):
+        return self.paused_remaining is not None
+
+    def remaining(self, now):
+        """Seconds left at now (a reading of the engine's clock)"""
+        if self.paused_remaining is not None:
+            return self.paused_remaining
+        return max(self.deadline - now, 0.0)
+
+
+class TimerEngine:
+    """Any number of concurrent timers; the GUI calls tick() from a single periodic timer"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.timers = {}  # timer ID -> CookingTimer, in start order
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.timers)
+
+    def start(self, label, seconds, key=None):
+        """Start a timer and return it; a timer already running under key is returned instead"""
+        if key is not None:
+            existing = self.find(key)
+            if existing is not None:
+                return existing
+        timer = CookingTimer(self.next_id, label, seconds, self.clock() + seconds, key)
+        self.timers[timer.timer_id] = timer
+        self.next_id += 1
+        return timer
+
+    def find(self, key):
+        """The running timer started under key, or None"""
+        return next((timer for timer in self.timers.values() if timer.key == key), None)
+
+    def pause(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if timer is not None and not timer.paused:
+            timer.paused_remaining = timer.remaining(self.clock())
+
+    def resume(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if timer is not None and timer.paused:
+            timer.deadline = self.clock() + timer.paused_remaining
+            timer.paused_remaining = None
+
+    def toggle_pause(self, timer_id):
+        timer = self.timers.get(timer_id)
+        if timer is not None:
+            (self.resume if timer.paused else self.pause)(timer_id)
+
+    def cancel(self, timer_id):
+        self.timers.pop(timer_id, None)
+
+    def active(self):
+        """Timers still counting or paused, in start order, with the clock reading they're shown at"""
+        return list(self.timers.values()), self.clock()
+
+    def counting(self):
+        """True while any timer is counting down, i.e. while the GUI needs to tick"""
+        return any(not timer.paused for timer in self.timers.values())
+
+    def tick(self):
+        """Remove and return the timers that have ended since the last tick"""
+        now = self.clock()
+        finished = [timer for timer in self.timers.values()
+                    if not timer.paused and timer.deadline <= now]
+        for timer in finished:
+            del self.timers[timer.timer_id]
+        return finished
@@ -0,0 +1,278 @@
+"""Near-duplicate detection and merging for the recipe library.
+
+Generating from similar ingredients again and again leaves rows that are
+the same recipe in slightly different words. find_duplicates() streams the
+recipes table in id order and fingerprints every recipe with MinHash over
+its shingles:
+
+- word 3-grams of the name and of the instructions (tokens as in
+  similar_recipes, so plurals and filler words don't matter)
+- one shingle per ingredient key, so quantities and ingredient order don't
+  change the fingerprint
+
+Name and ingredient shingles are entered several times under different
+salts, which weights them above the instructions' wording. Signatures are
+cut into BANDS bands; recipes that agree on every value of some band land
+in the same LSH bucket and become candidate pairs. Only the band hashes are
+kept (BANDS * 4 bytes per recipe, 64 MB for a million recipes), never the
+text. Candidates are checked by exact Jaccard similarity of their shingle
+sets, re-read from the database a chunk at a time, and the confirmed pairs
+are joined into clusters with union-find.
+
+merge_duplicates() folds a cluster into one recipe: favorites move to the
+kept recipe, which inherits an image if it has none and the newest
+date_added, and the duplicate rows and their cached data are deleted in one
+transaction. The module has no Qt dependency.
+"""
+import json
+import zlib
+
+import numpy as np
+
+from ingredient_parser import KEY_CACHE_LIMIT, parse_ingredients
+from similar_recipes import tokens
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # Of NUM_PERMUTATIONS // BANDS values each; pairs above ~0.7 Jaccard collide in some band 99% of the time
+BAND_ROWS = NUM_PERMUTATIONS // BANDS
+# Jaccard similarity of two recipes' shingle sets from which they count as duplicates
+DUPLICATE_THRESHOLD = 0.6
+SHINGLE_WORDS = 3
+# Copies of each name and ingredient shingle, weighting them above the instructions
+NAME_COPIES = 3
+INGREDIENT_COPIES = 4
+BATCH_SIZE = 2000
+# Candidate pairs verified per database round trip
+VERIFY_CHUNK = 20000
+
+# Fixed seeds, so fingerprints are the same in every run
+_rng = np.random.default_rng(20240611)
+MULTIPLIERS = _rng.integers(1, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+OFFSETS = _rng.integers(0, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64)
+SALTS = _rng.integers(1, 2 ** 63, max(NAME_COPIES, INGREDIENT_COPIES), dtype=np.uint64)
+SHINGLE_MULTIPLIERS = _rng.integers(1, 2 ** 63, SHINGLE_WORDS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+BAND_MULTIPLIERS = _rng.integers(1, 2 ** 63, BAND_ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+BOUNDARY = np.uint64(zlib.crc32(b"\x00boundary"))
+
+_token_hash_cache = {}
+
+
+def token_hash(token):
+    """Stable 32-bit hash of a token or ingredient key"""
+    value = _token_hash_cache.get(token)
+    if value is None:
+        value = zlib.crc32(token.encode("utf-8"))
+        if len(_token_hash_cache) < KEY_CACHE_LIMIT:
+            _token_hash_cache[token] = value
+    return value
+
+
+def word_shingles(words):
+    """Hashes of the word 3-grams of a token list, two boundary tokens in front so short texts count"""
+    hashes = np.empty(len(words) + SHINGLE_WORDS - 1, dtype=np.uint64)
+    hashes[:SHINGLE_WORDS - 1] = BOUNDARY
+    hashes[SHINGLE_WORDS - 1:] = [token_hash(word) for word in words]
+    count = len(words)
+    shingles = np.zeros(count, dtype=np.uint64)
+    for position in range(SHINGLE_WORDS):
+        shingles += hashes[position:position + count] * SHINGLE_MULTIPLIERS[position]
+    return shingles
+
+
+def recipe_shingles(name, ingredients, instructions):
+    """Sorted unique shingle hashes of a recipe"""
+    parts = [word_shingles(tokens(" ".join(str(step) for step in instructions)))]
+    name_shingles = word_shingles(tokens(name or ""))
+    key_hashes = np.fromiter((token_hash("\x00" + parsed.key) for parsed in parse_ingredients(ingredients)
+                              if parsed.key), dtype=np.uint64)
+    for copy in range(NAME_COPIES):
+        parts.append(name_shingles ^ SALTS[copy])
+    for copy in range(INGREDIENT_COPIES):
+        parts.append(key_hashes * SHINGLE_MULTIPLIERS[0] ^ SALTS[copy])
+    return np.unique(np.concatenate(parts))
+
+
+def record_shingles(name, ingredients_json, instructions_json):
+    """recipe_shingles() of a stored row; rows with unreadable JSON have none"""
+    try:
+        return recipe_shingles(name, json.loads(ingredients_json), json.loads(instructions_json))
+    except (ValueError, TypeError):
+        return np.zeros(0, dtype=np.uint64)
+
+
+def signatures(shingle_sets):
+    """MinHash signatures (rows, NUM_PERMUTATIONS) of many shingle sets at once"""
+    lengths = np.fromiter((len(shingles) for shingles in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    result = np.full((len(shingle_sets), NUM_PERMUTATIONS), np.iinfo(np.uint32).max, dtype=np.uint32)
+    present = np.flatnonzero(lengths)
+    if not len(present):
+        return result
+    values = np.concatenate([shingle_sets[row] for row in present])
+    starts = np.zeros(len(present), dtype=np.int64)
+    np.cumsum(lengths[present][:-1], out=starts[1:])
+    for permutation in range(NUM_PERMUTATIONS):
+        # Multiply-shift hashing: the high 32 bits of a * x + b over 64-bit wraparound
+        hashed = ((values * MULTIPLIERS[permutation] + OFFSETS[permutation]) >> np.uint64(32)).astype(np.uint32)
+        result[present, permutation] = np.minimum.reduceat(hashed, starts)
+    return result
+
+
+def band_keys(signature_rows):
+    """One 32-bit bucket key per band of each signature"""
+    banded = signature_rows.reshape(len(signature_rows), BANDS, BAND_ROWS).astype(np.uint64)
+    keys = (banded * BAND_MULTIPLIERS).sum(axis=2, dtype=np.uint64)
+    return (keys >> np.uint64(32)).astype(np.uint32)
+
+
+def jaccard(first, second):
+    """Jaccard similarity of two sorted unique shingle arrays"""
+    if not len(first) or not len(second):
+        return 0.0
+    shared = len(np.intersect1d(first, second, assume_unique=True))
+    return shared / (len(first) + len(second) - shared)
+
+
+class DuplicateFinder:
+    """LSH buckets over streamed recipe fingerprints, then verified clusters"""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.size = 0
+        self.ids = np.zeros(1024, dtype=np.int64)
+        self.keys = np.zeros((1024, BANDS), dtype=np.uint32)
+        self.empty = np.zeros(1024, dtype=bool)  # Rows without shingles never match
+
+    def add(self, recipe_ids, shingle_sets):
+        """Fingerprint a batch of recipes"""
+        count = len(recipe_ids)
+        if self.size + count > len(self.ids):
+            capacity = max(len(self.ids) * 2, self.size + count)
+            self.ids = np.resize(self.ids, capacity)
+            self.keys = np.resize(self.keys, (capacity, BANDS))
+            self.empty = np.resize(self.empty, capacity)
+        rows = slice(self.size, self.size + count)
+        self.ids[rows] = recipe_ids
+        self.keys[rows] = band_keys(signatures(shingle_sets))
+        self.empty[rows] = [not len(shingles) for shingles in shingle_sets]
+        self.size += count
+
+    def candidate_pairs(self):
+        """Row pairs that share an LSH bucket in some band, as an (n, 2) array with row < row"""
+        rows = np.flatnonzero(~self.empty[:self.size])
+        pairs = np.zeros(0, dtype=np.int64)
+        if len(rows) < 2:
+            return pairs.reshape(0, 2)
+        for band in range(BANDS):
+            keys = self.keys[rows, band]
+            order = rows[np.argsort(keys, kind="stable")]
+            sorted_keys = self.keys[order, band]
+            starts = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+            # Each member of a bucket pairs with the bucket's first member
+            first = order[np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+            others = order != first
+            low = np.minimum(first[others], order[others])
+            high = np.maximum(first[others], order[others])
+            pairs = np.unique(np.concatenate([pairs, low * self.size + high]))
+        return np.stack([pairs // self.size, pairs % self.size], axis=1) if len(pairs) else pairs.reshape(0, 2)
+
+    def clusters(self, load_shingles):
+        """Groups of duplicate recipe IDs, smallest ID first.
+
+        load_shingles(recipe_ids) returns {recipe ID: shingles} for the
+        candidates being verified, a chunk at a time.
+        """
+        parent = {}
+
+        def root(row):
+            while parent.get(row, row) != row:
+                parent[row] = parent.get(parent[row], parent[row])
+                row = parent[row]
+            return row
+
+        pairs = self.candidate_pairs()
+        for start in range(0, len(pairs), VERIFY_CHUNK):
+            chunk = pairs[start:start + VERIFY_CHUNK]
+            shingles = load_shingles([int(recipe_id) for recipe_id in self.ids[np.unique(chunk)]])
+            for first, second in chunk.tolist():
+                first_root, second_root = root(first), root(second)
+                if first_root == second_root:
+                    continue
+                if jaccard(shingles.get(int(self.ids[first]), ()), shingles.get(int(self.ids[second]), ())) \
+                        >= self.threshold:
+                    parent[max(first_root, second_root)] = min(first_root, second_root)
+                    parent.setdefault(min(first_root, second_root), min(first_root, second_root))
+
+        groups = {}
+        for row in list(parent):
+            groups.setdefault(root(row), []).append(int(self.ids[row]))
+        return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+
+def stored_shingles(conn, recipe_ids):
+    """{recipe ID: shingles} for stored recipes"""
+    shingles = {}
+    for start in range(0, len(recipe_ids), 500):
+        batch = recipe_ids[start:start + 500]
+        for recipe_id, name, ingredients_json, instructions_json in conn.execute(
+                f"SELECT id, name, ingredients, instructions FROM recipes WHERE id IN ({','.join('?' * len(batch))})",
+                batch):
+            shingles[recipe_id] = record_shingles(name, ingredients_json, instructions_json)
+    return shingles
+
+
+def find_duplicates(conn, threshold=DUPLICATE_THRESHOLD, batch_size=BATCH_SIZE):
+    """Clusters of near-duplicate recipe IDs in the library, smallest ID first.
+
+    Reads the table in batches, so it's safe to run on a worker thread with
+    its own connection.
+    """
+    finder = DuplicateFinder(threshold)
+    last_id = 0
+    while True:
+        rows = conn.execute("SELECT id, name, ingredients, instructions FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+                            (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        finder.add([row[0] for row in rows], [record_shingles(*row[1:]) for row in rows])
+        last_id = rows[-1][0]
+    return finder.clusters(lambda recipe_ids: stored_shingles(conn, recipe_ids))
+
+
+def choose_keeper(conn, cluster):
+    """The recipe a cluster merges into: a favorite, else one with an image, else the oldest"""
+    placeholders = ",".join("?" * len(cluster))
+    favorites = {recipe_id for recipe_id, in conn.execute(
+        f"SELECT DISTINCT recipe_id FROM favorites WHERE recipe_id IN ({placeholders})", cluster)}
+    with_images = {recipe_id for recipe_id, in conn.execute(
+        f"SELECT id FROM recipes WHERE id IN ({placeholders}) AND image_url IS NOT NULL", cluster)}
+    return min(cluster, key=lambda recipe_id: (recipe_id not in favorites, recipe_id not in with_images, recipe_id))
+
+
+def merge_duplicates(conn, keep_id, duplicate_ids):
+    """Fold duplicate recipes into keep_id in one transaction; the caller updates in-memory state"""
+    duplicate_ids = [recipe_id for recipe_id in duplicate_ids if recipe_id != keep_id]
+    if not duplicate_ids:
+        return
+    placeholders = ",".join("?" * len(duplicate_ids))
+    with conn:
+        # Favorites follow the recipe; a recipe is only favorited once
+        favorited = conn.execute("SELECT 1 FROM favorites WHERE recipe_id = ? LIMIT 1", (keep_id,)).fetchone()
+        if favorited:
+            conn.execute(f"DELETE FROM favorites WHERE recipe_id IN ({placeholders})", duplicate_ids)
+        else:
+            conn.execute(f"UPDATE favorites SET recipe_id = ? WHERE recipe_id IN ({placeholders})",
+                         [keep_id] + duplicate_ids)
+            conn.execute("DELETE FROM favorites WHERE recipe_id = ? AND id NOT IN "
+                         "(SELECT MIN(id) FROM favorites WHERE recipe_id = ?)", (keep_id, keep_id))
+
+        # Keep an image if only a duplicate has one, and the place in history of the newest copy
+        conn.execute(f"""
+            UPDATE recipes SET
+                image_url = COALESCE(image_url, (SELECT image_url FROM recipes WHERE id IN ({placeholders})
+                                                 AND image_url IS NOT NULL ORDER BY id LIMIT 1)),
+                date_added = MAX(date_added, (SELECT MAX(date_added) FROM recipes WHERE id IN ({placeholders})))
+            WHERE id = ?
+        """, duplicate_ids + duplicate_ids + [keep_id])
+
+        conn.execute(f"DELETE FROM recipe_nutrition WHERE recipe_id IN ({placeholders})", duplicate_ids)
+        conn.execute(f"DELETE FROM recipes WHERE id IN ({placeholders})", duplicate_ids)
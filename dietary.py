@@ -0,0 +1,164 @@
+"""Rule-based dietary classification of recipes.
+
+classify() looks at a recipe's normalized ingredient keys and reports which
+diets it fits, as a bitmask with one bit per entry of DIETS. A recipe fits a
+diet when none of its ingredients contains a word the diet rules out
+("chicken stock" rules out vegetarian), unless the key is explicitly allowed
+("peanut butter" is vegan) or says so itself ("gluten-free flour").
+
+The mask is stored in the indexed diet_flags column. flags_condition()
+turns "has all these flags" into diet_flags IN (...) over every mask that
+includes them, at most 2 ** len(DIETS) values, so SQLite answers diet
+filters from the index instead of testing bits row by row.
+backfill_diet_flags() classifies older rows in batches. The module has no
+Qt dependency.
+"""
+import json
+
+from ingredient_parser import KEY_CACHE_LIMIT, parse_ingredients
+
+# Bit i of diet_flags is DIETS[i]; only ever append, the order is stored in the database
+DIETS = ["vegetarian", "vegan", "gluten_free", "keto", "low_carb"]
+DIET_BITS = {diet: 1 << bit for bit, diet in enumerate(DIETS)}
+ALL_DIETS = (1 << len(DIETS)) - 1
+DIET_LABELS = {
+    "vegetarian": "Vegetarian",
+    "vegan": "Vegan",
+    "gluten_free": "Gluten-Free",
+    "keto": "Keto",
+    "low_carb": "Low Carb"
+}
+
+# Recorded per row; bump it when the rules change so the backfill reclassifies every row
+DIET_CLASSIFIER_VERSION = 1
+
+# Ingredient words that rule a recipe out for a diet
+MEAT_WORDS = {"chicken", "beef", "pork", "lamb", "turkey", "bacon", "sausage", "ham", "steak",
+              "prosciutto", "chorizo", "veal", "duck", "mince", "pepperoni", "salami", "gelatin",
+              "lard", "pancetta", "meatball", "venison", "mutton", "brisket", "ribs", "rib"}
+SEAFOOD_WORDS = {"fish", "salmon", "tuna", "cod", "shrimp", "prawn", "crab", "lobster", "anchovy",
+                 "tilapia", "halibut", "scallop", "mussel", "clam", "oyster", "sardine", "squid",
+                 "worcestershire"}
+ANIMAL_PRODUCT_WORDS = {"milk", "butter", "cream", "cheese", "yogurt", "egg", "honey", "ghee",
+                        "buttermilk", "parmesan", "mozzarella", "feta", "ricotta", "mayonnaise",
+                        "cheddar", "gruyere", "brie", "mascarpone", "whey", "custard"}
+GLUTEN_WORDS = {"flour", "bread", "pasta", "spaghetti", "noodle", "couscous", "barley", "rye",
+                "breadcrumb", "crumb", "tortilla", "cracker", "beer", "seitan", "bun", "pita",
+                "wheat", "semolina", "bulgur", "farro", "spelt", "panko", "malt", "orzo", "pastry",
+                "macaroni", "penne", "fettuccine", "linguine", "lasagna", "ramen", "udon", "soy sauce"}
+HIGH_CARB_WORDS = {"sugar", "rice", "pasta", "spaghetti", "noodle", "bread", "potato", "flour",
+                   "tortilla", "couscous", "quinoa", "oats", "honey", "syrup", "corn", "bean",
+                   "cornstarch", "cornmeal", "macaroni", "penne", "lasagna", "agave", "molasses"}
+KETO_EXTRA_WORDS = {"banana", "mango", "pineapple", "grape", "raisin", "date", "lentil", "chickpea"}
+DIET_EXCLUDED_WORDS = {
+    "vegetarian": MEAT_WORDS | SEAFOOD_WORDS,
+    "vegan": MEAT_WORDS | SEAFOOD_WORDS | ANIMAL_PRODUCT_WORDS,
+    "gluten_free": GLUTEN_WORDS,
+    "keto": HIGH_CARB_WORDS | KETO_EXTRA_WORDS,
+    "low_carb": HIGH_CARB_WORDS
+}
+
+# Keys that contain an excluded word but are fine ("peanut butter" for vegans)
+VEGETARIAN_ALLOWED = {"vegetable stock", "vegetable broth", "mushroom stock", "mushroom broth"}
+LOW_CARB_ALLOWED = {"almond flour", "coconut flour", "cauliflower rice", "rice vinegar",
+                    "rice wine vinegar", "green bean"}
+DIET_ALLOWED_KEYS = {
+    "vegetarian": VEGETARIAN_ALLOWED,
+    "vegan": VEGETARIAN_ALLOWED | {"peanut butter", "almond butter", "cocoa butter", "coconut milk",
+                                   "almond milk", "oat milk", "soy milk", "coconut cream",
+                                   "cream of tartar"},
+    "gluten_free": {"rice flour", "almond flour", "coconut flour", "rice noodle", "corn tortilla",
+                    "tamari", "chickpea flour", "buckwheat noodle"},
+    "keto": LOW_CARB_ALLOWED,
+    "low_carb": LOW_CARB_ALLOWED
+}
+# Keys naming a substitute ("vegan cheese", "gluten-free pasta") are allowed for that diet
+DIET_ALLOWED_PREFIXES = {
+    "vegetarian": ("vegan ", "vegetarian ", "plant-based "),
+    "vegan": ("vegan ", "plant-based ", "dairy-free "),
+    "gluten_free": ("gluten-free ", "gluten free "),
+    "keto": ("sugar-free ", "sugar free ", "keto "),
+    "low_carb": ("sugar-free ", "sugar free ", "low-carb ", "low carb ")
+}
+
+_key_flags_cache = {}
+
+
+def diet_excludes(diet, key):
+    """True if an ingredient key rules a recipe out for a diet"""
+    if key in DIET_ALLOWED_KEYS.get(diet, ()) or key.startswith(DIET_ALLOWED_PREFIXES.get(diet, ())):
+        return False
+    words = DIET_EXCLUDED_WORDS.get(diet, set())
+    return key in words or any(word in words for word in key.split())
+
+
+def key_flags(key):
+    """Diets a single ingredient key allows, as a mask; cached, since a library repeats keys"""
+    flags = _key_flags_cache.get(key)
+    if flags is None:
+        flags = 0
+        for diet, bit in DIET_BITS.items():
+            if not diet_excludes(diet, key):
+                flags |= bit
+        if len(_key_flags_cache) < KEY_CACHE_LIMIT:
+            _key_flags_cache[key] = flags
+    return flags
+
+
+def classify_keys(keys):
+    """diet_flags mask for a set of ingredient keys (0 when there are none to judge)"""
+    if not keys:
+        return 0
+    flags = ALL_DIETS
+    for key in keys:
+        flags &= key_flags(key)
+    return flags
+
+
+def classify(ingredients):
+    """diet_flags mask for a recipe's ingredient lines"""
+    return classify_keys({parsed.key for parsed in parse_ingredients(ingredients) if parsed.key})
+
+
+def diets_in(flags):
+    """Names of the diets set in a mask"""
+    return [diet for diet, bit in DIET_BITS.items() if flags & bit]
+
+
+def flags_condition(column, diets):
+    """SQL condition and parameters for rows whose mask includes every diet listed"""
+    mask = 0
+    for diet in diets:
+        mask |= DIET_BITS[diet]
+    if not mask:
+        return "1", []
+    values = [value for value in range(1 << len(DIETS)) if value & mask == mask]
+    return f"{column} IN ({','.join('?' * len(values))})", values
+
+
+def backfill_diet_flags(conn, batch_size=500):
+    """Classify rows not yet classified by this rule version, committing per batch.
+
+    Returns the number of rows updated. Safe to run on a worker thread with
+    its own connection; each batch is a short write transaction.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, ingredients FROM recipes WHERE id > ? AND diet_flags_version < ? ORDER BY id LIMIT ?",
+            (last_id, DIET_CLASSIFIER_VERSION, batch_size)
+        ).fetchall()
+        if not rows:
+            return updated
+        updates = []
+        for recipe_id, ingredients_json in rows:
+            try:
+                flags = classify(json.loads(ingredients_json))
+            except (ValueError, TypeError):
+                flags = 0
+            updates.append((flags, DIET_CLASSIFIER_VERSION, recipe_id))
+        conn.executemany("UPDATE recipes SET diet_flags = ?, diet_flags_version = ? WHERE id = ?", updates)
+        conn.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
@@ -0,0 +1,151 @@
+"""Parsing of free-text recipe times into minutes.
+
+Generated recipes give prep and cook times as text ("15 minutes",
+"1 hr 20 mins", "1½ hours", "10-15 min", "PT1H20M"). parse_duration()
+reduces them to whole minutes; ranges count as their upper end, so "under 30
+minutes" never includes a recipe that can take longer. That holds for ranges
+with units on both ends too: "1 hour 30 minutes to 2 hours" is 120.
+
+The parsed values live in indexed prep_minutes, cook_minutes and
+total_minutes columns of the recipes table. backfill_durations() fills them
+for older rows in batches, and range_condition() builds the WHERE clause
+for time filters so SQLite answers them from the index. The module has no
+Qt dependency.
+"""
+import math
+import re
+
+from ingredient_parser import TEXT_NORMALIZATION, parse_number
+
+# Recorded per row; bump it when parsing changes so the backfill re-parses every row
+DURATION_PARSER_VERSION = 2
+
+UNIT_MINUTES = {
+    "s": 1 / 60, "sec": 1 / 60, "secs": 1 / 60, "second": 1 / 60, "seconds": 1 / 60,
+    "m": 1, "min": 1, "mins": 1, "minute": 1, "minutes": 1, "mn": 1,
+    "h": 60, "hr": 60, "hrs": 60, "hour": 60, "hours": 60,
+    "d": 1440, "day": 1440, "days": 1440
+}
+NUMBER_WORDS = {
+    "a": "1", "an": "1", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10", "twelve": "12",
+    "fifteen": "15", "twenty": "20", "thirty": "30", "forty": "40", "forty-five": "45",
+    "sixty": "60", "ninety": "90", "half": "1/2", "quarter": "1/4"
+}
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+)"
+AMOUNT_PATTERN = re.compile(
+    rf"({_NUMBER})(?:\s*(?:-|to|or)\s*({_NUMBER}))?\s*"
+    r"(seconds?|secs?|s|minutes?|mins?|mn|m|hours?|hrs?|h|days?|d)\b\.?")
+CLOCK_PATTERN = re.compile(r"^(\d+):([0-5]\d)$")
+ISO_PATTERN = re.compile(r"^p(?:(\d+)d)?(?:t(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m)?(?:(\d+(?:\.\d+)?)s)?)?$")
+WORD_PATTERN = re.compile(r"\b(" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")\b")
+PLAIN_NUMBER_PATTERN = re.compile(rf"^({_NUMBER})$")
+# Between the two ends of a range whose ends have their own units ("1 hr 30 min - 2 hrs");
+# "10-15 minutes" is one amount and matched by AMOUNT_PATTERN instead
+RANGE_SEPARATOR_PATTERN = re.compile(r"(?<=[a-z.])\s*(?:-|\bto\b|\bor\b)\s*(?=\d)")
+
+_duration_cache = {}
+
+
+def parse_duration(text):
+    """Whole minutes in a recipe time like "1 hr 20 mins", or None if it has no time in it"""
+    if not text or not isinstance(text, str):
+        return None
+    cached = _duration_cache.get(text)
+    if cached is not None or text in _duration_cache:
+        return cached
+
+    minutes = _parse_duration(text)
+    if len(_duration_cache) < 10000:
+        _duration_cache[text] = minutes
+    return minutes
+
+
+def _parse_duration(text):
+    normalized = " ".join(text.translate(TEXT_NORMALIZATION).lower().split())
+
+    iso = ISO_PATTERN.match(normalized)
+    if iso and any(iso.groups()):
+        days, hours, minutes, seconds = (float(value or 0) for value in iso.groups())
+        return math.ceil(days * 1440 + hours * 60 + minutes + seconds / 60)
+
+    clock = CLOCK_PATTERN.match(normalized)
+    if clock:
+        return int(clock.group(1)) * 60 + int(clock.group(2))
+
+    normalized = spell_out_numbers(normalized)
+
+    # Amounts add up within each end of a range ("1 hr 30 min"); the range is its longest end
+    ends = [end for end in map(sum_amounts, RANGE_SEPARATOR_PATTERN.split(normalized)) if end is not None]
+    if ends:
+        total = max(ends)
+    else:
+        plain = PLAIN_NUMBER_PATTERN.match(normalized)
+        if not plain:
+            return None
+        total = parse_number(plain.group(1))  # A bare number is minutes
+    return math.ceil(total - 1e-9)
+
+
+def sum_amounts(text):
+    """Minutes of every amount in text added up, or None if it has none"""
+    amounts = [parse_number(high or low) * UNIT_MINUTES[unit] for low, high, unit in AMOUNT_PATTERN.findall(text)]
+    return sum(amounts) if amounts else None
+
+
+def spell_out_numbers(normalized):
+    """Lowercase, normalized time text with number words written as digits ("an hour" -> "1 hour")"""
+    # "half an hour" -> "1/2 1 hour" would double count, so handle the article first
+    normalized = normalized.replace("half an hour", "30 minutes").replace("half hour", "30 minutes")
+    normalized = normalized.replace("an hour and a half", "90 minutes")
+    normalized = WORD_PATTERN.sub(lambda match: NUMBER_WORDS[match.group(1)], normalized)
+    # "1 and 1/2 hours"
+    return re.sub(r"(\d+) and (\d+/\d+)", r"\1 \2", normalized)
+
+
+def duration_columns(prep_time, cook_time):
+    """(prep_minutes, cook_minutes, total_minutes) for a recipe's time texts"""
+    prep = parse_duration(prep_time)
+    cook = parse_duration(cook_time)
+    if prep is None and cook is None:
+        return None, None, None
+    return prep, cook, (prep or 0) + (cook or 0)
+
+
+def range_condition(column, minimum=None, maximum=None):
+    """SQL condition and parameters for minimum <= column <= maximum (None for open ends)"""
+    conditions, parameters = [], []
+    if minimum is not None:
+        conditions.append(f"{column} >= ?")
+        parameters.append(minimum)
+    if maximum is not None:
+        conditions.append(f"{column} <= ?")
+        parameters.append(maximum)
+    return " AND ".join(conditions) or "1", parameters
+
+
+def backfill_durations(conn, batch_size=500):
+    """Parse times of rows not yet parsed by this parser version, committing per batch.
+
+    Returns the number of rows updated. Safe to run on a worker thread with
+    its own connection; each batch is a short write transaction.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, prep_time, cook_time FROM recipes WHERE id > ? AND durations_parsed < ? "
+            "ORDER BY id LIMIT ?", (last_id, DURATION_PARSER_VERSION, batch_size)
+        ).fetchall()
+        if not rows:
+            return updated
+        conn.executemany(
+            "UPDATE recipes SET prep_minutes = ?, cook_minutes = ?, total_minutes = ?, durations_parsed = ? "
+            "WHERE id = ?",
+            [(*duration_columns(prep_time, cook_time), DURATION_PARSER_VERSION, recipe_id)
+             for recipe_id, prep_time, cook_time in rows]
+        )
+        conn.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
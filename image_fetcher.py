@@ -0,0 +1,145 @@
+"""Pooled, cached downloads of remote recipe images.
+
+ImageFetcher shares one requests.Session, so connections are pooled and kept
+alive across downloads, and runs fetches on a bounded thread pool. Responses
+stream straight to disk. Each cached file keeps its ETag and Last-Modified
+headers in a small JSON sidecar, so stale entries are revalidated with a
+conditional request instead of being downloaded again.
+
+The module has no Qt dependency; callers get concurrent.futures.Future
+objects and bridge results to the GUI thread themselves.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REMOTE_IMAGE_CACHE_DIR = os.path.join("cache", "remote_images")
+CHUNK_SIZE = 64 * 1024
+
+
+def is_remote_url(image_url):
+    return bool(image_url) and image_url.startswith(("http://", "https://"))
+
+
+class ImageFetcher:
+    """Downloads remote images into a local cache with revalidation"""
+
+    def __init__(self, cache_dir=REMOTE_IMAGE_CACHE_DIR, max_workers=4, max_age=3600,
+                 timeout=15, session=None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.max_age = max_age  # Seconds a cached file is trusted without revalidating
+        self.timeout = timeout
+        self._session = session
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="image-fetch")
+        self.in_flight = {}
+        self.lock = threading.RLock()  # Done callbacks may run while it is held
+
+    @property
+    def session(self):
+        """The shared session, created on first use (requests is slow to import)"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def paths_for(self, url):
+        """Return (image path, metadata path) for url in the cache"""
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest[:2], digest)
+        return base, base + ".json"
+
+    def read_metadata(self, url):
+        image_path, meta_path = self.paths_for(url)
+        if not os.path.exists(image_path):
+            return None
+        try:
+            with open(meta_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def cached_path(self, url):
+        """Return the cached file for url without touching the network, or None"""
+        image_path, _ = self.paths_for(url)
+        return image_path if os.path.exists(image_path) else None
+
+    def fetch(self, url):
+        """Download url if needed and return the local path (blocking)"""
+        image_path, meta_path = self.paths_for(url)
+        metadata = self.read_metadata(url)
+
+        if metadata is not None and time.time() - metadata.get("checked_at", 0) < self.max_age:
+            return image_path
+
+        headers = {}
+        if metadata:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304 and metadata is not None:
+                metadata["checked_at"] = time.time()
+                self.write_metadata(meta_path, metadata)
+                return image_path
+
+            response.raise_for_status()
+
+            # Stream to a temporary file so the body is never held in memory
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            temp_path = f"{image_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    file.write(chunk)
+            os.replace(temp_path, image_path)
+
+            self.write_metadata(meta_path, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type"),
+                "checked_at": time.time()
+            })
+        return image_path
+
+    @staticmethod
+    def write_metadata(meta_path, metadata):
+        temp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(metadata, file)
+        os.replace(temp_path, meta_path)
+
+    def fetch_async(self, url):
+        """Queue a download; concurrent requests for the same URL share one Future"""
+        with self.lock:
+            future = self.in_flight.get(url)
+            if future is None:
+                future = self.executor.submit(self.fetch, url)
+                self.in_flight[url] = future
+                future.add_done_callback(lambda _, url=url: self.forget(url))
+            return future
+
+    def forget(self, url):
+        with self.lock:
+            self.in_flight.pop(url, None)
+
+    def prefetch(self, urls):
+        """Queue downloads for every remote URL in urls and return their Futures"""
+        return [self.fetch_async(url) for url in dict.fromkeys(urls) if is_remote_url(url)]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._session is not None:
+            self._session.close()
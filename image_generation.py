@@ -0,0 +1,157 @@
+"""Background recipe image generation.
+
+After a recipe is saved, its model-written image_prompt is handed to an
+ImageGenerationPipeline. The pipeline runs the configured backend on its own
+thread pool, stores the result in an image store and reports the stored
+image's URL or path back on the GUI thread, where the app records it in
+recipes.image_url. Text rendering never waits on any of this.
+
+Backends implement ImageBackend.generate(prompt) -> (bytes, extension).
+ProceduralImageBackend is a local, offline stand-in that paints a
+deterministic picture from the prompt.
+"""
+import hashlib
+import math
+import random
+
+from PyQt6.QtCore import (QObject, QRunnable, QThreadPool, QBuffer, QByteArray,
+                          QIODevice, QPointF, Qt, pyqtSignal)
+from PyQt6.QtGui import QColor, QImage, QPainter, QRadialGradient, QLinearGradient
+
+from image_store import ContentAddressedImageStore
+
+class ImageBackend:
+    """Turns an image prompt into encoded image bytes"""
+    name = "base"
+
+    def generate(self, prompt):
+        """Return (image_bytes, file_extension) for prompt"""
+        raise NotImplementedError
+
+
+class ProceduralImageBackend(ImageBackend):
+    """Offline stand-in that paints a deterministic dish-like image from the prompt"""
+    name = "procedural"
+
+    def __init__(self, width=768, height=512):
+        self.width = width
+        self.height = height
+
+    def generate(self, prompt):
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        hue = rng.randrange(360)
+
+        # QImage painting is safe off the GUI thread, unlike QPixmap
+        image = QImage(self.width, self.height, QImage.Format.Format_RGB32)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Table background
+        background = QLinearGradient(0, 0, self.width, self.height)
+        background.setColorAt(0, QColor.fromHsv(hue, 60, 90))
+        background.setColorAt(1, QColor.fromHsv((hue + 30) % 360, 80, 50))
+        painter.fillRect(image.rect(), background)
+
+        # Plate
+        center = QPointF(self.width / 2, self.height / 2)
+        plate_radius = min(self.width, self.height) * 0.42
+        plate = QRadialGradient(center, plate_radius)
+        plate.setColorAt(0, QColor(250, 250, 250))
+        plate.setColorAt(0.85, QColor(225, 225, 228))
+        plate.setColorAt(1, QColor(180, 180, 185))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(plate)
+        painter.drawEllipse(center, plate_radius, plate_radius)
+
+        # Food: overlapping blobs in a palette drawn from the prompt
+        food_hues = [(hue + offset) % 360 for offset in (0, 20, 140, 200)]
+        for _ in range(rng.randint(18, 30)):
+            distance = rng.uniform(0, plate_radius * 0.6)
+            angle = rng.uniform(0, 2 * math.pi)
+            position = center + QPointF(distance * math.cos(angle), distance * math.sin(angle))
+            radius = rng.uniform(plate_radius * 0.08, plate_radius * 0.22)
+            color = QColor.fromHsv(rng.choice(food_hues), rng.randint(120, 230), rng.randint(120, 240))
+            color.setAlpha(rng.randint(170, 240))
+            painter.setBrush(color)
+            painter.drawEllipse(position, radius, radius * rng.uniform(0.6, 1.0))
+
+        painter.end()
+        return encode_image(image, "PNG"), "png"
+
+
+def encode_image(image, image_format="PNG"):
+    """Encode a QImage to bytes"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, image_format)
+    buffer.close()
+    return bytes(data)
+
+
+# Available backends by name
+IMAGE_BACKENDS = {
+    ProceduralImageBackend.name: ProceduralImageBackend
+}
+
+
+class ImageTaskSignals(QObject):
+    finished = pyqtSignal(int, str)  # recipe ID, stored image URL or path
+    error = pyqtSignal(int, str)  # recipe ID, message
+
+
+class ImageGenerationTask(QRunnable):
+    def __init__(self, recipe_id, prompt, backend, store):
+        super().__init__()
+        self.recipe_id = recipe_id
+        self.prompt = prompt
+        self.backend = backend
+        self.store = store
+        self.signals = ImageTaskSignals()
+
+    def run(self):
+        try:
+            data, extension = self.backend.generate(self.prompt)
+            path = self.store.put(data, extension)
+            self.signals.finished.emit(self.recipe_id, path)
+        except Exception as e:
+            self.signals.error.emit(self.recipe_id, f"Image generation failed: {e}")
+
+
+class ImageGenerationPipeline(QObject):
+    """Queues image generation jobs and reports results on the GUI thread"""
+    image_ready = pyqtSignal(int, str)  # recipe ID, stored image URL or path
+    image_failed = pyqtSignal(int, str)
+
+    def __init__(self, backend=None, store=None, max_workers=1, parent=None):
+        super().__init__(parent)
+        self.backend = backend or ProceduralImageBackend()
+        # Anything with put(data, extension) -> URL or path, e.g. image_store.ImageStore
+        self.store = store or ContentAddressedImageStore()
+        # A pool of its own, so slow generations never hold up thumbnail decoding
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_workers)
+        self.pending = {}
+
+    def submit(self, recipe_id, prompt):
+        """Queue generation of an image for recipe_id; ignored if one is queued already"""
+        if not prompt or recipe_id in self.pending:
+            return
+        task = ImageGenerationTask(recipe_id, prompt, self.backend, self.store)
+        task.signals.finished.connect(self.handle_finished)
+        task.signals.error.connect(self.handle_error)
+        self.pending[recipe_id] = task.signals
+        self.thread_pool.start(task)
+
+    def handle_finished(self, recipe_id, path):
+        self.pending.pop(recipe_id, None)
+        self.image_ready.emit(recipe_id, path)
+
+    def handle_error(self, recipe_id, message):
+        self.pending.pop(recipe_id, None)
+        self.image_failed.emit(recipe_id, message)
+
+    def wait_for_done(self, timeout_ms=-1):
+        """Block until queued jobs finish (for scripts and shutdown)"""
+        return self.thread_pool.waitForDone(timeout_ms)
@@ -0,0 +1,250 @@
+"""Multi-resolution recipe image storage.
+
+Images are ingested once. The original bytes are kept content-addressed, and
+pre-scaled variants for each display size (thumbnail, card, hero) are written
+next to them and recorded in the image_variants table. Readers ask for a
+size and get the smallest variant that covers it, so nothing scales full-size
+images on demand. Decoded pixmaps share the global byte-budgeted LRU from
+thumbnails.py.
+
+Images are referenced as "store://<sha256>" URLs in recipes.image_url.
+collect_garbage() removes unreferenced images and stray files, and is safe
+to run on a background thread.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageWriter, QPixmap
+
+from thumbnails import global_pixmap_cache
+
+IMAGE_STORE_DIR = "images"
+STORE_URL_PREFIX = "store://"
+
+# (name, box width, box height); images are scaled to fit inside the box
+IMAGE_VARIANTS = [
+    ("thumb", 160, 120),
+    ("card", 250, 150),
+    ("hero", 600, 400)
+]
+
+IMAGE_VARIANTS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS image_variants (
+    image_hash TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (image_hash, variant)
+)
+'''
+
+
+def write_atomically(path, data):
+    """Write bytes to path via a temporary file so readers never see partial data"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+
+class ContentAddressedImageStore:
+    """Stores image bytes under their SHA-256, so identical images are kept once"""
+
+    def __init__(self, root=IMAGE_STORE_DIR):
+        self.root = root
+
+    def path_for(self, digest, extension):
+        # Fan out by the first two hex digits to keep directories small
+        return os.path.join(self.root, digest[:2], f"{digest}.{extension}")
+
+    def put(self, data, extension="png"):
+        """Write data if it isn't stored yet and return its path"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, extension)
+        if not os.path.exists(path):
+            write_atomically(path, data)
+        return path
+
+
+def default_variant_format():
+    """WebP when Qt's image plugins can write it, PNG otherwise"""
+    return "webp" if b"webp" in QImageWriter.supportedImageFormats() else "png"
+
+
+def covers(width, height, size):
+    """True if an image of width x height fits size without upscaling"""
+    return width >= size.width() or height >= size.height()
+
+
+class ImageStore:
+    """Stores images with pre-scaled variants and serves the nearest one for a size.
+
+    Thread-safe: ingestion and garbage collection may run on worker threads,
+    they share one SQLite connection guarded by a lock. pixmap() must be
+    called on the GUI thread.
+    """
+
+    def __init__(self, db_path, root=IMAGE_STORE_DIR, variants=IMAGE_VARIANTS,
+                 variant_format=None, memory_cache=None):
+        self.root = root
+        self.variant_sizes = variants
+        self.variant_format = variant_format or default_variant_format()
+        self.originals = ContentAddressedImageStore(root)
+        self.memory_cache = memory_cache or global_pixmap_cache()
+        self.variant_index = {}  # image hash -> [(width, height, path)] by area
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        with self.lock:
+            self.conn.execute(IMAGE_VARIANTS_SCHEMA)
+            self.conn.commit()
+
+    @staticmethod
+    def url_for(image_hash):
+        return STORE_URL_PREFIX + image_hash
+
+    @staticmethod
+    def hash_from_url(image_url):
+        """Return the image hash of a store URL, or None for other URLs and paths"""
+        if image_url and image_url.startswith(STORE_URL_PREFIX):
+            return image_url[len(STORE_URL_PREFIX):]
+        return None
+
+    def put(self, data, extension="png"):
+        """Ingest encoded image bytes and return the image's store URL"""
+        image = QImage.fromData(data)
+        if image.isNull():
+            raise ValueError("Unsupported or corrupt image data")
+
+        original_path = self.originals.put(data, extension)
+        image_hash = os.path.basename(original_path).split(".")[0]
+        now = time.time()
+        rows = [(image_hash, "full", image.width(), image.height(), original_path, len(data), now)]
+
+        for name, box_width, box_height in self.variant_sizes:
+            if image.width() <= box_width and image.height() <= box_height:
+                continue  # Never upscale; the original already serves this size
+
+            path = os.path.join(os.path.dirname(original_path),
+                                f"{image_hash}.{name}.{self.variant_format}")
+            scaled = image.scaled(box_width, box_height, Qt.AspectRatioMode.KeepAspectRatio,
+                                  Qt.TransformationMode.SmoothTransformation)
+            if not os.path.exists(path):
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                if not scaled.save(temp_path, self.variant_format.upper()):
+                    continue
+                os.replace(temp_path, path)
+            rows.append((image_hash, name, scaled.width(), scaled.height(), path,
+                         os.path.getsize(path), now))
+
+        with self.lock:
+            self.conn.executemany("""
+            INSERT OR REPLACE INTO image_variants
+                (image_hash, variant, width, height, path, bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+
+        self.variant_index.pop(image_hash, None)
+        return self.url_for(image_hash)
+
+    def variants(self, image_hash):
+        """Return [(width, height, path)] for an image, smallest first"""
+        variants = self.variant_index.get(image_hash)
+        if variants is None:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT width, height, path FROM image_variants WHERE image_hash = ?",
+                    (image_hash,)
+                ).fetchall()
+            variants = sorted(rows, key=lambda row: row[0] * row[1])
+            self.variant_index[image_hash] = variants
+        return variants
+
+    def resolve(self, image_url, size):
+        """Return the file path to use for image_url displayed at size.
+
+        Store URLs resolve to the smallest variant that covers size, or the
+        largest one if none does. Plain file paths are returned unchanged.
+        """
+        if not image_url:
+            return None
+        image_hash = self.hash_from_url(image_url)
+        if image_hash is None:
+            return image_url
+
+        variants = self.variants(image_hash)
+        if not variants:
+            return None
+        for width, height, path in variants:
+            if covers(width, height, size):
+                return path
+        return variants[-1][2]
+
+    def pixmap(self, image_url, size):
+        """Return a QPixmap of the nearest variant, through the shared memory cache"""
+        path = self.resolve(image_url, size)
+        if path is None:
+            return None
+
+        pixmap = self.memory_cache.get(path)
+        if pixmap is None:
+            pixmap = QPixmap(path)
+            if pixmap.isNull():
+                return None
+            self.memory_cache.put(path, pixmap)
+        return pixmap
+
+    def collect_garbage(self, reference_query="SELECT image_url FROM recipes WHERE image_url IS NOT NULL",
+                        grace_seconds=3600):
+        """Delete images no recipe references and files the store doesn't track.
+
+        Anything newer than grace_seconds is left alone, so images that were
+        just ingested but not yet linked to a recipe survive. Returns the
+        number of files removed.
+        """
+        cutoff = time.time() - grace_seconds
+
+        with self.lock:
+            referenced_urls = [row[0] for row in self.conn.execute(reference_query)]
+            referenced_hashes = {self.hash_from_url(url) for url in referenced_urls}
+            # Images referenced by plain path (stored before variants existed)
+            referenced_paths = {os.path.abspath(url) for url in referenced_urls
+                                if self.hash_from_url(url) is None}
+
+            rows = self.conn.execute(
+                "SELECT image_hash, path, created_at FROM image_variants"
+            ).fetchall()
+            orphaned = {image_hash for image_hash, _, created_at in rows
+                        if image_hash not in referenced_hashes and created_at < cutoff}
+            self.conn.executemany("DELETE FROM image_variants WHERE image_hash = ?",
+                                  [(image_hash,) for image_hash in orphaned])
+            self.conn.commit()
+
+        keep = referenced_paths | {os.path.abspath(path) for image_hash, path, _ in rows
+                                   if image_hash not in orphaned}
+        for image_hash in orphaned:
+            self.variant_index.pop(image_hash, None)
+
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.abspath(os.path.join(directory, name))
+                if path in keep:
+                    continue
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -0,0 +1,420 @@
+"""Fast ingredient phrase parsing.
+
+parse_ingredient() splits a free-form ingredient line into quantity, unit,
+ingredient name and preparation note:
+
+    >>> parse_ingredient("1 1/2 cups finely chopped onions, divided")
+    ParsedIngredient(quantity=1.5, quantity_max=None, unit='cup', name='onions',
+                     note='finely chopped, divided', key='onion', raw=...)
+
+Quantities may be integers, decimals, fractions, mixed numbers, unicode
+vulgar fractions ("1½"), ranges ("2-3", "2 to 3") or number words ("two",
+"a"). Units are looked up in a table of synonyms built once at import, and
+ingredient names are reduced to a singular, alias-resolved key so "Scallions"
+and "spring onion" compare equal.
+
+The parser is a handful of precompiled regular expressions and dictionary
+lookups per line, fast enough to run over a whole recipe library (see
+benchmarks/ingredient_parse_benchmark.py). It has no Qt dependency.
+"""
+import re
+from collections import namedtuple
+
+ParsedIngredient = namedtuple("ParsedIngredient",
+                              ["quantity", "quantity_max", "unit", "name", "note", "key", "raw"])
+
+# Canonical unit -> (dimension, size in the dimension's base unit, short form, synonyms).
+# Volumes are in millilitres and masses in grams. Units without a dimension
+# only combine with themselves.
+UNITS = {
+    "teaspoon": ("volume", 4.92892, "tsp", ("tsp", "tsps", "tsp.", "teaspoons", "t")),
+    "tablespoon": ("volume", 14.7868, "tbsp", ("tbsp", "tbsps", "tbs", "tbl", "tblsp", "tablespoons", "T")),
+    "fluid ounce": ("volume", 29.5735, "fl oz", ("fl oz", "fl. oz", "floz", "fluid ounces", "fluid oz")),
+    "cup": ("volume", 236.588, "cup", ("cups", "c")),
+    "pint": ("volume", 473.176, "pt", ("pints", "pt", "pts")),
+    "quart": ("volume", 946.353, "qt", ("quarts", "qt", "qts")),
+    "gallon": ("volume", 3785.41, "gal", ("gallons", "gal", "gals")),
+    "milliliter": ("volume", 1.0, "ml", ("ml", "mls", "milliliters", "millilitre", "millilitres")),
+    "centiliter": ("volume", 10.0, "cl", ("cl", "centiliters", "centilitre", "centilitres")),
+    "deciliter": ("volume", 100.0, "dl", ("dl", "deciliters", "decilitre", "decilitres")),
+    "liter": ("volume", 1000.0, "l", ("l", "liters", "litre", "litres", "lt")),
+    "milligram": ("mass", 0.001, "mg", ("mg", "milligrams", "milligramme", "milligrammes")),
+    "gram": ("mass", 1.0, "g", ("g", "gr", "grams", "gramme", "grammes", "gm", "gms")),
+    "kilogram": ("mass", 1000.0, "kg", ("kg", "kgs", "kilograms", "kilo", "kilos", "kilogramme")),
+    "ounce": ("mass", 28.3495, "oz", ("oz", "ozs", "ounces")),
+    "pound": ("mass", 453.592, "lb", ("lb", "lbs", "pounds")),
+    "pinch": (None, 1.0, "pinch", ("pinches",)),
+    "dash": (None, 1.0, "dash", ("dashes",)),
+    "drop": (None, 1.0, "drop", ("drops",)),
+    "clove": (None, 1.0, "clove", ("cloves",)),
+    "can": (None, 1.0, "can", ("cans", "tin", "tins")),
+    "jar": (None, 1.0, "jar", ("jars",)),
+    "bottle": (None, 1.0, "bottle", ("bottles",)),
+    "package": (None, 1.0, "package", ("packages", "pkg", "pkgs", "packet", "packets", "pack", "packs")),
+    "bag": (None, 1.0, "bag", ("bags",)),
+    "box": (None, 1.0, "box", ("boxes",)),
+    "bunch": (None, 1.0, "bunch", ("bunches",)),
+    "sprig": (None, 1.0, "sprig", ("sprigs",)),
+    "stalk": (None, 1.0, "stalk", ("stalks",)),
+    "head": (None, 1.0, "head", ("heads",)),
+    "slice": (None, 1.0, "slice", ("slices",)),
+    "piece": (None, 1.0, "piece", ("pieces", "pc", "pcs")),
+    "stick": (None, 1.0, "stick", ("sticks",)),
+    "sheet": (None, 1.0, "sheet", ("sheets",)),
+    "fillet": (None, 1.0, "fillet", ("fillets", "filet", "filets")),
+    "handful": (None, 1.0, "handful", ("handfuls",)),
+    "strip": (None, 1.0, "strip", ("strips",)),
+    "cube": (None, 1.0, "cube", ("cubes",)),
+    "leaf": (None, 1.0, "leaf", ("leaves",))
+}
+
+# Different names for the same ingredient, keyed by singular lowercase name
+INGREDIENT_ALIASES = {
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "garbanzo bean": "chickpea",
+    "garbanzo": "chickpea",
+    "coriander leaf": "cilantro",
+    "fresh coriander": "cilantro",
+    "courgette": "zucchini",
+    "aubergine": "eggplant",
+    "capsicum": "bell pepper",
+    "rocket": "arugula",
+    "prawn": "shrimp",
+    "icing sugar": "powdered sugar",
+    "confectioners sugar": "powdered sugar",
+    "confectioners' sugar": "powdered sugar",
+    "caster sugar": "superfine sugar",
+    "plain flour": "all-purpose flour",
+    "all purpose flour": "all-purpose flour",
+    "ap flour": "all-purpose flour",
+    "flour": "all-purpose flour",
+    "bicarbonate of soda": "baking soda",
+    "bicarb": "baking soda",
+    "double cream": "heavy cream",
+    "heavy whipping cream": "heavy cream",
+    "minced beef": "ground beef",
+    "beef mince": "ground beef",
+    "minced pork": "ground pork",
+    "cornflour": "cornstarch",
+    "corn starch": "cornstarch",
+    "chilli": "chili",
+    "chile": "chili",
+    "chilli pepper": "chili",
+    "chili pepper": "chili",
+    "kosher salt": "salt",
+    "sea salt": "salt",
+    "table salt": "salt",
+    "black pepper": "pepper",
+    "ground black pepper": "pepper",
+    "evoo": "olive oil",
+    "extra virgin olive oil": "olive oil",
+    "extra-virgin olive oil": "olive oil"
+}
+
+# Number words, mostly from dictated ingredients
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "half": 0.5, "quarter": 0.25, "dozen": 12
+}
+
+# Words after "a"/"an" that mean it isn't a quantity ("a few sprigs")
+NOT_QUANTITY_AFTER_ARTICLE = {"few", "little", "bit", "couple", "splash", "touch"}
+
+# Leading words that describe preparation or size rather than the ingredient
+DESCRIPTORS = {
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "ground",
+    "melted", "softened", "peeled", "cubed", "julienned", "halved", "quartered", "trimmed",
+    "rinsed", "drained", "beaten", "sifted", "toasted", "roasted", "cooked", "uncooked",
+    "packed", "heaping", "level", "finely", "roughly", "coarsely", "thinly", "thickly",
+    "freshly", "lightly", "firmly", "small", "medium", "large", "extra-large", "jumbo",
+    "whole", "fresh", "frozen", "dried", "room-temperature", "cold", "warm", "hot"
+}
+
+# Descriptors that are part of the ingredient itself when followed by these
+KEEP_DESCRIPTOR_BEFORE = {
+    "ground": {"beef", "pork", "turkey", "chicken", "lamb", "cinnamon", "cumin", "ginger",
+               "nutmeg", "coriander", "cloves", "allspice", "cardamom", "turmeric", "paprika"},
+    "whole": {"milk", "wheat"},
+    "hot": {"sauce", "water"},
+    "cold": {"water"},
+    "warm": {"water"},
+    "dried": {"oregano", "thyme", "basil", "parsley", "rosemary", "apricots", "cranberries"}
+}
+
+# Singular forms that plain suffix rules get wrong
+IRREGULAR_SINGULARS = {
+    "leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife",
+    "potatoes": "potato", "tomatoes": "tomato", "mangoes": "mango", "avocados": "avocado",
+    "anchovies": "anchovy", "cookies": "cookie", "brownies": "brownie",
+    "molasses": "molasses", "hummus": "hummus", "couscous": "couscous",
+    "asparagus": "asparagus", "lemongrass": "lemongrass", "swiss": "swiss",
+    "grits": "grits", "oats": "oats", "greens": "greens", "peas": "pea",
+    "chives": "chives", "brussels": "brussels", "series": "series", "citrus": "citrus",
+    "bass": "bass", "cress": "cress", "watercress": "watercress", "glass": "glass",
+    "quinoa": "quinoa", "sprouts": "sprout", "lentils": "lentil", "radishes": "radish"
+}
+
+# Unicode vulgar fractions and punctuation variants, rewritten before matching
+TEXT_NORMALIZATION = str.maketrans({
+    "½": " 1/2", "⅓": " 1/3", "⅔": " 2/3", "¼": " 1/4", "¾": " 3/4",
+    "⅕": " 1/5", "⅖": " 2/5", "⅗": " 3/5", "⅘": " 4/5", "⅙": " 1/6", "⅚": " 5/6",
+    "⅛": " 1/8", "⅜": " 3/8", "⅝": " 5/8", "⅞": " 7/8", "⅐": " 1/7", "⅑": " 1/9",
+    "⅒": " 1/10", "⁄": "/", "∕": "/", "–": "-", "—": "-", "‒": "-", "−": "-",
+    " ": " ", "’": "'"
+})
+
+_NUMBER = r"(?:\d+\s+\d+\s*/\s*\d+|\d+\s*/\s*\d+|\d+(?:\.\d+)?|\.\d+)"
+_WORD = r"[A-Za-z][A-Za-z'\-]*\.?"
+HEAD_PATTERN = re.compile(
+    rf"\s*(?:({_NUMBER})(?:\s*(?:-|to|or)\s*({_NUMBER}))?)?\s*(?:({_WORD})(?:\s+({_WORD}))?)?")
+WORDS_PATTERN = re.compile(rf"\s*(?:({_WORD})(?:\s+({_WORD}))?)?")
+WORD_PATTERN = re.compile(rf"\s*({_WORD})\s*")
+PARENTHESES_PATTERN = re.compile(r"\s*\(([^)]*)\)\s*")
+TRAILING_NOTE_PATTERN = re.compile(
+    r"[\s,;]+(to taste|for (?:garnish|garnishing|serving|frying|greasing|dusting|the pan)"
+    r"|as needed|or (?:more|less|as needed|to taste)|optional|divided)$", re.IGNORECASE)
+SPACES_PATTERN = re.compile(r"\s+")
+
+
+def _build_unit_lookup():
+    """Map every spelling of every unit to its canonical name"""
+    exact = {}
+    folded = {}
+    for unit, (_, _, short, synonyms) in UNITS.items():
+        for spelling in (unit, short) + synonyms:
+            exact[spelling] = unit
+            exact[spelling.rstrip(".")] = unit
+            # "T" (tablespoon) and "t" (teaspoon) only match with their own case
+            if spelling not in ("T", "t"):
+                folded[spelling.lower().rstrip(".")] = unit
+    return exact, folded
+
+
+UNIT_EXACT, UNIT_FOLDED = _build_unit_lookup()
+MULTI_WORD_FIRST = {spelling.split(" ")[0] for spelling in UNIT_FOLDED if " " in spelling}
+
+_number_cache = {}
+_key_cache = {}
+_describe_cache = {}
+KEY_CACHE_LIMIT = 100000
+
+
+def lookup_unit(word):
+    """Canonical unit for a spelling, or None"""
+    return UNIT_EXACT.get(word) or UNIT_FOLDED.get(word.lower().rstrip("."))
+
+
+def parse_number(text):
+    """Value of "3", "1.5", "3/4" or "1 1/2"; cached, since a library repeats them"""
+    value = _number_cache.get(text)
+    if value is None:
+        if "/" in text:
+            head, _, denominator = text.rpartition("/")
+            parts = head.split()
+            denominator = float(denominator)
+            value = float(parts[-1]) / denominator if denominator else 0.0
+            if len(parts) > 1:
+                value += float(parts[0])  # Mixed number
+        else:
+            value = float(text)
+        if len(_number_cache) < 10000:
+            _number_cache[text] = value
+    return value
+
+
+def singularize(word):
+    irregular = IRREGULAR_SINGULARS.get(word)
+    if irregular is not None:
+        return irregular
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "zes", "sses")):
+        return word[:-2]
+    if word.endswith("oes"):
+        return word[:-2]
+    return word[:-1]
+
+
+def ingredient_key(name):
+    """Normalized identity of an ingredient name: lowercase, singular, aliases resolved"""
+    key = _key_cache.get(name)
+    if key is not None:
+        return key
+
+    text = SPACES_PATTERN.sub(" ", name.lower().replace(",", " ")).strip(" .-")
+    words = text.split(" ")
+    if words and words[-1]:
+        words[-1] = singularize(words[-1])
+    key = " ".join(words)
+    key = INGREDIENT_ALIASES.get(key, key)
+
+    if len(_key_cache) >= KEY_CACHE_LIMIT:
+        _key_cache.clear()
+    _key_cache[name] = key
+    return key
+
+
+def parse_ingredient(line):
+    """Split one ingredient line into a ParsedIngredient"""
+    raw = line
+    if not line.isascii():
+        line = line.translate(TEXT_NORMALIZATION)
+
+    notes = None
+    if "(" in line:
+        # "1 (14 oz) can tomatoes (drained)": parenthesized text becomes notes
+        notes = [note.strip() for note in PARENTHESES_PATTERN.findall(line) if note.strip()]
+        line = PARENTHESES_PATTERN.sub(" ", line)
+
+    # One match reads the quantity and the two words after it
+    head = HEAD_PATTERN.match(line)
+    number, number_max, first, second = head.groups()
+    words, first_group = head, 3
+    quantity = quantity_max = None
+    if number is not None:
+        quantity = parse_number(number)
+        if number_max is not None:
+            quantity_max = parse_number(number_max)
+    elif first is not None:
+        value = NUMBER_WORDS.get(first.lower())
+        following = (second or "").lower()
+        if value is not None and not (value == 1 and following in NOT_QUANTITY_AFTER_ARTICLE):
+            quantity = value
+            skip = head.end(3)
+            # "half a cup", "a dozen eggs"
+            if following in ("a", "an", "dozen"):
+                if following == "dozen":
+                    quantity *= 12
+                skip = head.end(4)
+            words, first_group = WORDS_PATTERN.match(line, skip), 1
+            first, second = words.groups()
+
+    position = words.start(first_group) if first is not None else words.end()
+    unit = None
+    if first is not None:
+        if second is not None and first.lower() in MULTI_WORD_FIRST:
+            unit = UNIT_FOLDED.get(f"{first} {second}".lower().rstrip("."))
+            if unit is not None:
+                position = words.end(first_group + 1)
+                following = WORD_PATTERN.match(line, position)
+                if following is not None and following.group(1).lower() == "of":
+                    position = following.end()
+        if unit is None:
+            unit = UNIT_EXACT.get(first) or UNIT_FOLDED.get(first.lower().rstrip("."))
+            followed_by_of = second is not None and second.lower() == "of"
+            # Without a quantity a unit word only counts as one in "pinch of
+            # salt" form; otherwise it starts the name ("cube steak")
+            if unit is not None and (quantity is not None or followed_by_of):
+                position = words.end(first_group + 1 if followed_by_of else first_group)
+            else:
+                unit = None
+
+    name, leading, trailing, key = describe(line[position:].strip())
+    if notes:
+        note = ", ".join(((leading,) if leading else ()) + tuple(notes) + trailing)
+    elif leading:
+        note = ", ".join((leading,) + trailing) if trailing else leading
+    else:
+        note = ", ".join(trailing) if trailing else None
+    return ParsedIngredient(quantity, quantity_max, unit, name, note, key, raw)
+
+
+def describe(text):
+    """Split the text after quantity and unit into (name, leading note, trailing notes, key).
+
+    Cached: a library repeats the same ingredient text far more often than
+    whole lines, which differ in their quantities.
+    """
+    cached = _describe_cache.get(text)
+    if cached is not None:
+        return cached
+
+    rest = text
+    trailing = []
+    if "," in rest:
+        rest, _, tail = rest.partition(",")
+        tail = tail.strip(" ,")
+        if tail:
+            trailing.append(tail)
+        rest = rest.strip()
+
+    match = TRAILING_NOTE_PATTERN.search(rest)
+    if match is not None:
+        trailing.append(match.group(1))
+        rest = rest[:match.start()]
+
+    # Leading preparation and size words move to the note
+    leading = []
+    words = rest.split()
+    while len(words) > 1:
+        first = words[0].lower().rstrip(",")
+        if first not in DESCRIPTORS:
+            break
+        keep_before = KEEP_DESCRIPTOR_BEFORE.get(first)
+        if keep_before is not None and words[1].lower() in keep_before:
+            break
+        leading.append(words.pop(0).rstrip(","))
+    if leading:
+        rest = " ".join(words)
+
+    name = rest.strip(" .-;:")
+    result = (name, " ".join(leading), tuple(trailing), ingredient_key(name) if name else "")
+    if len(_describe_cache) >= KEY_CACHE_LIMIT:
+        _describe_cache.clear()
+    _describe_cache[text] = result
+    return result
+
+
+def parse_ingredients(lines):
+    """Parse many lines at once"""
+    return [parse_ingredient(line) for line in lines]
+
+
+def format_quantity(value):
+    """Render a quantity for people: 1.5 -> "1 1/2", 0.333 -> "1/3", 2.0 -> "2" """
+    if value is None:
+        return ""
+    whole = int(value)
+    fraction = value - whole
+    for denominator in (2, 3, 4, 8):
+        numerator = round(fraction * denominator)
+        if abs(fraction - numerator / denominator) < 0.01:
+            if numerator == 0:
+                return str(whole)
+            if numerator == denominator:
+                return str(whole + 1)
+            text = f"{numerator}/{denominator}"
+            return f"{whole} {text}" if whole else text
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def unit_label(unit, quantity=1):
+    """Short, readable unit for display ("tbsp", "cups")"""
+    if unit is None:
+        return ""
+    dimension, _, short, _ = UNITS[unit]
+    if quantity is not None and quantity > 1 and (dimension is None or unit == "cup"):
+        return unit + ("es" if unit.endswith(("ch", "sh", "x")) else "s")
+    return short
+
+
+def format_ingredient(parsed):
+    """Render a ParsedIngredient back into a tidy line"""
+    parts = []
+    if parsed.quantity is not None:
+        quantity = format_quantity(parsed.quantity)
+        if parsed.quantity_max is not None:
+            quantity += "-" + format_quantity(parsed.quantity_max)
+        parts.append(quantity)
+    if parsed.unit is not None:
+        parts.append(unit_label(parsed.unit, parsed.quantity_max or parsed.quantity))
+    if parsed.name:
+        parts.append(parsed.name)
+    text = " ".join(parts)
+    if parsed.note:
+        text += f", {parsed.note}"
+    return text
@@ -0,0 +1,198 @@
+"""Weekly meal planning over the stored recipe library.
+
+MealPlanner picks one recipe per day so the week needs as few distinct
+ingredients as possible (ingredients shared between meals, or already in
+the pantry, are bought once or not at all) while keeping cooking time down
+and preferring favorites. The cost of a plan is
+
+    ingredients to buy + time_weight * hours of cooking - favorite_bonus * favorites
+
+The solver works on the pantry index's packed ingredient bitsets, so every
+step scores the whole library at once:
+
+1. greedy construction: repeatedly add the recipe with the lowest marginal
+   cost against the plan so far
+2. local search: replace one day at a time with the best recipe given the
+   other days, until no swap improves the plan
+3. randomized restarts (greedy choosing among the top few) until the time
+   budget runs out, keeping the best plan
+
+Dietary filters and "avoid" ingredients exclude every recipe whose bitset
+touches the excluded ingredients. The module has no Qt dependency.
+"""
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from dietary import diet_excludes
+from durations import DURATION_PARSER_VERSION, duration_columns
+from pantry_index import popcount
+
+# Recipes with fewer ingredients than this are sides or garnishes, not meals
+MIN_MEAL_INGREDIENTS = 3
+# Assumed when a recipe's times can't be read
+DEFAULT_MINUTES = 45
+
+MealPlan = namedtuple("MealPlan", ["recipe_ids", "minutes", "shopping_keys", "cost"])
+
+
+def recipe_minutes(conn):
+    """{recipe ID: total minutes} for every recipe whose times can be read"""
+    minutes = {}
+    for recipe_id, total_minutes, parsed, prep_time, cook_time in conn.execute(
+            "SELECT id, total_minutes, durations_parsed, prep_time, cook_time FROM recipes"):
+        if parsed < DURATION_PARSER_VERSION:
+            # Not backfilled yet
+            total_minutes = duration_columns(prep_time, cook_time)[2]
+        if total_minutes is not None:
+            minutes[recipe_id] = total_minutes
+    return minutes
+
+
+class PlanConstraints:
+    """What the user asked for: days to plan, limits and filters"""
+
+    def __init__(self, days=7, max_minutes=None, diets=(), include=(), exclude=(), avoid=(),
+                 favorites_only=False):
+        self.days = days
+        self.max_minutes = max_minutes  # Per recipe; None for no limit
+        self.diets = tuple(diets)  # Entries of dietary.DIETS
+        self.include = list(include)  # Recipe IDs that must be in the plan
+        self.exclude = set(exclude)  # Recipe IDs that must not be
+        self.avoid = set(avoid)  # Ingredient keys no recipe may use
+        self.favorites_only = favorites_only
+
+
+class MealPlanner:
+    """Plans meals over the recipes in a PantryIndex"""
+
+    def __init__(self, index, minutes_by_id, favorites=(), pantry_keys=(), time_weight=2.0,
+                 favorite_bonus=1.5):
+        self.index = index
+        self.minutes_by_id = minutes_by_id
+        self.favorites = set(favorites)
+        self.pantry_keys = set(pantry_keys)
+        self.time_weight = time_weight  # Cost of an hour of cooking, in ingredients to buy
+        self.favorite_bonus = favorite_bonus
+
+    def plan(self, constraints, time_budget=0.25, seed=None):
+        """Best plan found within time_budget seconds"""
+        deadline = time.perf_counter() + time_budget
+        rng = random.Random(seed)
+        index = self.index
+
+        # Copy what the solver reads and let go of the lock, so saves and pantry
+        # matching on the GUI thread don't wait out the time budget
+        with index.lock:
+            size = index.size
+            if not size:
+                return MealPlan([], [], [], 0.0)
+            ids = index.ids[:size].copy()
+            self.words = index.words[:, :size].copy()
+            self.totals = index.totals[:size].copy()
+            keys = list(index.keys)
+            excluded_keys = set(constraints.avoid) | {
+                key for key in keys for diet in constraints.diets if diet_excludes(diet, key)
+            }
+            excluded_words = index.key_words(excluded_keys)
+            self.base_words = index.key_words(self.pantry_keys | index.staples)
+
+        minutes = np.array([self.minutes_by_id.get(int(recipe_id)) or DEFAULT_MINUTES
+                            for recipe_id in ids], dtype=np.float64)
+        favorite = np.isin(ids, list(self.favorites))
+
+        eligible = (ids >= 0) & (self.totals >= MIN_MEAL_INGREDIENTS)
+        if constraints.max_minutes:
+            eligible &= minutes <= constraints.max_minutes
+        if constraints.favorites_only:
+            eligible &= favorite
+        if constraints.exclude:
+            eligible &= ~np.isin(ids, list(constraints.exclude))
+        if excluded_keys:
+            eligible &= self.shared_counts(excluded_words) == 0
+
+        row_of = {int(recipe_id): row for row, recipe_id in enumerate(ids)}
+        required = [row_of[recipe_id] for recipe_id in constraints.include if recipe_id in row_of]
+        required = list(dict.fromkeys(required))[:constraints.days]
+
+        self.row_cost = self.time_weight * minutes / 60.0 - self.favorite_bonus * favorite
+        self.eligible = eligible
+        days = constraints.days
+
+        best = self.local_search(self.greedy(required, days, rng, randomize=False), required, deadline)
+        best_cost = self.plan_cost(best)
+        while time.perf_counter() < deadline:
+            candidate = self.local_search(self.greedy(required, days, rng, randomize=True), required, deadline)
+            cost = self.plan_cost(candidate)
+            if cost < best_cost - 1e-9:
+                best, best_cost = candidate, cost
+
+        union = self.union_words(best) & ~self.base_words
+        shopping_columns = np.flatnonzero(np.unpackbits(union.view(np.uint8)))
+        return MealPlan([int(ids[row]) for row in best], [float(minutes[row]) for row in best],
+                        [keys[column] for column in shopping_columns], best_cost)
+
+    def union_words(self, rows):
+        """Base words (pantry and staples) plus every ingredient of the given rows"""
+        if not rows:
+            return self.base_words.copy()
+        return self.base_words | np.bitwise_or.reduce(self.words[:, rows], axis=1)
+
+    def marginal_costs(self, union, taken):
+        """Cost of adding each recipe to a plan whose ingredients are union"""
+        new_ingredients = self.totals - self.shared_counts(union)
+        costs = new_ingredients + self.row_cost
+        costs[~self.eligible] = np.inf
+        costs[taken] = np.inf
+        return costs
+
+    def shared_counts(self, union):
+        """Ingredients each recipe has in common with the packed union"""
+        have = np.zeros(len(self.totals), dtype=np.int32)
+        for word in np.flatnonzero(union):
+            have += popcount(self.words[word] & union[word])
+        return have
+
+    def plan_cost(self, rows):
+        """Cost of a whole plan: ingredients to buy plus each recipe's time and favorite terms"""
+        to_buy = self.union_words(rows) & ~self.base_words
+        return float(popcount(to_buy).sum()) + float(self.row_cost[rows].sum())
+
+    def greedy(self, required, days, rng, randomize):
+        """Fill the plan one day at a time with the cheapest next recipe"""
+        rows = list(required)
+        while len(rows) < days:
+            costs = self.marginal_costs(self.union_words(rows), rows)
+            if randomize:
+                # Pick among the few cheapest so restarts explore different plans
+                count = min(5, int(np.isfinite(costs).sum()))
+                if not count:
+                    break
+                cheapest = np.argpartition(costs, count - 1)[:count]
+                row = int(rng.choice(cheapest[np.isfinite(costs[cheapest])]))
+            else:
+                row = int(np.argmin(costs))
+                if not np.isfinite(costs[row]):
+                    break
+            rows.append(row)
+        return rows
+
+    def local_search(self, rows, required, deadline):
+        """Swap single days for better recipes until no swap helps"""
+        rows = list(rows)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for position in range(len(required), len(rows)):
+                others = rows[:position] + rows[position + 1:]
+                union = self.union_words(others)
+                costs = self.marginal_costs(union, others)
+                best = int(np.argmin(costs))
+                if costs[best] < costs[rows[position]] - 1e-9:
+                    rows[position] = best
+                    improved = True
+                if time.perf_counter() >= deadline:
+                    break
+        return rows
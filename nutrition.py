@@ -0,0 +1,194 @@
+"""Local nutrition estimates from a bundled nutrient table.
+
+nutrients.csv lists common ingredients with their nutrients per 100 g, a
+density for volume measures and a typical weight for counted items. The
+table is loaded once into NumPy arrays. Estimating a batch of recipes:
+
+1. parse every ingredient line and map its key to a table row
+2. convert all quantities to grams in one vectorized pass (mass units
+   directly, volumes through the row's density, counts and cloves through
+   the row's item weight, cans and pinches through fixed weights)
+3. accumulate a recipes x table-rows weight matrix and multiply it by the
+   rows x nutrients table
+
+Totals are per recipe; per_serving() divides them. cached_totals() keeps
+results in the recipe_nutrition table keyed by a hash of the ingredients
+and the table, so a recipe is only recomputed when either changes. The
+module has no Qt dependency.
+"""
+import csv
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from ingredient_parser import INGREDIENT_ALIASES, UNITS, parse_ingredients
+
+NUTRIENT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nutrients.csv")
+NUTRIENTS = ["kcal", "protein", "fat", "carbs", "fiber", "sugar", "sodium"]
+
+# Fallback for recipes that don't state their servings; generated recipes are usually for four
+DEFAULT_SERVINGS = 4
+
+# Grams for units without a mass or volume
+UNIT_GRAMS = {
+    "pinch": 0.35, "dash": 0.6, "drop": 0.05, "clove": 3.0, "can": 400.0, "jar": 450.0,
+    "bottle": 500.0, "package": 250.0, "bag": 450.0, "box": 450.0, "bunch": 100.0,
+    "sprig": 1.0, "stalk": 40.0, "head": 500.0, "slice": 25.0, "piece": 30.0, "stick": 113.0,
+    "sheet": 15.0, "fillet": 170.0, "handful": 30.0, "strip": 20.0, "cube": 10.0, "leaf": 0.5
+}
+
+# Units that mean one of the ingredient itself, so its item weight applies when known
+ITEM_UNITS = {None, "clove", "piece", "slice", "fillet", "strip", "head"}
+
+# Per-unit conversion arrays, indexed like UNIT_NAMES (0 is "no unit")
+UNIT_NAMES = [None] + list(UNITS)
+UNIT_INDEX = {unit: index for index, unit in enumerate(UNIT_NAMES)}
+UNIT_MASS = np.array([0.0] + [factor if dimension == "mass" else 0.0
+                              for dimension, factor, _, _ in UNITS.values()])
+UNIT_VOLUME = np.array([0.0] + [factor if dimension == "volume" else 0.0
+                                for dimension, factor, _, _ in UNITS.values()])
+UNIT_FIXED = np.array([np.nan] + [UNIT_GRAMS.get(unit, np.nan) if UNITS[unit][0] is None else 0.0
+                                  for unit in UNITS])
+UNIT_ITEM = np.array([unit in ITEM_UNITS for unit in UNIT_NAMES])
+
+Nutrition = namedtuple("Nutrition", NUTRIENTS + ["matched", "total"])
+
+NUTRITION_CACHE_COLUMNS = ", ".join(NUTRIENTS + ["matched", "total"])
+
+
+def per_serving(nutrition, servings=DEFAULT_SERVINGS):
+    """Scale recipe totals to one serving"""
+    servings = servings or DEFAULT_SERVINGS
+    return nutrition._replace(**{name: getattr(nutrition, name) / servings for name in NUTRIENTS})
+
+
+def nutrition_summary(nutrition, servings=DEFAULT_SERVINGS):
+    """Short per-serving text for cards, e.g. "~540 kcal · 32 g protein", or "" with no data"""
+    if nutrition is None or not nutrition.matched:
+        return ""
+    serving = per_serving(nutrition, servings)
+    return f"~{serving.kcal:.0f} kcal · {serving.protein:.0f} g protein"
+
+
+class NutritionEngine:
+    """Nutrient table in NumPy arrays, shared by the whole app"""
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, table_path=NUTRIENT_TABLE_PATH):
+        with open(table_path, "rb") as file:
+            data = file.read()
+        # Editing the table invalidates every cached result
+        self.version = hashlib.sha1(data).hexdigest()[:12]
+
+        rows = list(csv.DictReader(data.decode("utf-8").splitlines()))
+        self.keys = [row["ingredient"] for row in rows]
+        self.row_index = {key: index for index, key in enumerate(self.keys)}
+        # Per gram, so grams @ values gives totals directly
+        self.values = np.array([[float(row[name]) for name in NUTRIENTS] for row in rows]) / 100.0
+        self.density = np.array([float(row["grams_per_ml"] or 1.0) for row in rows])
+        self.item_weight = np.array([float(row["grams_each"] or "nan") for row in rows])
+        self.row_cache = {}
+
+    def row_for(self, key):
+        """Table row for an ingredient key, or -1 if nothing in the table matches"""
+        row = self.row_cache.get(key)
+        if row is not None:
+            return row
+
+        row = -1
+        words = key.split()
+        # "boneless skinless chicken breast" -> "chicken breast", then "breast";
+        # "parmesan cheese" -> "parmesan"
+        for candidate in ([" ".join(words[start:]) for start in range(len(words))]
+                          + [" ".join(words[:end]) for end in range(len(words) - 1, 0, -1)]):
+            candidate = INGREDIENT_ALIASES.get(candidate, candidate)
+            if candidate in self.row_index:
+                row = self.row_index[candidate]
+                break
+        self.row_cache[key] = row
+        return row
+
+    def estimate(self, ingredients):
+        """Nutrition totals for one recipe's ingredient lines"""
+        return self.estimate_many([ingredients])[0]
+
+    def estimate_many(self, recipes):
+        """Nutrition totals for a list of recipes' ingredient lines, in one batch"""
+        recipe_indices, rows, quantities, units = [], [], [], []
+        line_counts = np.zeros(len(recipes), dtype=np.int64)
+        for recipe_index, ingredients in enumerate(recipes):
+            for parsed in parse_ingredients(ingredients):
+                if not parsed.key:
+                    continue
+                line_counts[recipe_index] += 1
+                row = self.row_for(parsed.key)
+                if row < 0 or parsed.quantity is None:
+                    continue
+                recipe_indices.append(recipe_index)
+                rows.append(row)
+                # Ranges count as their midpoint
+                quantities.append(parsed.quantity if parsed.quantity_max is None
+                                  else (parsed.quantity + parsed.quantity_max) / 2)
+                units.append(UNIT_INDEX[parsed.unit])
+
+        recipe_indices = np.array(recipe_indices, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int64)
+        units = np.array(units, dtype=np.int64)
+
+        # Grams per line: mass, volume x density, or item/fixed weight
+        item_weight = self.item_weight[rows]
+        per_unit = np.where(UNIT_ITEM[units] & ~np.isnan(item_weight), item_weight, UNIT_FIXED[units])
+        grams = np.array(quantities) * (UNIT_MASS[units] + UNIT_VOLUME[units] * self.density[rows] + per_unit)
+        known = ~np.isnan(grams)
+
+        weights = np.zeros((len(recipes), len(self.keys)))
+        np.add.at(weights, (recipe_indices[known], rows[known]), grams[known])
+        totals = weights @ self.values
+        matched = np.bincount(recipe_indices[known], minlength=len(recipes))
+
+        return [Nutrition(*(float(value) for value in totals[index]), int(matched[index]), int(line_counts[index]))
+                for index in range(len(recipes))]
+
+    def source_hash(self, ingredients):
+        """Cache key for a recipe's ingredient lines under the current table"""
+        return hashlib.sha1((self.version + json.dumps(ingredients)).encode("utf-8")).hexdigest()
+
+    def cached_totals(self, conn, recipes, chunk_size=500):
+        """Nutrition totals for {recipe ID: ingredient lines}, computing only new or changed recipes.
+
+        Results are read from and written to the recipe_nutrition table
+        through conn.
+        """
+        hashes = {recipe_id: self.source_hash(ingredients) for recipe_id, ingredients in recipes.items()}
+        results = {}
+        ids = list(hashes)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            rows = conn.execute(
+                f"SELECT recipe_id, source_hash, {NUTRITION_CACHE_COLUMNS} FROM recipe_nutrition "
+                f"WHERE recipe_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for recipe_id, source_hash, *values in rows:
+                if hashes.get(recipe_id) == source_hash:
+                    results[recipe_id] = Nutrition(*values)
+
+        stale = [recipe_id for recipe_id in ids if recipe_id not in results]
+        if stale:
+            estimates = self.estimate_many([recipes[recipe_id] for recipe_id in stale])
+            conn.executemany(
+                f"INSERT OR REPLACE INTO recipe_nutrition (recipe_id, source_hash, {NUTRITION_CACHE_COLUMNS}) "
+                f"VALUES ({','.join('?' * (len(Nutrition._fields) + 2))})",
+                [(recipe_id, hashes[recipe_id], *estimate) for recipe_id, estimate in zip(stale, estimates)]
+            )
+            conn.commit()
+            results.update(zip(stale, estimates))
+        return results
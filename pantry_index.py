@@ -0,0 +1,220 @@
+"""Bitset index of recipe ingredients for pantry matching.
+
+Every ingredient key seen in the library gets a bit position, and every
+recipe a row of bits in np.packbits layout (bit 0 is the high bit of byte
+0), padded to whole 64-bit words. Rows are stored word-major: words[w] holds
+word w of every recipe contiguously, so ranking reads only the words the
+pantry has bits in:
+
+    have = sum(popcount(words[w] & pantry[w]) for each non-zero pantry word w)
+    missing = total - have
+
+Columns are assigned most common ingredient first, so a typical pantry
+touches a few words and 100k recipes rank in a few milliseconds (see
+benchmarks/pantry_benchmark.py).
+
+load() builds the index off the GUI thread; recipes added or removed while
+it runs are queued and applied when the new index is swapped in. The module
+has no Qt dependency.
+"""
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from ingredient_parser import parse_ingredient, parse_ingredients
+
+# Ingredients assumed to be on hand whether or not they're in the pantry
+STAPLES = {"salt", "pepper", "black pepper", "salt and pepper", "water", "ice"}
+
+PantryMatch = namedtuple("PantryMatch", ["recipe_id", "have", "total", "missing"])
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:
+    # NumPy < 2.0: count bytes through a lookup table
+    POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Number of set bits in each element of a uint64 array"""
+        return POPCOUNT_TABLE[words.view(np.uint8)].reshape(len(words), 8).sum(axis=1, dtype=np.uint8)
+
+
+def pantry_key(text):
+    """Normalize a pantry entry ("2 onions", "Onion") to an ingredient key"""
+    return parse_ingredient(text).key
+
+
+def recipe_keys(ingredients):
+    """Distinct ingredient keys of a recipe's ingredient lines"""
+    return {parsed.key for parsed in parse_ingredients(ingredients) if parsed.key}
+
+
+def word_count(bit_count):
+    """64-bit words needed for bit_count bits"""
+    return max(1, -(-bit_count // 64))
+
+
+def pack_columns(columns, words):
+    """A packed row with the given columns set, as uint64 words"""
+    row = np.zeros(words * 8, dtype=np.uint8)
+    columns = np.asarray(columns, dtype=np.int64)
+    np.bitwise_or.at(row, columns >> 3, (128 >> (columns & 7)).astype(np.uint8))
+    return row.view(np.uint64)
+
+
+class PantryIndex:
+    """Packed ingredient bitsets for every recipe, ranked against a pantry"""
+
+    def __init__(self, staples=STAPLES):
+        self.staples = set(staples)
+        self.lock = threading.Lock()
+        self.pending = {}  # recipe ID -> keys (None to remove), queued until load() finishes
+        self.install({})
+
+    @property
+    def ready(self):
+        return self.pending is None
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def install(self, keys_by_recipe):
+        """Replace the index contents with {recipe ID: ingredient keys}"""
+        # Most common ingredients get the lowest bits, so pantries touch few words
+        frequency = Counter(key for keys in keys_by_recipe.values() for key in keys)
+        self.vocabulary = {key: column for column, (key, _) in enumerate(frequency.most_common())}
+        self.keys = list(self.vocabulary)
+
+        count = len(keys_by_recipe)
+        capacity = max(count, 64)
+        rows = np.repeat(np.arange(count), [len(keys) for keys in keys_by_recipe.values()])
+        columns = np.fromiter((self.vocabulary[key] for keys in keys_by_recipe.values() for key in keys),
+                              dtype=np.int64, count=len(rows))
+        packed = np.zeros((capacity, word_count(len(self.keys)) * 8), dtype=np.uint8)
+        np.bitwise_or.at(packed, (rows, columns >> 3), (128 >> (columns & 7)).astype(np.uint8))
+        self.words = np.ascontiguousarray(packed.view(np.uint64).T)
+
+        self.row_of = {recipe_id: row for row, recipe_id in enumerate(keys_by_recipe)}
+        self.free_rows = []
+        self.size = count
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.ids[:count] = list(keys_by_recipe)
+        self.totals = np.zeros(capacity, dtype=np.int32)
+        self.totals[:count] = [len(keys) for keys in keys_by_recipe.values()]
+
+    def load(self, recipes):
+        """Index [(recipe ID, ingredient lines)]; safe to call from a worker thread"""
+        self.load_keys({recipe_id: recipe_keys(ingredients) for recipe_id, ingredients in recipes})
+
+    def load_keys(self, keys_by_recipe):
+        """Index {recipe ID: ingredient keys}, applying changes queued meanwhile"""
+        with self.lock:
+            pending = self.pending or {}
+            self.pending = None
+            self.install(keys_by_recipe)
+            for recipe_id, keys in pending.items():
+                self.apply(recipe_id, keys)
+
+    def add_recipe(self, recipe_id, ingredients):
+        """Index (or re-index) one recipe"""
+        keys = recipe_keys(ingredients)
+        with self.lock:
+            if self.pending is not None:
+                self.pending[recipe_id] = keys
+            else:
+                self.apply(recipe_id, keys)
+
+    def remove_recipe(self, recipe_id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending[recipe_id] = None
+            else:
+                self.apply(recipe_id, None)
+
+    def apply(self, recipe_id, keys):
+        """Set or clear one recipe's row; the caller holds the lock"""
+        row = self.row_of.pop(recipe_id, None)
+        if row is not None:
+            self.words[:, row] = 0
+            self.ids[row] = -1
+            self.totals[row] = 0
+            self.free_rows.append(row)
+        if keys is None:
+            return
+
+        for key in keys:
+            if key not in self.vocabulary:
+                self.vocabulary[key] = len(self.keys)
+                self.keys.append(key)
+        if len(self.words) * 64 < len(self.keys):
+            self.resize(len(self.ids), word_count(len(self.keys) * 2))
+
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = self.size
+            self.size += 1
+            if row >= len(self.ids):
+                self.resize(len(self.ids) * 2, len(self.words))
+
+        self.words[:, row] = pack_columns([self.vocabulary[key] for key in keys], len(self.words))
+        self.ids[row] = recipe_id
+        self.totals[row] = len(keys)
+        self.row_of[recipe_id] = row
+
+    def resize(self, capacity, words):
+        grown = np.zeros((words, capacity), dtype=np.uint64)
+        grown[:self.words.shape[0], :self.words.shape[1]] = self.words
+        self.words = grown
+        if capacity > len(self.ids):
+            extra = capacity - len(self.ids)
+            self.ids = np.concatenate([self.ids, np.full(extra, -1, dtype=np.int64)])
+            self.totals = np.concatenate([self.totals, np.zeros(extra, dtype=np.int32)])
+
+    def key_words(self, keys):
+        """Packed words with the bits of the given keys set; unknown keys are ignored"""
+        return pack_columns([self.vocabulary[key] for key in keys if key in self.vocabulary], len(self.words))
+
+    def shared_counts(self, key_words):
+        """Ingredients each row has in common with packed key_words; the caller holds the lock.
+
+        Only words with bits set in key_words are read.
+        """
+        have = np.zeros(self.size, dtype=np.int32)
+        for word in np.flatnonzero(key_words):
+            have += popcount(self.words[word, :self.size] & key_words[word])
+        return have
+
+    def rank(self, pantry_keys, max_missing=2, limit=20):
+        """Best recipes for a pantry: fewest missing ingredients, then most used.
+
+        Returns up to limit PantryMatch tuples with at most max_missing
+        missing ingredients each; missing lists their keys.
+        """
+        with self.lock:
+            if not self.size:
+                return []
+            pantry_words = self.key_words(set(pantry_keys) | self.staples)
+            have = self.shared_counts(pantry_words)
+            missing = self.totals[:self.size] - have
+
+            # Removed rows have no bits, so have > 0 skips them too
+            candidates = np.flatnonzero((missing <= max_missing) & (have > 0))
+            missing, have = missing[candidates], have[candidates]
+            if len(candidates) > limit:
+                # Sort key: missing ascending, then have descending
+                score = missing.astype(np.int64) * (len(self.keys) + 1) - have
+                top = np.argpartition(score, limit - 1)[:limit]
+                candidates, missing, have = candidates[top], missing[top], have[top]
+            order = np.lexsort((-have, missing))
+
+            pantry_bytes = pantry_words.view(np.uint8)
+            matches = []
+            for position in order:
+                row = candidates[position]
+                row_bytes = self.words[:, row].copy().view(np.uint8)
+                missing_columns = np.flatnonzero(np.unpackbits(row_bytes & ~pantry_bytes))
+                matches.append(PantryMatch(int(self.ids[row]), int(have[position]),
+                                           int(self.totals[row]), [self.keys[column] for column in missing_columns]))
+            return matches
@@ -0,0 +1,125 @@
+"""Cached artwork for the recipe view image.
+
+RecipeImageCache paints the generic placeholder once per device pixel ratio
+and theme. It also paints deterministic per-recipe placeholder art: the
+recipe name seeds the palette and layout, so a recipe always gets the same
+picture. Both are cached, so switching recipes needs no painting once a
+recipe has been seen.
+"""
+import hashlib
+import random
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QColor, QImage, QLinearGradient, QPainter, QPen, QPixmap
+
+IMAGE_WIDTH = 300
+IMAGE_HEIGHT = 200
+
+# Gradient background colors of the generic placeholder per theme
+PLACEHOLDER_BACKGROUNDS = {
+    True: (QColor(45, 48, 53), QColor(32, 35, 40)),  # Dark mode
+    False: (QColor(235, 236, 240), QColor(214, 217, 223))  # Light mode
+}
+
+
+def recipe_seed(recipe_key):
+    """Stable integer seed for a recipe name or ID (hash() is salted per process)"""
+    digest = hashlib.sha1(str(recipe_key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def recipe_palette(recipe_key, dark_mode=True):
+    """Return three related QColors derived from the recipe key"""
+    rng = random.Random(recipe_seed(recipe_key))
+    base_hue = rng.randrange(360)
+    offset = rng.choice((25, 35, 150, 180))
+    value = 150 if dark_mode else 225
+    return [
+        QColor.fromHsv(base_hue, 140, value),
+        QColor.fromHsv((base_hue + offset) % 360, 160, value - 40),
+        QColor.fromHsv((base_hue + 2 * offset) % 360, 90, min(255, value + 30))
+    ]
+
+
+class RecipeImageCache:
+    """Renders and caches placeholder pixmaps for the recipe view"""
+
+    def __init__(self, max_recipe_images=64):
+        self.max_recipe_images = max_recipe_images
+        self.placeholders = {}
+        self.recipe_images = OrderedDict()
+
+    def placeholder(self, device_pixel_ratio=1.0, dark_mode=True):
+        """Return the generic placeholder for this DPR and theme"""
+        key = (device_pixel_ratio, dark_mode)
+        pixmap = self.placeholders.get(key)
+        if pixmap is None:
+            start, end = PLACEHOLDER_BACKGROUNDS[dark_mode]
+            pixmap = self.render(device_pixel_ratio, start, end, lambda painter: None)
+            self.placeholders[key] = pixmap
+        return pixmap
+
+    def recipe_placeholder(self, recipe_key, device_pixel_ratio=1.0, dark_mode=True):
+        """Return the deterministic placeholder art for one recipe"""
+        key = (recipe_key, device_pixel_ratio, dark_mode)
+        pixmap = self.recipe_images.get(key)
+        if pixmap is not None:
+            self.recipe_images.move_to_end(key)
+            return pixmap
+
+        palette = recipe_palette(recipe_key, dark_mode)
+        rng = random.Random(recipe_seed(recipe_key))
+
+        def paint_decoration(painter):
+            # A few soft "ingredient" blobs scattered around the plate
+            painter.setPen(Qt.PenStyle.NoPen)
+            for _ in range(rng.randint(4, 7)):
+                color = QColor(rng.choice(palette))
+                color.setAlpha(rng.randint(70, 140))
+                painter.setBrush(color)
+                radius = rng.uniform(12, 34)
+                painter.drawEllipse(QRectF(rng.uniform(-10, IMAGE_WIDTH - 20),
+                                           rng.uniform(-10, IMAGE_HEIGHT - 20),
+                                           radius * 2, radius * 2))
+
+        pixmap = self.render(device_pixel_ratio, palette[0], palette[1], paint_decoration)
+        self.recipe_images[key] = pixmap
+        if len(self.recipe_images) > self.max_recipe_images:
+            self.recipe_images.popitem(last=False)
+        return pixmap
+
+    def render(self, device_pixel_ratio, start_color, end_color, paint_decoration):
+        """Paint a gradient background, decoration, then the plate and cutlery"""
+        image = QImage(round(IMAGE_WIDTH * device_pixel_ratio),
+                       round(IMAGE_HEIGHT * device_pixel_ratio),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(device_pixel_ratio)
+        image.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Create gradient background
+        gradient = QLinearGradient(0, 0, IMAGE_WIDTH, IMAGE_HEIGHT)
+        gradient.setColorAt(0, start_color)
+        gradient.setColorAt(1, end_color)
+        painter.fillRect(0, 0, IMAGE_WIDTH, IMAGE_HEIGHT, gradient)
+
+        paint_decoration(painter)
+
+        # Draw a plate icon or food symbol in the center
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(200, 200, 200, 80))
+        painter.drawEllipse(100, 50, 100, 100)
+
+        painter.setPen(QPen(QColor(150, 150, 150), 3))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawEllipse(115, 65, 70, 70)
+
+        # Draw a fork and knife
+        painter.drawLine(150, 80, 150, 120)
+        painter.drawLine(130, 100, 170, 100)
+
+        painter.end()
+        return QPixmap.fromImage(image)
@@ -0,0 +1,459 @@
+"""Local HTTP/JSON API over the recipe library.
+
+    python recipe_server.py [--db recipes.db] [--port 8765] [--workers 4] [--per-client 2]
+                            [--backend offline --latency 0.5]
+
+Lets several kiosks and tools share one library and one API key. Every
+endpoint takes and returns JSON:
+
+    GET    /health                  workers, queue and client counts
+    POST   /recipes/generate        {"ingredients": "...", "diets": ["vegan"]} -> the saved recipe
+    GET    /recipes                 ?search=&min_minutes=&max_minutes=&diets=vegan,keto&limit=20
+    GET    /recipes/<id>
+    GET    /favorites
+    PUT    /favorites/<id>          DELETE /favorites/<id>
+    GET    /shopping-list
+    POST   /shopping-list           {"recipe_id": 1, "servings": 6}
+    DELETE /shopping-list/<id>      DELETE /shopping-list
+
+One asyncio event loop reads and answers every connection (HTTP/1.1 with
+keep-alive). Work leaves it two ways:
+
+- generation, a slow model call, runs on a bounded pool of worker threads.
+  Requests beyond the pool wait in a queue of queue_limit; once that is
+  full the server answers 503 at once instead of letting latency grow
+  without bound
+- everything that touches the library runs on one database thread that
+  owns the service's SQLite connection, so writes from every client are
+  serialized without "database is locked" errors and the service's
+  in-memory state (recipe cache, favorites, shopping list) has one owner
+
+Each client, named by its X-Client-Id header or else its address, may have
+per_client requests in flight; more get 429 with Retry-After, so one busy
+kiosk can't hold every worker. The module has no Qt dependency.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from dietary import DIETS
+from recipe_service import (DATABASE_PATH, RECIPE_BACKENDS, RecipeParseError, RecipeService,
+                            create_recipe_backend)
+from scaling import MAX_SERVINGS
+from shopping_list import item_label
+
+DEFAULT_PORT = 8765
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 256 * 1024
+# Idle keep-alive connections are closed after this long
+KEEP_ALIVE_SECONDS = 30
+RETRY_AFTER_SECONDS = 1
+MAX_SEARCH_RESULTS = 100
+
+
+class HttpError(Exception):
+    """An error answered as {"error": message} with status"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request:
+    """One parsed HTTP request"""
+
+    def __init__(self, method, path, query, headers, body, client):
+        self.method = method
+        self.path = path
+        self.query = query  # name -> last value given
+        self.headers = headers  # lower-case name -> value
+        self.body = body
+        self.client = client
+
+    @property
+    def keep_alive(self):
+        return self.headers.get("connection", "").lower() != "close"
+
+    def json(self):
+        """The body as a JSON object ({} when there is none)"""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except (ValueError, UnicodeDecodeError):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON") from None
+        if not isinstance(data, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return data
+
+
+async def read_request(reader, address):
+    """The next request on a connection, or None once the client has closed it"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large") from None
+
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    try:
+        method, target, _ = request_line.split(" ")
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Send a Content-Length instead of chunked bodies")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Bodies are limited to {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path.rstrip("/") or "/", query, headers, body,
+                   headers.get("x-client-id") or address)
+
+
+def encode_response(status, payload, headers=None, keep_alive=True):
+    """Bytes of a JSON response"""
+    status = HTTPStatus(status)
+    body = json.dumps(payload).encode("utf-8")
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+             "Content-Type: application/json",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def int_parameter(values, name, default=None, minimum=None, maximum=None):
+    """An integer from a query or body, checked against its range"""
+    value = values.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number") from None
+    if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be between {minimum} and {maximum}")
+    return number
+
+
+def diet_list(value):
+    """Diet keys from a list or a comma-separated string, each one of dietary.DIETS"""
+    if isinstance(value, str):
+        value = [diet.strip() for diet in value.split(",") if diet.strip()]
+    if not isinstance(value, list):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "diets must be a list")
+    unknown = [diet for diet in value if diet not in DIETS]
+    if unknown:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown diets: {', '.join(map(str, unknown))}")
+    return value
+
+
+# (method, path pattern, handler name); numeric groups are passed to the handler as ints
+ROUTES = [
+    ("GET", r"/health", "health"),
+    ("POST", r"/recipes/generate", "generate"),
+    ("GET", r"/recipes", "search"),
+    ("GET", r"/recipes/(\d+)", "recipe"),
+    ("GET", r"/favorites", "favorites"),
+    ("PUT", r"/favorites/(\d+)", "add_favorite"),
+    ("DELETE", r"/favorites/(\d+)", "remove_favorite"),
+    ("GET", r"/shopping-list", "shopping_list"),
+    ("POST", r"/shopping-list", "add_to_shopping_list"),
+    ("DELETE", r"/shopping-list", "clear_shopping_list"),
+    ("DELETE", r"/shopping-list/(\d+)", "remove_from_shopping_list")
+]
+COMPILED_ROUTES = [(method, re.compile(pattern + "$"), name) for method, pattern, name in ROUTES]
+
+
+class RecipeServer:
+    """The API over one RecipeService"""
+
+    def __init__(self, service, workers=4, queue_limit=32, per_client=2):
+        self.service = service
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.per_client = per_client
+        self.generation_pool = ThreadPoolExecutor(workers, thread_name_prefix="recipe-generation")
+        # The only thread that uses the service's connection and state
+        self.database = ThreadPoolExecutor(1, thread_name_prefix="recipe-database")
+        self.generations = 0  # Generation requests running or waiting for a worker
+        self.in_flight = {}  # client -> requests being handled
+        self.server = None
+
+    async def run_db(self, func, *args):
+        """Run func on the database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.database, func, *args)
+
+    def open_library(self):
+        """Open and migrate the library, catch up older rows and load the indexes (database thread)"""
+        self.service.open()
+        self.service.migrate()
+        self.service.favorites.load()
+        # On this thread too, so the backfills' writes never race the API's
+        self.service.backfill_durations()
+        self.service.backfill_diet_flags()
+        # Saves add to the indexes, so they must hold the whole library first
+        self.service.build_pantry_index()
+        self.service.build_similarity_index()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Open the library and start listening; returns the (host, port) bound"""
+        await self.run_db(self.open_library)
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.generation_pool.shutdown(wait=False, cancel_futures=True)
+        await self.run_db(self.service.close)
+        self.database.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        """Answer requests on one connection until the client closes it or goes idle"""
+        peer = writer.get_extra_info("peername")
+        address = peer[0] if peer else "unknown"
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader, address), KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    break
+                except HttpError as e:
+                    # The stream can't be trusted after a bad request
+                    writer.write(encode_response(e.status, {"error": e.message}, e.headers, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                status, payload, headers = await self.dispatch(request)
+                writer.write(encode_response(status, payload, headers, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def route(self, request):
+        """(handler, arguments) for a request"""
+        path_matched = False
+        for method, pattern, name in COMPILED_ROUTES:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            path_matched = True
+            if method == request.method:
+                return getattr(self, name), [int(group) for group in match.groups()]
+        if path_matched:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"{request.method} is not supported here")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"No endpoint at {request.path}")
+
+    async def dispatch(self, request):
+        """(status, payload, headers) for a request, within its client's concurrency limit"""
+        client = request.client
+        if self.in_flight.get(client, 0) >= self.per_client:
+            return (HTTPStatus.TOO_MANY_REQUESTS, {"error": "Too many requests in flight for this client"},
+                    {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        self.in_flight[client] = self.in_flight.get(client, 0) + 1
+        try:
+            handler, arguments = self.route(request)
+            return HTTPStatus.OK, await handler(request, *arguments), {}
+        except HttpError as e:
+            return e.status, {"error": e.message}, e.headers
+        except sqlite3.Error as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Database error: {e}"}, {}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}, {}
+        finally:
+            self.in_flight[client] -= 1
+            if not self.in_flight[client]:
+                del self.in_flight[client]
+
+    async def health(self, request):
+        return {
+            "workers": self.workers,
+            "generating": min(self.generations, self.workers),
+            "queued": max(self.generations - self.workers, 0),
+            "queue_limit": self.queue_limit,
+            "clients": len(self.in_flight)
+        }
+
+    async def generate(self, request):
+        data = request.json()
+        ingredients = str(data.get("ingredients") or "").strip()
+        if not ingredients:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "ingredients is required")
+        diets = diet_list(data.get("diets", []))
+        if not self.service.can_generate:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "No API key is configured for the model")
+        if self.generations >= self.workers + self.queue_limit:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "The generation queue is full",
+                            {"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+        self.generations += 1
+        try:
+            recipe_data = await asyncio.get_running_loop().run_in_executor(
+                self.generation_pool, self.service.generate_recipe, ingredients, diets
+            )
+        except RecipeParseError as e:
+            raise HttpError(HTTPStatus.BAD_GATEWAY, str(e)) from None
+        except Exception as e:
+            raise HttpError(HTTPStatus.BAD_GATEWAY, f"Generation failed: {e}") from None
+        finally:
+            self.generations -= 1
+
+        recipe_id = await self.run_db(self.service.save_recipe, recipe_data)
+        return {"id": recipe_id, **recipe_data}
+
+    async def search(self, request):
+        query = request.query
+        rows = await self.run_db(
+            self.service.recipes.history,
+            query.get("search", "").strip(),
+            int_parameter(query, "min_minutes", minimum=0),
+            int_parameter(query, "max_minutes", minimum=0),
+            diet_list(query.get("diets", "")),
+            int_parameter(query, "limit", 20, 1, MAX_SEARCH_RESULTS)
+        )
+        return {"recipes": [{"id": recipe_id, "name": name, "date_added": date_added, "servings": servings}
+                            for recipe_id, name, date_added, _, servings in rows]}
+
+    async def recipe(self, request, recipe_id):
+        recipe_data = await self.run_db(self.service.get_recipe, recipe_id)
+        if recipe_data is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No recipe {recipe_id}")
+        return {"id": recipe_id, **recipe_data}
+
+    async def favorites(self, request):
+        rows = await self.run_db(self.service.favorites.recipes)
+        return {"favorites": [{"id": recipe_id, "name": name, "image_url": image_url, "servings": servings}
+                              for recipe_id, name, image_url, _, servings in rows]}
+
+    def set_favorite(self, recipe_id, favorite):
+        """Favorite or unfavorite a recipe (database thread); False if there's no such recipe"""
+        if favorite and self.service.get_recipe(recipe_id) is None:
+            return False
+        self.service.set_favorite(recipe_id, favorite)
+        return True
+
+    async def add_favorite(self, request, recipe_id):
+        if not await self.run_db(self.set_favorite, recipe_id, True):
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No recipe {recipe_id}")
+        return {"id": recipe_id, "favorite": True}
+
+    async def remove_favorite(self, request, recipe_id):
+        await self.run_db(self.set_favorite, recipe_id, False)
+        return {"id": recipe_id, "favorite": False}
+
+    def shopping_list_state(self):
+        """The shopping list as JSON data (database thread)"""
+        shopping_list = self.service.shopping_list
+        return {
+            "recipes": [{"id": recipe_id, "name": name} for recipe_id, name in shopping_list.recipes.items()],
+            "sections": [{"section": section,
+                          "items": [{"key": item.key, "name": item.name, "amount": item.amount,
+                                     "label": item_label(item)} for item in items]}
+                         for section, items in shopping_list.sections()]
+        }
+
+    async def shopping_list(self, request):
+        return await self.run_db(self.shopping_list_state)
+
+    def add_and_list(self, recipe_id, servings):
+        """Add a recipe to the shopping list and return the list (database thread)"""
+        try:
+            self.service.add_to_shopping_list(recipe_id, servings)
+        except KeyError:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No recipe {recipe_id}") from None
+        return self.shopping_list_state()
+
+    async def add_to_shopping_list(self, request):
+        data = request.json()
+        recipe_id = int_parameter(data, "recipe_id", minimum=1)
+        if recipe_id is None:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "recipe_id is required")
+        servings = int_parameter(data, "servings", None, 1, MAX_SERVINGS)
+        return await self.run_db(self.add_and_list, recipe_id, servings)
+
+    def remove_and_list(self, recipe_id):
+        """Take a recipe off the shopping list and return the list (database thread)"""
+        if recipe_id not in self.service.shopping_list:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Recipe {recipe_id} is not on the shopping list")
+        self.service.shopping_list.remove_recipe(recipe_id)
+        return self.shopping_list_state()
+
+    async def remove_from_shopping_list(self, request, recipe_id):
+        return await self.run_db(self.remove_and_list, recipe_id)
+
+    def clear_and_list(self):
+        self.service.shopping_list.clear()
+        return self.shopping_list_state()
+
+    async def clear_shopping_list(self, request):
+        return await self.run_db(self.clear_and_list)
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start, then serve until cancelled"""
+        host, port = await self.start(host, port)
+        print(f"Serving {self.service.database_path} on http://{host}:{port}", flush=True)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the recipe library over a local HTTP/JSON API")
+    parser.add_argument("--db", default=DATABASE_PATH, help="recipe library to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=4, help="generations run at once")
+    parser.add_argument("--queue", type=int, default=32, help="generations that may wait for a worker")
+    parser.add_argument("--per-client", type=int, default=2, help="requests each client may have in flight")
+    parser.add_argument("--backend", choices=sorted(RECIPE_BACKENDS),
+                        default=os.environ.get("RECIPE_BACKEND", "gemini"))
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds each generation takes with the offline backend")
+    args = parser.parse_args(argv)
+
+    backend = create_recipe_backend(args.backend)
+    if hasattr(backend, "latency"):
+        backend.latency = args.latency
+    service = RecipeService(args.db, backend, os.environ.get("GEMINI_API_KEY", ""))
+    server = RecipeServer(service, args.workers, args.queue, args.per_client)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
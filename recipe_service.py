@@ -0,0 +1,784 @@
+"""Headless core of the recipe app.
+
+RecipeService holds everything the app does with recipes apart from drawing
+them: building the generation prompt and reading the model's reply, saving
+and loading recipes, favorites, preferences and the shopping list, and the
+ingredient and similar-recipe indexes kept current as recipes are saved.
+The window is one client of it; a script, a server or a benchmark can be
+another without constructing a QApplication.
+
+Storage goes through small repositories over one SQLite connection
+(RecipeRepository, FavoritesRepository, PantryRepository,
+PreferencesRepository); the schema and its migrations live here too.
+Generation goes through a RecipeBackend, generate(prompt, api_key) -> reply
+text. GeminiBackend calls the model; OfflineRecipeBackend is a local,
+deterministic stand-in for scripts and load tests.
+
+Errors are raised for the client to report: sqlite3.Error from storage,
+RecipeParseError for replies that aren't a recipe. Importing the module is
+cheap, and so is creating a service: the numpy-backed indexes, the
+shopping list and the Gemini client are only loaded when first used. The
+module has no Qt dependency.
+"""
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+
+from dietary import DIET_CLASSIFIER_VERSION, backfill_diet_flags, classify, flags_condition
+from durations import DURATION_PARSER_VERSION, backfill_durations, duration_columns, range_condition
+
+DATABASE_PATH = "recipes.db"
+
+BASE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        instructions TEXT NOT NULL,
+        image_url TEXT,
+        prep_time TEXT,
+        cook_time TEXT,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS favorites (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipe_id INTEGER,
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_preferences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dark_mode BOOLEAN DEFAULT 1,
+        vegetarian BOOLEAN DEFAULT 0,
+        vegan BOOLEAN DEFAULT 0,
+        gluten_free BOOLEAN DEFAULT 0,
+        keto BOOLEAN DEFAULT 0,
+        low_carb BOOLEAN DEFAULT 0
+    )
+    """
+]
+
+# Schema migrations applied on top of the base tables, in order. PRAGMA
+# user_version records how many have run, so each one runs exactly once.
+SCHEMA_MIGRATIONS = [
+    # 1: pantry inventory, one row per normalized ingredient
+    """
+    CREATE TABLE IF NOT EXISTS pantry (
+        ingredient_key TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    # 2: nutrition estimates per recipe, valid while source_hash matches
+    """
+    CREATE TABLE IF NOT EXISTS recipe_nutrition (
+        recipe_id INTEGER PRIMARY KEY,
+        source_hash TEXT NOT NULL,
+        kcal REAL, protein REAL, fat REAL, carbs REAL, fiber REAL, sugar REAL, sodium REAL,
+        matched INTEGER,
+        total INTEGER,
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id)
+    );
+    """,
+    # 3: prep/cook/total minutes parsed from the time texts, indexed for time
+    # filters; durations_parsed is the parser version that filled them (0 = not yet)
+    """
+    ALTER TABLE recipes ADD COLUMN prep_minutes INTEGER;
+    ALTER TABLE recipes ADD COLUMN cook_minutes INTEGER;
+    ALTER TABLE recipes ADD COLUMN total_minutes INTEGER;
+    ALTER TABLE recipes ADD COLUMN durations_parsed INTEGER NOT NULL DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS idx_recipes_prep_minutes ON recipes (prep_minutes);
+    CREATE INDEX IF NOT EXISTS idx_recipes_cook_minutes ON recipes (cook_minutes);
+    CREATE INDEX IF NOT EXISTS idx_recipes_total_minutes ON recipes (total_minutes);
+    """,
+    # 4: dietary classification as a bitmask over dietary.DIETS, indexed for the
+    # diet filters; diet_flags_version is the rule version that set it (0 = not yet).
+    # date_added in the index lets "newest 20 with these flags" stop early per mask
+    """
+    ALTER TABLE recipes ADD COLUMN diet_flags INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE recipes ADD COLUMN diet_flags_version INTEGER NOT NULL DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS idx_recipes_diet_flags ON recipes (diet_flags, date_added);
+    """,
+    # 5: servings the recipe was written for; NULL for older recipes, which
+    # assume nutrition.DEFAULT_SERVINGS
+    """
+    ALTER TABLE recipes ADD COLUMN servings INTEGER;
+    """,
+    # 6: a random ID for the library, so files kept beside it (the similar-recipes
+    # index) can tell it from another library or from a recreated one
+    """
+    CREATE TABLE IF NOT EXISTS library (uid TEXT NOT NULL);
+    INSERT INTO library (uid) VALUES (lower(hex(randomblob(16))));
+    """,
+    # 7: newest-first history with a time filter walks this index and stops at the
+    # limit, reading total_minutes from the index instead of sorting every match
+    """
+    CREATE INDEX IF NOT EXISTS idx_recipes_date_added ON recipes (date_added, total_minutes);
+    """
+]
+
+# Diet columns of user_preferences, in table order
+PREFERENCE_DIETS = ["vegetarian", "vegan", "gluten_free", "keto", "low_carb"]
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Appended to every generation prompt
+RESPONSE_FORMAT = """ Return the response as a JSON object with the following structure:
+        {
+            "recipe_name": "Name of the recipe",
+            "prep_time": "Preparation time",
+            "cook_time": "Cooking time",
+            "servings": "Number of servings, as a whole number",
+            "ingredients": ["Ingredient 1", "Ingredient 2", ...],
+            "instructions": ["Step 1", "Step 2", ...],
+            "image_prompt": "A detailed prompt to generate an image for this dish"
+        }
+        Only respond with the JSON object, no introduction or additional text.
+        """
+
+# Filled in when a reply leaves a field out
+RECIPE_DEFAULTS = {
+    "recipe_name": "Untitled Recipe",
+    "prep_time": "15 minutes",
+    "cook_time": "30 minutes",
+    "ingredients": ["Ingredients not specified"],
+    "instructions": ["Instructions not available"]
+}
+
+RECIPE_COLUMNS = "name, ingredients, instructions, prep_time, cook_time, servings, image_url"
+
+
+class RecipeParseError(ValueError):
+    """A model reply that doesn't contain a usable recipe"""
+
+
+def build_prompt(ingredients, diets=()):
+    """Generation prompt for the ingredients the user typed and diet keys ("gluten_free")"""
+    prompt = f"Create a detailed recipe using these ingredients: {ingredients}."
+    if diets:
+        prompt += f" The recipe should be {', '.join(diet.replace('_', ' ').title() for diet in diets)}."
+    return prompt + RESPONSE_FORMAT
+
+
+def parse_recipe_response(text):
+    """Recipe data from a model reply, with missing fields filled in"""
+    json_start = text.find("{")
+    json_end = text.rfind("}") + 1
+    if json_start < 0 or json_end <= json_start:
+        raise RecipeParseError("Could not parse AI response as JSON")
+    try:
+        recipe_data = json.loads(text[json_start:json_end])
+    except json.JSONDecodeError:
+        raise RecipeParseError("Invalid JSON in AI response") from None
+    if not isinstance(recipe_data, dict):
+        raise RecipeParseError("Could not parse AI response as JSON")
+    for field, default in RECIPE_DEFAULTS.items():
+        if field not in recipe_data:
+            recipe_data[field] = list(default) if isinstance(default, list) else default
+    return recipe_data
+
+
+class RecipeBackend:
+    """Turns a generation prompt into the model's reply text"""
+    name = "base"
+    needs_api_key = False
+
+    def generate(self, prompt, api_key):
+        """Return the reply text; errors are raised as they come"""
+        raise NotImplementedError
+
+
+class GeminiBackend(RecipeBackend):
+    """Google Gemini; a network round trip per recipe"""
+    name = "gemini"
+    needs_api_key = True
+
+    def __init__(self, model=GEMINI_MODEL):
+        self.model = model
+
+    def generate(self, prompt, api_key):
+        # Imported on first use to keep it off the startup path
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(self.model).generate_content(prompt).text
+
+
+class OfflineRecipeBackend(RecipeBackend):
+    """Offline stand-in that writes a deterministic recipe around the prompt's ingredients.
+
+    Each call sleeps latency seconds first, as a model call waits on the
+    network, so load tests see realistic concurrency without an API key.
+    """
+    name = "offline"
+
+    PROMPT_INGREDIENTS = re.compile(r"using these ingredients: (.*?)\.(?: The recipe| Return)", re.DOTALL)
+    DISHES = ["Skillet", "Stew", "Bake", "Stir-Fry", "Salad", "Soup", "Pasta", "Curry"]
+    STYLES = ["Rustic", "Quick", "Herbed", "Smoky", "Lemony", "Garlicky", "Weeknight"]
+    AMOUNTS = ["1", "2", "1/2 cup", "1 cup", "2 tbsp", "200 g", "1 tsp"]
+    METHODS = [("Saute", "over medium heat", 5), ("Simmer", "covered", 20), ("Roast", "at 200C", 25),
+               ("Brown", "in a large pan", 8), ("Bake", "until golden", 30)]
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate(self, prompt, api_key=None):
+        if self.latency:
+            time.sleep(self.latency)
+        match = self.PROMPT_INGREDIENTS.search(prompt)
+        ingredients = [part.strip() for part in re.split(r",|;|\n|\band\b", match.group(1) if match else "")
+                       if part.strip()] or ["rice"]
+        rng = random.Random(prompt)
+        main = ingredients[0]
+        steps = [f"Prepare the {', '.join(ingredients[:3])}."]
+        for ingredient in ingredients[:4]:
+            verb, detail, minutes = rng.choice(self.METHODS)
+            steps.append(f"{verb} the {ingredient} {detail} for {minutes} minutes.")
+        steps.append("Season with salt and pepper to taste and serve.")
+        return json.dumps({
+            "recipe_name": f"{rng.choice(self.STYLES)} {main.title()} {rng.choice(self.DISHES)}",
+            "prep_time": f"{rng.randint(1, 4) * 5} minutes",
+            "cook_time": f"{rng.randint(2, 9) * 5} minutes",
+            "servings": rng.choice([2, 4, 6]),
+            "ingredients": [f"{rng.choice(self.AMOUNTS)} {ingredient}" for ingredient in ingredients]
+            + ["Salt and pepper to taste"],
+            "instructions": steps,
+            "image_prompt": f"A plated {main} dish on a rustic table"
+        })
+
+
+RECIPE_BACKENDS = {backend.name: backend for backend in (GeminiBackend, OfflineRecipeBackend)}
+
+
+def create_recipe_backend(name):
+    """Instantiate a backend by name, falling back to Gemini for unknown names"""
+    return RECIPE_BACKENDS.get(name, GeminiBackend)()
+
+
+def recipe_filter(minimum=None, maximum=None, diets=(), table=""):
+    """SQL condition and parameters for a total-minutes range and diets over the recipes table"""
+    time_condition, parameters = range_condition(f"{table}total_minutes", minimum, maximum)
+    diet_condition, diet_parameters = flags_condition(f"{table}diet_flags", diets)
+    return f"{time_condition} AND {diet_condition}", parameters + diet_parameters
+
+
+def like_pattern(text):
+    """LIKE pattern matching text anywhere in a column, for use with ESCAPE '\\'"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def script_statements(script):
+    """The statements of a SQL script, in order"""
+    statements, pending = [], ""
+    for piece in script.split(";"):
+        pending += piece + ";"
+        # A ";" inside a string or trigger body doesn't end the statement
+        if sqlite3.complete_statement(pending):
+            if pending.strip(" \t\r\n;"):
+                statements.append(pending.strip())
+            pending = ""
+    return statements
+
+
+def library_id(conn):
+    """The library's random ID (schema migration 6), or None if it has none"""
+    try:
+        row = conn.execute("SELECT uid FROM library").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def recipe_from_row(name, ingredients_json, instructions_json, prep_time, cook_time, servings, image_url):
+    """Recipe data, as the app passes it around, from the RECIPE_COLUMNS of a row"""
+    return {
+        "recipe_name": name,
+        "ingredients": json.loads(ingredients_json),
+        "instructions": json.loads(instructions_json),
+        "prep_time": prep_time,
+        "cook_time": cook_time,
+        "servings": servings,
+        "image_url": image_url
+    }
+
+
+class RecipeRepository:
+    """The recipes table"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def insert(self, recipe_data):
+        """Store a recipe, with its times and diets worked out for the filters; returns its ID"""
+        # Imported on first use; scaling pulls in numpy through nutrition
+        from scaling import parse_servings
+
+        ingredients = recipe_data.get("ingredients", [])
+        prep_minutes, cook_minutes, total_minutes = duration_columns(
+            recipe_data.get("prep_time"), recipe_data.get("cook_time")
+        )
+        with self.conn:
+            cursor = self.conn.execute("""
+            INSERT INTO recipes (name, ingredients, instructions, prep_time, cook_time,
+                                 prep_minutes, cook_minutes, total_minutes, durations_parsed,
+                                 diet_flags, diet_flags_version, servings)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                recipe_data.get("recipe_name", "Untitled Recipe"),
+                json.dumps(ingredients),
+                json.dumps(recipe_data.get("instructions", [])),
+                recipe_data.get("prep_time", "N/A"),
+                recipe_data.get("cook_time", "N/A"),
+                prep_minutes,
+                cook_minutes,
+                total_minutes,
+                DURATION_PARSER_VERSION,
+                classify(ingredients),
+                DIET_CLASSIFIER_VERSION,
+                parse_servings(recipe_data.get("servings"))
+            ))
+        return cursor.lastrowid
+
+    def get(self, recipe_id):
+        """Recipe data for an ID, or None if there's no such recipe"""
+        row = self.conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ?", (recipe_id,)).fetchone()
+        return recipe_from_row(*row) if row else None
+
+    def recent(self, limit=20):
+        """(ID, recipe data) of the most recently added recipes"""
+        rows = self.conn.execute(f"SELECT id, {RECIPE_COLUMNS} FROM recipes ORDER BY date_added DESC LIMIT ?",
+                                 (limit,)).fetchall()
+        return [(row[0], recipe_from_row(*row[1:])) for row in rows]
+
+    def history(self, search="", minimum=None, maximum=None, diets=(), limit=20):
+        """(ID, name, date_added, ingredients JSON, servings) of the newest recipes matching a name and filters"""
+        condition, parameters = recipe_filter(minimum, maximum, diets)
+        if search:
+            condition += " AND name LIKE ? ESCAPE '\\'"
+            parameters.append(like_pattern(search))
+        return self.conn.execute(
+            f"SELECT id, name, date_added, ingredients, servings FROM recipes WHERE {condition} "
+            "ORDER BY date_added DESC LIMIT ?", parameters + [limit]
+        ).fetchall()
+
+    def ids(self):
+        """IDs of every stored recipe"""
+        return {recipe_id for (recipe_id,) in self.conn.execute("SELECT id FROM recipes")}
+
+    def names(self, recipe_ids):
+        """{ID: name} of the recipes among recipe_ids that exist"""
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return {}
+        return dict(self.conn.execute(
+            f"SELECT id, name FROM recipes WHERE id IN ({','.join('?' * len(recipe_ids))})", recipe_ids
+        ).fetchall())
+
+    def image_urls(self, recipe_ids=None, limit=20):
+        """Image URLs of the given recipes, or of the most recent ones"""
+        if recipe_ids is None:
+            rows = self.conn.execute("SELECT image_url FROM recipes ORDER BY date_added DESC LIMIT ?", (limit,))
+        else:
+            recipe_ids = list(recipe_ids)
+            rows = self.conn.execute(
+                f"SELECT image_url FROM recipes WHERE id IN ({','.join('?' * len(recipe_ids))})", recipe_ids
+            )
+        return [image_url for (image_url,) in rows]
+
+
+class FavoritesRepository:
+    """The favorites table, with the favorited IDs kept in memory in the order they were added"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(list(self.ids))
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.ids
+
+    def load(self):
+        self.ids = [recipe_id for (recipe_id,) in self.conn.execute("SELECT recipe_id FROM favorites ORDER BY id")]
+        return self.ids
+
+    def add(self, recipe_id):
+        if recipe_id in self.ids:
+            return
+        with self.conn:
+            self.conn.execute("INSERT INTO favorites (recipe_id) VALUES (?)", (recipe_id,))
+        self.ids.append(recipe_id)
+
+    def remove(self, recipe_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM favorites WHERE recipe_id = ?", (recipe_id,))
+        self.ids = [favorite for favorite in self.ids if favorite != recipe_id]
+
+    def recipes(self, minimum=None, maximum=None, diets=()):
+        """(ID, name, image_url, ingredients JSON, servings) of favorites matching the filters, in favorite order"""
+        condition, parameters = recipe_filter(minimum, maximum, diets, "r.")
+        return self.conn.execute(f"""
+        SELECT r.id, r.name, r.image_url, r.ingredients, r.servings
+        FROM favorites f JOIN recipes r ON r.id = f.recipe_id
+        WHERE {condition} ORDER BY f.id
+        """, parameters).fetchall()
+
+
+class PantryRepository:
+    """The pantry table, with its items kept in memory in the order they were added"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.items = {}  # ingredient key -> name as entered
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def load(self):
+        self.items = dict(self.conn.execute("SELECT ingredient_key, name FROM pantry ORDER BY date_added"))
+        return self.items
+
+    def add(self, items):
+        """Add (ingredient key, name) pairs; returns whether any were new"""
+        new = {}
+        for key, name in items:
+            if key not in self.items:
+                new.setdefault(key, name)
+        if new:
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO pantry (ingredient_key, name) VALUES (?, ?)",
+                                      new.items())
+            self.items.update(new)
+        return bool(new)
+
+    def remove(self, key):
+        with self.conn:
+            self.conn.execute("DELETE FROM pantry WHERE ingredient_key = ?", (key,))
+        self.items.pop(key, None)
+
+
+class PreferencesRepository:
+    """The single user_preferences row: theme and default diets"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def load(self):
+        """(dark_mode, {diet: enabled}), or None if preferences were never saved"""
+        row = self.conn.execute(f"SELECT dark_mode, {', '.join(PREFERENCE_DIETS)} FROM user_preferences "
+                                "ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return bool(row[0]), {diet: bool(value) for diet, value in zip(PREFERENCE_DIETS, row[1:])}
+
+    def save(self, dark_mode, filter_options):
+        values = [dark_mode] + [filter_options.get(diet, False) for diet in PREFERENCE_DIETS]
+        with self.conn:
+            count = self.conn.execute("SELECT COUNT(*) FROM user_preferences").fetchone()[0]
+            if count == 0:
+                self.conn.execute(f"INSERT INTO user_preferences (dark_mode, {', '.join(PREFERENCE_DIETS)}) "
+                                  f"VALUES ({', '.join('?' * len(values))})", values)
+            else:
+                assignments = ", ".join(f"{column} = ?" for column in ["dark_mode"] + PREFERENCE_DIETS)
+                self.conn.execute(f"UPDATE user_preferences SET {assignments} WHERE id = 1", values)
+
+
+class RecipeService:
+    """The recipe library and everything done with it, without a GUI.
+
+    Methods that use the service's connection belong on the thread that
+    called open(). generate_recipe() and the build/backfill maintenance
+    methods are safe on worker threads; the latter open their own
+    connections.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, backend=None, api_key=""):
+        self.database_path = database_path
+        self.backend = backend or GeminiBackend()
+        self.api_key = api_key
+        self.conn = None
+        self.recipes = None  # Repositories, created by open()
+        self.favorites = None
+        self.pantry = None
+        self.preferences = None
+        self.recipe_cache = {}  # recipe ID -> recipe data, filled by prime_recipe_cache() and loads
+        # The numpy-backed parts below are created on first use, so a service (and
+        # the window holding one) can be set up without loading numpy
+        self.components = {}
+        self.components_lock = threading.Lock()
+
+    def component(self, name, create):
+        """The component called name, created by create() on first use from any thread"""
+        with self.components_lock:
+            if name not in self.components:
+                self.components[name] = create()
+            return self.components[name]
+
+    @property
+    def scaled_recipes(self):
+        """(recipe ID, servings) -> scaled ingredient lines"""
+        from scaling import ScaledRecipes
+
+        return self.component("scaled_recipes", ScaledRecipes)
+
+    @property
+    def shopping_list(self):
+        from shopping_list import ShoppingList
+
+        return self.component("shopping_list", ShoppingList)
+
+    @property
+    def pantry_index(self):
+        """Bitset index of every recipe's ingredients, for pantry matches and the meal planner"""
+        from pantry_index import PantryIndex
+
+        return self.component("pantry_index", PantryIndex)
+
+    @property
+    def similarity_index(self):
+        """TF-IDF index behind similar recipes"""
+        from similar_recipes import SimilarityIndex
+
+        return self.component("similarity_index", SimilarityIndex)
+
+    @property
+    def index_directory(self):
+        """Where the similar-recipes index of this library is saved"""
+        from similar_recipes import index_directory
+
+        return index_directory(self.database_path)
+
+    def connect(self):
+        """A new connection to the library, e.g. for a worker thread"""
+        return sqlite3.connect(self.database_path)
+
+    def open(self):
+        """Open the library, creating the base tables if they don't exist"""
+        self.conn = self.connect()
+        for statement in BASE_TABLES:
+            self.conn.execute(statement)
+        self.conn.commit()
+        self.recipes = RecipeRepository(self.conn)
+        self.favorites = FavoritesRepository(self.conn)
+        self.pantry = PantryRepository(self.conn)
+        self.preferences = PreferencesRepository(self.conn)
+
+    def migrate(self):
+        """Apply any schema migrations this database hasn't seen yet.
+
+        Each step runs in one transaction together with its user_version bump,
+        so an interrupted step leaves nothing half-applied. The version is read
+        under the write lock, so a process migrating at the same time (say the
+        GUI and the server starting together) waits and then skips the steps
+        already applied.
+        """
+        self.conn.commit()
+        while True:
+            # executescript() would commit before running, so statements run one by one
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(SCHEMA_MIGRATIONS):
+                    self.conn.commit()
+                    return
+                for statement in script_statements(SCHEMA_MIGRATIONS[version]):
+                    self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {version + 1}")
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    @property
+    def can_generate(self):
+        """False while the backend needs an API key and none is set"""
+        return bool(self.api_key) or not self.backend.needs_api_key
+
+    def generate_recipe(self, ingredients, diets=()):
+        """Recipe data generated for the ingredients and diets; saves nothing, safe on a worker thread"""
+        return parse_recipe_response(self.backend.generate(build_prompt(ingredients, diets), self.api_key))
+
+    def save_recipe(self, recipe_data):
+        """Store a recipe and add it to the cache and indexes; returns its ID"""
+        # Imported on first use, like the indexes themselves
+        from scaling import parse_servings
+        from similar_recipes import COMPACT_EVERY, recipe_terms
+
+        recipe_id = self.recipes.insert(recipe_data)
+        self.recipe_cache[recipe_id] = {
+            "recipe_name": recipe_data.get("recipe_name", "Untitled Recipe"),
+            "ingredients": recipe_data.get("ingredients", []),
+            "instructions": recipe_data.get("instructions", []),
+            "prep_time": recipe_data.get("prep_time", "N/A"),
+            "cook_time": recipe_data.get("cook_time", "N/A"),
+            "servings": parse_servings(recipe_data.get("servings")),
+            "image_url": None
+        }
+
+        # Keep pantry matches current without re-indexing the library
+        self.pantry_index.add_recipe(recipe_id, recipe_data.get("ingredients", []))
+
+        # Same for similar recipes; the saved index is rewritten once enough have piled up,
+        # but only after build_similarity_index() loaded it, or a partial index would be saved
+        self.similarity_index.add_recipe(recipe_id, recipe_terms(
+            recipe_data.get("recipe_name", "Untitled Recipe"),
+            recipe_data.get("ingredients", []),
+            recipe_data.get("instructions", [])
+        ))
+        if (self.similarity_index.ready and self.similarity_index.delta_size >= COMPACT_EVERY
+                and not self.similarity_index.maintenance.locked()):
+            threading.Thread(target=self.similarity_index.compact, args=(self.index_directory,),
+                             daemon=True).start()
+        return recipe_id
+
+    def get_recipe(self, recipe_id):
+        """Recipe data for an ID from the cache or the database, or None if there's no such recipe"""
+        recipe_data = self.recipe_cache.get(recipe_id)
+        if recipe_data is None:
+            recipe_data = self.recipes.get(recipe_id)
+            if recipe_data is not None:
+                self.recipe_cache[recipe_id] = recipe_data
+        return recipe_data
+
+    def recipe_names(self, recipe_ids):
+        """{ID: name} of the recipes among recipe_ids that exist, from the cache where it has them"""
+        names = {recipe_id: self.recipe_cache[recipe_id]["recipe_name"]
+                 for recipe_id in recipe_ids if recipe_id in self.recipe_cache}
+        names.update(self.recipes.names(recipe_id for recipe_id in recipe_ids if recipe_id not in names))
+        return names
+
+    def prime_recipe_cache(self, limit=20):
+        """Load the most recent recipes (what history shows first) into the recipe cache"""
+        try:
+            for recipe_id, recipe_data in self.recipes.recent(limit):
+                self.recipe_cache[recipe_id] = recipe_data
+        except (sqlite3.Error, json.JSONDecodeError):
+            # The cache is only an optimization; get_recipe falls back to the DB
+            self.recipe_cache.clear()
+
+    def set_image_url(self, recipe_id, image_url):
+        """Record a recipe's image"""
+        with self.conn:
+            self.conn.execute("UPDATE recipes SET image_url = ? WHERE id = ?", (image_url, recipe_id))
+        if recipe_id in self.recipe_cache:
+            self.recipe_cache[recipe_id]["image_url"] = image_url
+
+    def set_favorite(self, recipe_id, favorite):
+        """Add a recipe to or remove it from the favorites"""
+        if favorite:
+            self.favorites.add(recipe_id)
+        else:
+            self.favorites.remove(recipe_id)
+
+    def nutrition_totals(self, recipes):
+        """Cached nutrition totals for {recipe ID: ingredient lines}"""
+        from nutrition import NutritionEngine
+
+        return NutritionEngine.shared().cached_totals(self.conn, recipes)
+
+    def duplicate_groups(self, clusters):
+        """[(keeper ID, duplicate IDs)] for clusters from dedup.find_duplicates, skipping recipes deleted since"""
+        from dedup import choose_keeper
+
+        # The library may have changed during the search
+        stored = self.recipes.ids()
+        groups = []
+        for cluster in clusters:
+            cluster = [recipe_id for recipe_id in cluster if recipe_id in stored]
+            if len(cluster) > 1:
+                keep_id = choose_keeper(self.conn, cluster)
+                groups.append((keep_id, [recipe_id for recipe_id in cluster if recipe_id != keep_id]))
+        return groups
+
+    def merge_duplicates(self, keep_id, duplicate_ids):
+        """Fold duplicate recipes into keep_id and forget them everywhere; returns the changed shopping keys"""
+        from dedup import merge_duplicates
+
+        merge_duplicates(self.conn, keep_id, duplicate_ids)
+        changed = set()
+        for recipe_id in duplicate_ids:
+            self.pantry_index.remove_recipe(recipe_id)
+            self.similarity_index.remove_recipe(recipe_id)
+            self.recipe_cache.pop(recipe_id, None)
+            self.scaled_recipes.invalidate(recipe_id)
+            if recipe_id in self.shopping_list:
+                changed.update(self.shopping_list.remove_recipe(recipe_id))
+        # The keeper may have inherited an image and favorites
+        self.recipe_cache.pop(keep_id, None)
+        self.favorites.load()
+        return changed
+
+    def add_to_shopping_list(self, recipe_id, servings=None):
+        """Merge a recipe into the shopping list, at servings if given; returns the changed ingredient keys.
+
+        Adding a recipe again replaces its earlier entry. Raises KeyError for
+        unknown recipes.
+        """
+        from scaling import recipe_servings
+
+        recipe_data = self.get_recipe(recipe_id)
+        if recipe_data is None:
+            raise KeyError(recipe_id)
+        scale = servings / recipe_servings(recipe_data.get("servings")) if servings else 1.0
+        return self.shopping_list.add_recipe(recipe_id, recipe_data["recipe_name"], recipe_data["ingredients"],
+                                             scale)
+
+    def build_pantry_index(self):
+        """Index the ingredients of every stored recipe"""
+        conn = self.connect()
+        try:
+            recipes = []
+            for recipe_id, ingredients_json in conn.execute("SELECT id, ingredients FROM recipes"):
+                try:
+                    recipes.append((recipe_id, json.loads(ingredients_json)))
+                except json.JSONDecodeError:
+                    continue  # Unreadable rows just don't show up in pantry matches
+        finally:
+            conn.close()
+        self.pantry_index.load(recipes)
+
+    def build_similarity_index(self):
+        """Open the saved similar-recipes index of this library and catch it up, or build it"""
+        conn = self.connect()
+        try:
+            # Saved indexes of another library (or an older one at this path) are rebuilt
+            self.similarity_index.identity = library_id(conn)
+            self.similarity_index.sync(conn, self.index_directory)
+        finally:
+            conn.close()
+
+    def backfill_durations(self):
+        """Parse the times of recipes saved before the minutes columns existed; returns rows updated"""
+        conn = self.connect()
+        try:
+            return backfill_durations(conn)
+        finally:
+            conn.close()
+
+    def backfill_diet_flags(self):
+        """Classify recipes saved before diet flags existed; returns rows updated"""
+        conn = self.connect()
+        try:
+            return backfill_diet_flags(conn)
+        finally:
+            conn.close()
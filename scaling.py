@@ -0,0 +1,238 @@
+"""Serving-size scaling of recipe ingredients.
+
+scale_ingredients() rescales a recipe's ingredient lines from the servings it
+was written for to any other number, locally and without asking the model
+again. Lines are parsed with ingredient_parser, their quantities multiplied,
+and the results rounded the way a cook would measure them:
+
+- US volumes to kitchen fractions, moving between teaspoons, tablespoons and
+  cups as the amount grows or shrinks (6 tsp -> 2 tbsp, 8 tbsp -> 1/2 cup)
+- metric amounts to round numbers of grams or millilitres (kg and l once
+  they reach a thousand)
+- ounces to quarters, becoming pounds at a pound
+- counts and other units ("2 cloves", "1 can") to halves, or whole items
+  once there are a few of them
+
+Lines without a quantity ("salt to taste") are kept as written.
+
+ScaledRecipes memoizes scaled lists per (recipe ID, servings) in a small LRU,
+so stepping the servings back and forth never re-parses a recipe.
+recipe_servings() reads the servings a recipe was generated for, assuming
+nutrition.DEFAULT_SERVINGS for recipes that don't say. The module has no Qt
+dependency.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from ingredient_parser import UNITS, format_ingredient, parse_ingredients, singularize
+from nutrition import DEFAULT_SERVINGS
+
+MAX_SERVINGS = 48
+
+# Units converted among each other when a scaled amount reads better in another
+US_VOLUME_UNITS = {"teaspoon", "tablespoon", "cup"}
+METRIC_VOLUME_UNITS = {"milliliter", "centiliter", "deciliter", "liter"}
+METRIC_MASS_UNITS = {"milligram", "gram", "kilogram"}
+US_MASS_UNITS = {"ounce", "pound"}
+# Units that only come whole ("1 1/2 pinches" isn't a measure)
+WHOLE_UNITS = {"pinch", "dash", "drop", "sprig", "leaf", "handful", "sheet"}
+
+# Fractions each unit is measured in, as denominators
+UNIT_FRACTIONS = {
+    "teaspoon": (2, 4, 8),
+    "tablespoon": (2,),
+    "cup": (3, 4),
+    "ounce": (4,),
+    "pound": (4,),
+    "fluid ounce": (2,),
+    "pint": (2,),
+    "quart": (4,),
+    "gallon": (4,)
+}
+# Largest relative rounding error tolerated before a cup amount falls back to tablespoons
+CUP_TOLERANCE = 0.05
+
+SERVINGS_PATTERN = re.compile(r"\d+")
+
+
+def parse_servings(value):
+    """Servings in a recipe's "servings" field (4, "4", "Serves 4-6"), or None if it has none"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        servings = int(value)
+    else:
+        match = SERVINGS_PATTERN.search(str(value or ""))
+        if match is None:
+            return None
+        servings = int(match.group())
+    return servings if 1 <= servings <= MAX_SERVINGS else None
+
+
+def recipe_servings(value):
+    """Servings a recipe was written for, assuming DEFAULT_SERVINGS when it doesn't say"""
+    return parse_servings(value) or DEFAULT_SERVINGS
+
+
+def nearest_fraction(value, denominators):
+    """value rounded to the closest multiple of 1/d over the given denominators, never to 0"""
+    best = min((round(value * denominator) / denominator for denominator in denominators),
+               key=lambda candidate: abs(candidate - value))
+    return best or 1 / max(denominators)
+
+
+def round_metric(value):
+    """Round grams or millilitres to a step that suits their size"""
+    if value < 10:
+        step = 1 if value >= 2 else 0.5
+    elif value < 100:
+        step = 5
+    elif value < 500:
+        step = 10
+    else:
+        step = 25
+    return max(round(value / step) * step, step)
+
+
+def round_in_unit(value, unit):
+    """Round an amount in unit to what can be measured in it"""
+    if unit in ("milliliter", "gram", "milligram"):
+        return round_metric(value)
+    if unit in ("liter", "kilogram"):
+        return max(round(value * 20) / 20, 0.05)
+    if unit in ("centiliter", "deciliter"):
+        return max(round(value * 2) / 2, 0.5)
+    if unit in UNIT_FRACTIONS:
+        return nearest_fraction(value, UNIT_FRACTIONS[unit])
+    if unit in WHOLE_UNITS or value >= 3:
+        return max(round(value), 1)
+    return nearest_fraction(value, (2,))
+
+
+def measuring_unit(value, unit):
+    """The unit an amount of value in unit reads best in"""
+    if unit in US_VOLUME_UNITS:
+        teaspoons = value * UNITS[unit][1] / UNITS["teaspoon"][1]
+        if teaspoons < 3:
+            return "teaspoon"
+        if teaspoons < 12:
+            return "tablespoon"
+        cups = teaspoons / 48
+        # Tablespoons read better than a cup measure that's off ("5 tbsp", not "1/3 cup")
+        if teaspoons < 48 and abs(round_in_unit(cups, "cup") - cups) > CUP_TOLERANCE * cups:
+            return "tablespoon"
+        return "cup"
+    if unit in METRIC_VOLUME_UNITS or unit in METRIC_MASS_UNITS:
+        base = value * UNITS[unit][1]
+        if unit == "milligram" and base < 1:
+            return "milligram"
+        if unit in METRIC_VOLUME_UNITS:
+            return "liter" if base >= 1000 else "milliliter"
+        return "kilogram" if base >= 1000 else "gram"
+    if unit in US_MASS_UNITS:
+        return "pound" if value * UNITS[unit][1] >= UNITS["pound"][1] else "ounce"
+    return unit
+
+
+def convert(value, unit, target):
+    """value in unit expressed in target, a unit of the same dimension"""
+    if unit == target:
+        return value
+    return value * UNITS[unit][1] / UNITS[target][1]
+
+
+def scale_amount(quantity, unit, factor):
+    """(quantity, unit) for quantity of unit multiplied by factor, rounded for measuring"""
+    value = quantity * factor
+    target = measuring_unit(value, unit)
+    return round_in_unit(convert(value, unit, target), target), target
+
+
+def count_name(name, old_quantity, new_quantity):
+    """Ingredient name for a plain count, made singular or plural to match the new count"""
+    words = name.split(" ")
+    singular = singularize(words[-1])
+    if new_quantity <= 1:
+        words[-1] = singular
+    elif old_quantity <= 1 and words[-1] == singular and singular.isalpha():
+        if singular.endswith(("s", "x", "ch", "sh")):
+            words[-1] = singular + "es"
+        elif singular.endswith("y") and singular[-2:-1] not in "aeiou":
+            words[-1] = singular[:-1] + "ies"
+        else:
+            words[-1] = singular + "s"
+    return " ".join(words)
+
+
+def scale_ingredient(parsed, factor):
+    """One ingredient line for the ParsedIngredient multiplied by factor"""
+    if parsed.quantity is None or factor == 1:
+        return parsed.raw
+    quantity, unit = scale_amount(parsed.quantity, parsed.unit, factor)
+    quantity_max = None
+    if parsed.quantity_max is not None:
+        # Both ends of a range share the unit the upper end reads best in
+        quantity_max, unit_max = scale_amount(parsed.quantity_max, parsed.unit, factor)
+        if unit_max != unit:
+            unit = unit_max
+            quantity = round_in_unit(convert(parsed.quantity * factor, parsed.unit, unit), unit)
+        if quantity_max <= quantity:
+            quantity_max = None
+    name = parsed.name
+    if parsed.unit is None and name:
+        name = count_name(name, parsed.quantity_max or parsed.quantity, quantity_max or quantity)
+    return format_ingredient(parsed._replace(quantity=quantity, quantity_max=quantity_max, unit=unit, name=name))
+
+
+def scale_ingredients(ingredients, from_servings, to_servings):
+    """A recipe's ingredient lines rescaled from from_servings to to_servings"""
+    if not from_servings or from_servings == to_servings:
+        return list(ingredients)
+    factor = to_servings / from_servings
+    return [scale_ingredient(parsed, factor) for parsed in parse_ingredients(ingredients)]
+
+
+class ScaledRecipes:
+    """Memo of scaled ingredient lists keyed by (recipe ID, servings).
+
+    Entries remember the ingredients and base servings they were scaled from
+    and are recomputed if either changed. Least recently used entries go
+    first once capacity is reached.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, recipe_id, ingredients, from_servings, to_servings):
+        """Ingredient lines of the recipe scaled to to_servings"""
+        key = (recipe_id, to_servings)
+        source = (tuple(ingredients), from_servings)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == source:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        scaled = scale_ingredients(ingredients, from_servings, to_servings)
+        with self.lock:
+            self.entries[key] = (source, scaled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return scaled
+
+    def invalidate(self, recipe_id):
+        """Forget every scaled variant of a recipe"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == recipe_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
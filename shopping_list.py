@@ -0,0 +1,314 @@
+"""Aggregated shopping list across recipes.
+
+ShoppingList merges the ingredients of every recipe added to it into one
+list. Lines are parsed with ingredient_parser, so "2 onions" and "1 onion,
+diced" both count towards "onion". Amounts in compatible units are
+converted to a base unit (millilitres or grams) for the whole recipe in one
+numpy operation, and added to running totals with np.add.at. Removing a
+recipe subtracts its contributions the same way, so the list never has to be
+recomputed from scratch. add_recipe() and remove_recipe() return the
+ingredient keys whose line changed, so a view can update just those rows.
+
+Each ingredient is filed under a store section (Produce, Dairy & Eggs, ...)
+from a keyword table. The module has no Qt dependency.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from ingredient_parser import UNITS, format_quantity, parse_ingredients, unit_label
+
+# Units whose amounts are shown in metric when most contributions use them
+METRIC_UNITS = {"milliliter", "centiliter", "deciliter", "liter", "milligram", "gram", "kilogram"}
+
+# Unit -> index into UNIT_FACTORS; index 0 is "no unit"
+UNIT_NAMES = [None] + list(UNITS)
+UNIT_INDEX = {unit: index for index, unit in enumerate(UNIT_NAMES)}
+UNIT_FACTORS = np.array([1.0] + [UNITS[unit][1] for unit in UNITS])
+UNIT_IS_METRIC = np.array([False] + [unit in METRIC_UNITS for unit in UNITS])
+
+SECTION_ORDER = ["Produce", "Meat & Seafood", "Dairy & Eggs", "Bakery", "Pantry",
+                 "Spices & Seasonings", "Frozen", "Beverages", "Other"]
+
+SECTION_KEYWORDS = {
+    # A bare "pepper" is the spice; fresh peppers are matched by their longer names
+    "Produce": ["onion", "garlic", "carrot", "celery", "potato", "tomato", "bell pepper", "sweet pepper",
+                "red pepper", "green pepper", "yellow pepper", "chili pepper", "hot pepper",
+                "jalapeno pepper", "poblano pepper", "jalapeno", "poblano",
+                "zucchini", "eggplant", "mushroom", "spinach", "kale", "cabbage", "broccoli",
+                "cauliflower", "bean sprout", "green bean", "pea", "corn", "lemon", "lime",
+                "orange", "apple", "banana", "berry", "strawberry", "blueberry", "raspberry",
+                "avocado", "cucumber", "lettuce", "arugula", "cilantro", "parsley", "basil",
+                "mint", "dill", "chive", "scallion", "green onion", "shallot", "leek", "ginger",
+                "squash", "pumpkin", "asparagus", "radish", "beet", "grape", "mango", "pineapple",
+                "peach", "pear", "herb", "chili", "fruit", "vegetable", "greens", "sprout"],
+    "Meat & Seafood": ["chicken", "beef", "pork", "lamb", "turkey", "bacon", "sausage", "ham",
+                       "steak", "salmon", "tuna", "shrimp", "fish", "cod", "tilapia", "crab",
+                       "prosciutto", "chorizo", "meat", "mince", "breast", "thigh", "fillet"],
+    "Dairy & Eggs": ["milk", "butter", "cream", "cheese", "cheddar", "parmesan", "mozzarella",
+                     "feta", "yogurt", "egg", "sour cream", "buttermilk", "ricotta", "ghee"],
+    "Bakery": ["bread", "bun", "roll", "tortilla", "pita", "baguette", "croissant", "naan"],
+    "Pantry": ["flour", "sugar", "rice", "pasta", "spaghetti", "noodle", "quinoa", "oat", "oil",
+               "vinegar", "sauce", "stock", "broth", "honey", "syrup", "bean", "chickpea",
+               "lentil", "nut", "almond", "walnut", "peanut", "cornstarch", "baking powder",
+               "baking soda", "yeast", "chocolate", "cocoa", "extract", "vanilla", "coconut milk",
+               "tomato paste", "canned", "crumb", "cracker", "mustard", "ketchup", "mayonnaise",
+               "jam", "peanut butter", "tahini", "breadcrumb", "cereal", "couscous"],
+    "Spices & Seasonings": ["salt", "pepper", "paprika", "cumin", "oregano", "thyme", "rosemary",
+                            "cinnamon", "nutmeg", "turmeric", "chili flake", "chili powder",
+                            "pepper flake", "peppercorn", "curry", "clove", "bay leaf", "cardamom", "coriander", "spice",
+                            "seasoning", "allspice", "sage", "cayenne", "garam masala"],
+    "Frozen": ["frozen", "ice cream", "ice"],
+    "Beverages": ["water", "wine", "beer", "juice", "coffee", "tea", "soda"]
+}
+
+# A keyword listed under two sections belongs to the first
+SECTION_LOOKUP = {}
+for section, keywords in SECTION_KEYWORDS.items():
+    for keyword in keywords:
+        SECTION_LOOKUP.setdefault(keyword, section)
+
+ShoppingItem = namedtuple("ShoppingItem", ["key", "name", "section", "amount", "recipes"])
+
+_section_cache = {}
+
+
+def section_for(key):
+    """Store section for an ingredient key, by the most specific keyword it contains"""
+    section = _section_cache.get(key)
+    if section is not None:
+        return section
+
+    words = key.split()
+    candidates = [key]
+    # Longer phrases first: "peanut butter" before "butter", "bell pepper" before "pepper"
+    for length in range(len(words) - 1, 0, -1):
+        for start in range(len(words) - length, -1, -1):
+            candidates.append(" ".join(words[start:start + length]))
+    section = next((SECTION_LOOKUP[candidate] for candidate in candidates
+                    if candidate in SECTION_LOOKUP), "Other")
+    _section_cache[key] = section
+    return section
+
+
+def merge_group(parsed):
+    """Rows merge when they have the same ingredient key and group.
+
+    Volumes and masses convert within their dimension; other units ("clove",
+    "can") only add to themselves; plain counts add to counts.
+    """
+    if parsed.quantity is None:
+        return "unquantified"
+    if parsed.unit is None:
+        return "count"
+    return UNITS[parsed.unit][0] or parsed.unit
+
+
+def format_amount(group, total, total_max, metric):
+    """Human-readable amount for a row total in base units"""
+    if group == "unquantified":
+        return ""
+
+    def scaled(factor, unit_text):
+        text = format_quantity(total / factor)
+        if total_max > total + 1e-9:
+            text += "-" + format_quantity(total_max / factor)
+        return f"{text} {unit_text}".strip()
+
+    if group == "volume":
+        if metric:
+            return scaled(1000.0, "l") if total >= 1000 else scaled(1.0, "ml")
+        teaspoons = total / UNITS["teaspoon"][1]
+        if teaspoons < 3:
+            return scaled(UNITS["teaspoon"][1], "tsp")
+        cups = total / UNITS["cup"][1]
+        # Tablespoons read better than odd cup fractions ("5 tbsp", not "0.31 cup")
+        if teaspoons < 12 or (teaspoons < 48 and abs(cups * 8 - round(cups * 8)) > 1e-6):
+            return scaled(UNITS["tablespoon"][1], "tbsp")
+        return scaled(UNITS["cup"][1], "cup" if cups <= 1 else "cups")
+    if group == "mass":
+        if metric:
+            return scaled(1000.0, "kg") if total >= 1000 else scaled(1.0, "g")
+        if total < UNITS["pound"][1]:
+            return scaled(UNITS["ounce"][1], "oz")
+        return scaled(UNITS["pound"][1], "lb")
+    if group == "count":
+        return scaled(1.0, "")
+    return scaled(1.0, unit_label(group, total_max))
+
+
+class ShoppingList:
+    """Running totals of ingredients over a set of recipes.
+
+    Totals live in numpy arrays with one row per (ingredient key, merge
+    group); rows of removed ingredients are recycled.
+    """
+
+    def __init__(self, capacity=64):
+        self.recipes = {}  # recipe ID -> name
+        self.contributions = {}  # recipe ID -> (rows, amounts, amounts_max, metric)
+        self.row_index = {}  # (key, group) -> row
+        self.row_keys = {}  # row -> (key, group)
+        self.item_rows = {}  # key -> {row: None}, in insertion order
+        self.item_names = {}  # key -> display name
+        self.item_recipes = {}  # key -> {recipe ID: contributions}
+        self.free_rows = []
+
+        self.totals = np.zeros(capacity)
+        self.totals_max = np.zeros(capacity)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.metric_counts = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.item_rows)
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.recipes
+
+    def row_for(self, key, group):
+        row = self.row_index.get((key, group))
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = len(self.row_index)
+                if row >= len(self.totals):
+                    self.grow()
+            self.row_index[(key, group)] = row
+            self.row_keys[row] = (key, group)
+            self.item_rows.setdefault(key, {})[row] = None
+        return row
+
+    def grow(self):
+        size = len(self.totals) * 2
+        for name in ("totals", "totals_max", "counts", "metric_counts"):
+            array = getattr(self, name)
+            grown = np.zeros(size, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add_recipe(self, recipe_id, recipe_name, ingredients, scale=1.0):
+        """Add (or replace) a recipe's ingredients; returns the changed ingredient keys"""
+        changed = self.remove_recipe(recipe_id) if recipe_id in self.recipes else set()
+
+        parsed = [item for item in parse_ingredients(ingredients) if item.key]
+        if not parsed:
+            self.recipes[recipe_id] = recipe_name
+            self.contributions[recipe_id] = (np.zeros(0, dtype=np.int64),) + (np.zeros(0),) * 2 + (
+                np.zeros(0, dtype=bool),)
+            return changed
+
+        # Convert the whole recipe to base units at once
+        unit_indices = np.fromiter((UNIT_INDEX[item.unit] for item in parsed), dtype=np.int64,
+                                   count=len(parsed))
+        quantities = np.array([item.quantity if item.quantity is not None else 0.0 for item in parsed])
+        maxima = np.array([item.quantity_max if item.quantity_max is not None else
+                           (item.quantity if item.quantity is not None else 0.0) for item in parsed])
+        factors = UNIT_FACTORS[unit_indices] * scale
+        amounts = quantities * factors
+        amounts_max = maxima * factors
+        metric = UNIT_IS_METRIC[unit_indices]
+
+        rows = np.fromiter((self.row_for(item.key, merge_group(item)) for item in parsed),
+                           dtype=np.int64, count=len(parsed))
+        np.add.at(self.totals, rows, amounts)
+        np.add.at(self.totals_max, rows, amounts_max)
+        np.add.at(self.counts, rows, 1)
+        np.add.at(self.metric_counts, rows, metric)
+
+        self.recipes[recipe_id] = recipe_name
+        self.contributions[recipe_id] = (rows, amounts, amounts_max, metric)
+        for item in parsed:
+            self.item_names.setdefault(item.key, item.key)
+            uses = self.item_recipes.setdefault(item.key, {})
+            uses[recipe_id] = uses.get(recipe_id, 0) + 1
+            changed.add(item.key)
+        return changed
+
+    def remove_recipe(self, recipe_id):
+        """Take a recipe's ingredients off the list; returns the changed ingredient keys"""
+        if recipe_id not in self.recipes:
+            return set()
+        del self.recipes[recipe_id]
+        rows, amounts, amounts_max, metric = self.contributions.pop(recipe_id)
+
+        np.subtract.at(self.totals, rows, amounts)
+        np.subtract.at(self.totals_max, rows, amounts_max)
+        np.subtract.at(self.counts, rows, 1)
+        np.subtract.at(self.metric_counts, rows, metric)
+
+        changed = set()
+        for row in np.unique(rows):
+            row = int(row)
+            key, group = self.row_keys[row]
+            changed.add(key)
+            self.item_recipes.get(key, {}).pop(recipe_id, None)
+            if self.counts[row] == 0:
+                self.release_row(row)
+        return changed
+
+    def release_row(self, row):
+        key, group = self.row_keys.pop(row)
+        del self.row_index[(key, group)]
+        # Clear rounding residue so the row starts clean when reused
+        self.totals[row] = self.totals_max[row] = 0.0
+        self.metric_counts[row] = 0
+        self.free_rows.append(row)
+
+        rows = self.item_rows[key]
+        del rows[row]
+        if not rows:
+            del self.item_rows[key]
+            self.item_names.pop(key, None)
+            self.item_recipes.pop(key, None)
+
+    def clear(self):
+        self.__init__(len(self.totals))
+
+    def item(self, key):
+        """Return the ShoppingItem for an ingredient key, or None if it's not on the list"""
+        rows = self.item_rows.get(key)
+        if not rows:
+            return None
+        amounts = []
+        for row in rows:
+            group = self.row_keys[row][1]
+            metric = self.metric_counts[row] * 2 > self.counts[row]
+            amount = format_amount(group, float(self.totals[row]), float(self.totals_max[row]), metric)
+            if amount:
+                amounts.append(amount)
+        recipes = [self.recipes[recipe_id] for recipe_id in self.item_recipes.get(key, {})]
+        return ShoppingItem(key, self.item_names[key], section_for(key), " + ".join(amounts), recipes)
+
+    def items(self):
+        """Every item, ordered by store section and then name"""
+        items = [self.item(key) for key in self.item_rows]
+        return sorted(items, key=lambda item: (SECTION_ORDER.index(item.section), item.name))
+
+    def sections(self):
+        """Return [(section, [items])] in store order, skipping empty sections"""
+        grouped = {}
+        for item in self.items():
+            grouped.setdefault(item.section, []).append(item)
+        return [(section, grouped[section]) for section in SECTION_ORDER if section in grouped]
+
+    def export_text(self, checked=()):
+        """Plain-text list grouped by section; keys in checked are ticked"""
+        lines = ["SHOPPING LIST", "=============", ""]
+        if self.recipes:
+            lines.append("For: " + ", ".join(self.recipes.values()))
+            lines.append("")
+        for section, items in self.sections():
+            lines.append(section)
+            lines.append("-" * len(section))
+            for item in items:
+                status = "[x]" if item.key in checked else "[ ]"
+                lines.append(f"{status} {item_label(item)}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def item_label(item):
+    """One-line text for a shopping item: "Onion: 3" """
+    name = item.name[:1].upper() + item.name[1:]
+    return f"{name}: {item.amount}" if item.amount else name
@@ -0,0 +1,437 @@
+"""TF-IDF index of saved recipes for "more like this" recommendations.
+
+Each recipe becomes a sparse vector of terms from its name, ingredient keys
+and instructions (name and ingredient terms count extra), each weighted
+1 + log(count). Two recipes are compared by cosine similarity under IDF
+weights taken from the current document frequencies:
+
+    score(q, d) = sum_t idf_t^2 * q_t * d_t / (|q| * |d|)
+
+The vectors are stored twice: doc-major (CSR rows per recipe, so a stored
+recipe's vector can be read back as a query) and term-major (postings: the
+recipes using each term, with their weights). A query reads the postings of
+the recipe's most distinctive terms only, scatter-adds them into one score
+per recipe and takes the top k with argpartition.
+
+compact() writes the index as .npy files that open() maps into memory, so
+startup reads a vocabulary instead of re-tokenizing the library. Recipes
+added since then live in a small in-memory delta segment, and removals in a
+tombstone mask, until the next compaction folds them in. A saved index is
+kept beside its database (index_directory()) and records the identity of
+the library it was built from; an index of another library is never
+opened, since recipe IDs would collide. The module has no Qt dependency.
+"""
+import glob
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from ingredient_parser import parse_ingredients, singularize
+
+SIMILARITY_INDEX_DIR = "similarity_index"  # Default for indexes not tied to a database
+# Bump when tokenization or the file layout changes; older indexes are rebuilt
+INDEX_FORMAT = 1
+
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+INSTRUCTION_WEIGHT = 1
+# Query terms scored, most distinctive first; the rest are common words that barely move the ranking
+QUERY_TERMS = 32
+# Delta segment size at which the app compacts in the background
+COMPACT_EVERY = 500
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+STOPWORDS = {
+    "the", "and", "for", "with", "into", "onto", "until", "from", "then", "that", "this", "your",
+    "you", "are", "about", "over", "each", "some", "more", "any", "all", "add", "use", "using",
+    "minute", "minutes", "hour", "hours", "place", "make", "set", "aside", "together", "well",
+    "large", "small", "medium", "cup", "cups", "tablespoon", "teaspoon", "tbsp", "tsp", "them",
+    "it", "its", "let", "put", "remove", "serve", "serving", "when", "while", "after", "before",
+    "through", "until", "out", "off", "other", "remaining", "half", "one", "two", "three"
+}
+
+ARRAY_NAMES = ["ids", "norms", "doc_indptr", "doc_terms", "doc_weights",
+               "term_indptr", "term_rows", "term_weights"]
+# Read-only arrays opened memory-mapped; ids and norms are copied since they grow
+MAPPED_ARRAYS = {"doc_indptr", "doc_terms", "doc_weights", "term_indptr", "term_rows", "term_weights"}
+
+SimilarRecipe = namedtuple("SimilarRecipe", ["recipe_id", "score"])
+
+
+def index_directory(database_path):
+    """Directory the index of a database is saved in: "recipes.db" -> "recipes_similarity_index" """
+    return f"{os.path.splitext(database_path)[0]}_{SIMILARITY_INDEX_DIR}"
+
+
+def tokens(text):
+    """Lower-case, singular content words of a piece of text"""
+    return [singularize(word) for word in TOKEN_PATTERN.findall(text.lower())
+            if len(word) > 2 and word not in STOPWORDS]
+
+
+def recipe_terms(name, ingredients, instructions):
+    """Weighted term counts of a recipe"""
+    counts = Counter()
+    for word in tokens(name or ""):
+        counts[word] += NAME_WEIGHT
+    for parsed in parse_ingredients(ingredients):
+        if parsed.key:
+            for word in tokens(parsed.key):
+                counts[word] += INGREDIENT_WEIGHT
+    for step in instructions:
+        for word in tokens(str(step)):
+            counts[word] += INSTRUCTION_WEIGHT
+    return counts
+
+
+def idf(df, count):
+    """Smoothed inverse document frequency"""
+    return np.log((1.0 + count) / (1.0 + df)) + 1.0
+
+
+def index_arrays(ids, entry_rows, entry_terms, entry_weights, vocabulary_size):
+    """Doc-major and term-major arrays for (row, term, weight) entries sorted by row"""
+    count = len(ids)
+    df = np.bincount(entry_terms, minlength=vocabulary_size)
+    scaled = idf(df, count)[entry_terms] * entry_weights
+    norms = np.sqrt(np.bincount(entry_rows, weights=scaled * scaled, minlength=count))
+
+    doc_indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entry_rows, minlength=count), out=doc_indptr[1:])
+    order = np.argsort(entry_terms, kind="stable")
+    term_indptr = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(df, out=term_indptr[1:])
+    return {
+        "ids": np.asarray(ids, dtype=np.int64),
+        "norms": norms.astype(np.float32),
+        "doc_indptr": doc_indptr,
+        "doc_terms": entry_terms.astype(np.int32),
+        "doc_weights": entry_weights.astype(np.float32),
+        "term_indptr": term_indptr,
+        "term_rows": entry_rows[order].astype(np.int32),
+        "term_weights": entry_weights[order].astype(np.float32)
+    }
+
+
+class SimilarityIndex:
+    """Sparse TF-IDF vectors of every saved recipe, queried for nearest neighbours"""
+
+    def __init__(self, identity=None):
+        # Identity of the library indexed (e.g. its random ID), saved with the index and checked on reading
+        self.identity = identity
+        self.lock = threading.Lock()
+        # Held for the whole of sync() and compact(), which rebuild the base segment
+        self.maintenance = threading.Lock()
+        self.ready = False
+        self.log = None  # Changes made while a rebuild runs, replayed on top of it
+        self.install(index_arrays([], np.zeros(0, np.int64), np.zeros(0, np.int64),
+                                  np.zeros(0, np.float32), 0), [])
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @property
+    def delta_size(self):
+        return len(self.delta_ids)
+
+    def install(self, arrays, terms):
+        """Replace the index with a compacted base segment and an empty delta"""
+        self.base = arrays
+        self.terms = list(terms)
+        self.vocabulary = {term: column for column, term in enumerate(self.terms)}
+        self.base_rows = len(arrays["ids"])
+        self.base_terms = len(arrays["term_indptr"]) - 1
+
+        capacity = max(self.base_rows + COMPACT_EVERY, 64)
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.ids[:self.base_rows] = arrays["ids"]
+        self.norms = np.ones(capacity, dtype=np.float32)
+        self.norms[:self.base_rows] = arrays["norms"]
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.alive[:self.base_rows] = True
+        self.df = np.zeros(max(len(self.terms), 64), dtype=np.int64)
+        self.df[:self.base_terms] = np.diff(arrays["term_indptr"])
+        self.row_of = {int(recipe_id): row for row, recipe_id in enumerate(self.ids[:self.base_rows])}
+
+        self.delta_ids = []
+        self.delta_vectors = []
+        self.delta_postings = {}  # column -> ([rows], [weights])
+
+    def vector(self, row):
+        """(columns, weights) of a stored row"""
+        if row < self.base_rows:
+            start, end = self.base["doc_indptr"][row:row + 2]
+            return self.base["doc_terms"][start:end], self.base["doc_weights"][start:end]
+        return self.delta_vectors[row - self.base_rows]
+
+    def add_recipe(self, recipe_id, terms):
+        """Index (or re-index) a recipe from its recipe_terms()"""
+        with self.lock:
+            self.apply(recipe_id, terms)
+            if self.log is not None:
+                self.log.append((recipe_id, terms))
+
+    def remove_recipe(self, recipe_id):
+        with self.lock:
+            self.apply(recipe_id, None)
+            if self.log is not None:
+                self.log.append((recipe_id, None))
+
+    def apply(self, recipe_id, terms):
+        """Add, replace (terms) or remove (None) one recipe; the caller holds the lock"""
+        row = self.row_of.pop(recipe_id, None)
+        if row is not None:
+            columns, _ = self.vector(row)
+            self.df[columns] -= 1
+            self.alive[row] = False
+        if not terms:
+            return
+
+        for term in terms:
+            if term not in self.vocabulary:
+                self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+        if len(self.terms) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.df), dtype=np.int64)])
+        columns = np.fromiter((self.vocabulary[term] for term in terms), dtype=np.int32, count=len(terms))
+        weights = np.array([1.0 + math.log(count) for count in terms.values()], dtype=np.float32)
+        self.df[columns] += 1
+
+        row = self.base_rows + len(self.delta_ids)
+        if row >= len(self.ids):
+            grow = len(self.ids)
+            self.ids = np.concatenate([self.ids, np.full(grow, -1, dtype=np.int64)])
+            self.norms = np.concatenate([self.norms, np.ones(grow, dtype=np.float32)])
+            self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+        self.delta_ids.append(recipe_id)
+        self.delta_vectors.append((columns, weights))
+        for column, weight in zip(columns.tolist(), weights.tolist()):
+            rows, column_weights = self.delta_postings.setdefault(column, ([], []))
+            rows.append(row)
+            column_weights.append(weight)
+
+        scaled = idf(self.df[columns], len(self.row_of) + 1) * weights
+        self.ids[row] = recipe_id
+        self.norms[row] = max(float(np.sqrt(np.dot(scaled, scaled))), 1e-6)
+        self.alive[row] = True
+        self.row_of[recipe_id] = row
+
+    def similar(self, recipe_id, limit=8):
+        """Stored recipes most like a stored recipe, best first"""
+        with self.lock:
+            row = self.row_of.get(recipe_id)
+            if row is None:
+                return []
+            columns, weights = self.vector(row)
+            return self.query(np.asarray(columns), np.asarray(weights), row, limit)
+
+    def similar_to_terms(self, terms, limit=8):
+        """Stored recipes most like an unsaved recipe's recipe_terms()"""
+        with self.lock:
+            known = [(self.vocabulary[term], count) for term, count in terms.items() if term in self.vocabulary]
+            if not known:
+                return []
+            columns = np.array([column for column, _ in known], dtype=np.int64)
+            weights = np.array([1.0 + math.log(count) for _, count in known], dtype=np.float32)
+            return self.query(columns, weights, None, limit)
+
+    def query(self, columns, weights, exclude_row, limit):
+        """Cosine top-k for a query vector; the caller holds the lock"""
+        rows = self.base_rows + len(self.delta_ids)
+        query_idf = idf(self.df[columns], len(self.row_of))
+        scaled = weights * query_idf
+        query_norm = float(np.sqrt(np.dot(scaled, scaled)))
+        if not rows or not query_norm:
+            return []
+
+        # Only the most distinctive terms; common ones touch many postings for little effect
+        if len(columns) > QUERY_TERMS:
+            keep = np.argpartition(-scaled, QUERY_TERMS - 1)[:QUERY_TERMS]
+            columns, scaled, query_idf = columns[keep], scaled[keep], query_idf[keep]
+
+        scores = np.zeros(rows, dtype=np.float32)
+        term_indptr = self.base["term_indptr"]
+        for column, coefficient in zip(columns.tolist(), (scaled * query_idf).tolist()):
+            if column < self.base_terms:
+                start, end = term_indptr[column], term_indptr[column + 1]
+                scores[self.base["term_rows"][start:end]] += coefficient * self.base["term_weights"][start:end]
+            if column in self.delta_postings:
+                delta_rows, delta_weights = self.delta_postings[column]
+                scores[delta_rows] += coefficient * np.array(delta_weights, dtype=np.float32)
+
+        scores /= self.norms[:rows] * query_norm
+        scores[~self.alive[:rows]] = 0.0
+        if exclude_row is not None:
+            scores[exclude_row] = 0.0
+
+        limit = min(limit, rows)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [SimilarRecipe(int(self.ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+    def build(self, records):
+        """Replace the index with [(recipe ID, recipe_terms())]"""
+        vocabulary = {}
+        ids, entry_rows, entry_terms, entry_weights = [], [], [], []
+        for row, (recipe_id, terms) in enumerate(records):
+            ids.append(recipe_id)
+            for term, count in terms.items():
+                entry_rows.append(row)
+                entry_terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                entry_weights.append(1.0 + math.log(count))
+        arrays = index_arrays(ids, np.array(entry_rows, dtype=np.int64), np.array(entry_terms, dtype=np.int64),
+                              np.array(entry_weights, dtype=np.float32), len(vocabulary))
+        with self.lock:
+            self.install(arrays, vocabulary)
+
+    def merged_arrays(self):
+        """Base and delta segments folded together without removed rows; the caller holds the lock"""
+        base_entry_rows = np.repeat(np.arange(self.base_rows), np.diff(self.base["doc_indptr"]))
+        keep = self.alive[base_entry_rows]
+        rows = [base_entry_rows[keep]]
+        columns = [np.asarray(self.base["doc_terms"])[keep]]
+        weights = [np.asarray(self.base["doc_weights"])[keep]]
+        for offset, (delta_columns, delta_weights) in enumerate(self.delta_vectors):
+            if self.alive[self.base_rows + offset]:
+                rows.append(np.full(len(delta_columns), self.base_rows + offset))
+                columns.append(delta_columns)
+                weights.append(delta_weights)
+
+        # Renumber the surviving rows 0..n-1
+        total = self.base_rows + len(self.delta_ids)
+        alive = self.alive[:total]
+        new_row = np.cumsum(alive) - 1
+        return index_arrays(self.ids[:total][alive], new_row[np.concatenate(rows)],
+                            np.concatenate(columns).astype(np.int64), np.concatenate(weights),
+                            len(self.terms))
+
+    def compact(self, directory=SIMILARITY_INDEX_DIR):
+        """Fold the delta into a new base segment, write it to directory and map it back in"""
+        with self.maintenance:
+            with self.lock:
+                arrays = self.merged_arrays()
+                terms = list(self.terms)
+                self.log = []
+            try:
+                self.write(directory, arrays, terms)
+                arrays, terms = self.read(directory)
+            finally:
+                with self.lock:
+                    log, self.log = self.log, None
+                    self.install(arrays, terms)
+                    for recipe_id, recipe_terms in log:
+                        self.apply(recipe_id, recipe_terms)
+
+    def open(self, directory=SIMILARITY_INDEX_DIR):
+        """Map a compacted index from directory; False if there is none usable"""
+        try:
+            arrays, terms = self.read(directory)
+        except (OSError, ValueError, KeyError):
+            return False
+        with self.lock:
+            self.install(arrays, terms)
+        return True
+
+    def sync(self, conn, directory=SIMILARITY_INDEX_DIR):
+        """Open the saved index and catch it up with the recipes table, or build it from scratch.
+
+        Safe to run on a worker thread with its own connection; recipes
+        added or removed meanwhile are replayed on top.
+        """
+        with self.maintenance:
+            with self.lock:
+                self.log = []
+            try:
+                opened = self.open(directory)
+                with self.lock:
+                    indexed = set(self.row_of) if opened else set()
+                stored = {recipe_id for (recipe_id,) in conn.execute("SELECT id FROM recipes")}
+                missing = stored - indexed
+
+                records = []
+                if missing:
+                    for recipe_id, name, ingredients_json, instructions_json in conn.execute(
+                            "SELECT id, name, ingredients, instructions FROM recipes"):
+                        if recipe_id not in missing:
+                            continue
+                        try:
+                            records.append((recipe_id, recipe_terms(name, json.loads(ingredients_json),
+                                                                    json.loads(instructions_json))))
+                        except ValueError:
+                            continue  # Unreadable rows just don't get recommendations
+
+                if opened:
+                    with self.lock:
+                        for recipe_id in indexed - stored:
+                            self.apply(recipe_id, None)
+                        for recipe_id, terms in records:
+                            self.apply(recipe_id, terms)
+                else:
+                    self.build(records)
+            finally:
+                with self.lock:
+                    log, self.log = self.log, None
+                    for recipe_id, terms in log:
+                        self.apply(recipe_id, terms)
+                    self.ready = True
+
+        # A fresh build, or a long catch-up, is worth saving so the next start maps it
+        if not opened or self.delta_size >= COMPACT_EVERY or len(indexed - stored) >= COMPACT_EVERY:
+            self.compact(directory)
+
+    def write(self, directory, arrays, terms):
+        """Save arrays and vocabulary as a new generation, then switch meta.json to it"""
+        os.makedirs(directory, exist_ok=True)
+        generation = self.read_meta(directory).get("generation", 0) + 1
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}-{generation}.npy"), arrays[name])
+        with open(os.path.join(directory, f"vocabulary-{generation}.json"), "w", encoding="utf-8") as file:
+            json.dump(terms, file)
+
+        # Readers only ever follow meta.json, so they see the old generation or the new one
+        temp_path = os.path.join(directory, "meta.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"format": INDEX_FORMAT, "generation": generation, "recipes": len(arrays["ids"]),
+                       "library": self.identity}, file)
+        os.replace(temp_path, os.path.join(directory, "meta.json"))
+
+    def read(self, directory):
+        """Arrays (memory-mapped where read-only) and vocabulary of the current generation"""
+        meta = self.read_meta(directory)
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError("No similarity index in the current format")
+        if meta.get("library") != self.identity:
+            raise ValueError("The similarity index belongs to another library")
+        generation = meta["generation"]
+        arrays = {}
+        for name in ARRAY_NAMES:
+            path = os.path.join(directory, f"{name}-{generation}.npy")
+            arrays[name] = np.load(path, mmap_mode="r") if name in MAPPED_ARRAYS else np.load(path)
+        with open(os.path.join(directory, f"vocabulary-{generation}.json"), encoding="utf-8") as file:
+            terms = json.load(file)
+        self.remove_old_generations(directory, generation)
+        return arrays, terms
+
+    @staticmethod
+    def read_meta(directory):
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def remove_old_generations(directory, generation):
+        """Delete files of earlier generations (still-mapped ones are retried next time)"""
+        for path in glob.glob(os.path.join(directory, "*-*.*")):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if stem.rsplit("-", 1)[-1] != str(generation):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
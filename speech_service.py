@@ -0,0 +1,492 @@
+"""Long-lived speech recognition session for voice input.
+
+SpeechService keeps one recognizer and one worker thread for the life of
+the app. Ambient noise is calibrated on first use only; later requests start
+listening straight away with the cached energy threshold. Every captured
+phrase starts with a short stretch of background noise, which the service
+measures once the result has been delivered. If that noise floor has drifted
+from the calibrated one, the threshold is recalibrated from the captured
+audio, so the microphone is never held open for calibration again.
+
+Besides single phrases, the service can capture continuously: a voice
+activity detector cuts the audio stream into phrases, and a second thread
+recognizes each phrase while the next one is being captured.
+
+Recognition goes through a RecognizerBackend. Google's web API is the
+default; Sphinx and Whisper run offline when their packages are installed.
+
+Audio comes from a source factory. microphone_source is the default;
+audio_file_source(path) reads a WAV/AIFF/FLAC file instead, so the service
+can be exercised without a microphone.
+"""
+import math
+import queue
+import sys
+import threading
+from array import array
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+CALIBRATION_SECONDS = 1.0
+NOISE_SAMPLE_SECONDS = 0.25  # Leading audio measured for the noise floor
+NOISE_CHUNK_SECONDS = 0.05
+DRIFT_RATIO = 2.0  # Recalibrate when the floor moves by more than this factor
+MIN_ENERGY_THRESHOLD = 50
+
+
+def microphone_source(sr):
+    """Open the default microphone"""
+    return sr.Microphone()
+
+
+def audio_file_source(path):
+    """Return a source factory that reads audio from a file instead of a microphone"""
+    return lambda sr: sr.AudioFile(path)
+
+
+class RecognizerBackend:
+    """Turns a captured phrase (sr.AudioData) into text"""
+    name = "base"
+    label = "Base"
+    offline = False
+
+    def recognize(self, recognizer, audio):
+        """Return the text, or raise sr.UnknownValueError / sr.RequestError"""
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google's free web speech API; needs a network round trip per phrase"""
+    name = "google"
+    label = "Google (online)"
+
+    def recognize(self, recognizer, audio):
+        return recognizer.recognize_google(audio)
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU Sphinx through pocketsphinx; runs offline"""
+    name = "sphinx"
+    label = "Sphinx (offline)"
+    offline = True
+
+    def recognize(self, recognizer, audio):
+        return recognizer.recognize_sphinx(audio)
+
+
+class WhisperBackend(RecognizerBackend):
+    """A local Whisper model through faster-whisper; runs offline.
+
+    The model is loaded on first use and kept, unlike
+    Recognizer.recognize_faster_whisper, which loads it on every call.
+    """
+    name = "whisper"
+    label = "Whisper (offline)"
+    offline = True
+
+    def __init__(self, model_size="base", language="en"):
+        self.model_size = model_size
+        self.language = language
+        self.model = None
+
+    def recognize(self, recognizer, audio):
+        import numpy as np
+        import speech_recognition as sr
+
+        if self.model is None:
+            from faster_whisper import WhisperModel
+            self.model = WhisperModel(self.model_size, device="cpu", compute_type="int8")
+
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(samples, language=self.language, beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+# Available backends by name
+SPEECH_BACKENDS = {
+    backend.name: backend for backend in (GoogleBackend, SphinxBackend, WhisperBackend)
+}
+
+
+def create_speech_backend(name):
+    """Instantiate a backend by name, falling back to Google for unknown names"""
+    return SPEECH_BACKENDS.get(name, GoogleBackend)()
+
+
+def rms(samples):
+    """Root mean square of 16-bit samples"""
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+def pcm16_samples(raw):
+    """Little-endian 16-bit PCM bytes as an array of ints"""
+    samples = array("h")
+    samples.frombytes(raw[:len(raw) - len(raw) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples
+
+
+def width_scale(sample_width):
+    """Factor from 16-bit energy to the energy of sample_width-byte audio"""
+    return 2.0 ** (8 * (sample_width - 2))
+
+
+def noise_floor(audio, seconds=NOISE_SAMPLE_SECONDS):
+    """Estimate the background energy from the start of a captured phrase.
+
+    listen() keeps a little audio from before the phrase started, so the
+    first moments are background noise. The median RMS over short chunks
+    ignores the odd click or the onset of speech. Returns None if the
+    recording is too short to tell.
+    """
+    raw = audio.get_raw_data(convert_width=2)
+    samples = pcm16_samples(raw[:int(audio.sample_rate * seconds) * 2])
+
+    chunk = max(1, int(audio.sample_rate * NOISE_CHUNK_SECONDS))
+    energies = [rms(samples[start:start + chunk])
+                for start in range(0, len(samples) - chunk + 1, chunk)]
+    if len(energies) < 2:
+        return None
+
+    # Match the scale of the recognizer's energy threshold (native sample width)
+    energies.sort()
+    return energies[len(energies) // 2] * width_scale(audio.sample_width)
+
+
+class VoiceActivityDetector:
+    """Splits a stream of 16-bit PCM into phrases by frame energy.
+
+    A phrase starts when a frame's energy rises above the threshold and ends
+    after pause_seconds of quiet. Each phrase keeps pre_roll_seconds of the
+    audio before it, so soft onsets aren't clipped, and is cut at
+    max_phrase_seconds. Blips shorter than min_phrase_seconds are dropped.
+    While nobody is speaking the noise floor follows the background slowly,
+    so the threshold keeps up with a room that gets louder or quieter.
+    """
+
+    def __init__(self, sample_rate, noise_floor, speech_ratio=1.5, frame_seconds=0.03,
+                 pause_seconds=0.6, pre_roll_seconds=0.3, min_phrase_seconds=0.25,
+                 max_phrase_seconds=10.0, floor_adaptation=0.02):
+        self.sample_rate = sample_rate
+        self.noise_floor = noise_floor  # 16-bit RMS
+        self.speech_ratio = speech_ratio
+        self.frame_samples = max(1, int(sample_rate * frame_seconds))
+        self.pause_frames = max(1, round(pause_seconds / frame_seconds))
+        self.pre_roll_frames = round(pre_roll_seconds / frame_seconds)
+        self.min_phrase_frames = max(1, round(min_phrase_seconds / frame_seconds))
+        self.max_phrase_frames = max(1, round(max_phrase_seconds / frame_seconds))
+        self.floor_adaptation = floor_adaptation
+
+        self.pending = array("h")  # Samples not yet making up a whole frame
+        self.pre_roll = []
+        self.phrase = None  # Frames of the phrase in progress
+        self.voiced_frames = 0
+        self.quiet_frames = 0
+
+    @property
+    def threshold(self):
+        return max(self.noise_floor * self.speech_ratio, MIN_ENERGY_THRESHOLD)
+
+    def feed(self, samples):
+        """Process samples and return the phrases completed by them, as PCM bytes"""
+        self.pending.extend(samples)
+        frame_samples = self.frame_samples
+        whole = len(self.pending) - len(self.pending) % frame_samples
+        phrases = []
+
+        for start in range(0, whole, frame_samples):
+            frame = self.pending[start:start + frame_samples]
+            phrase = self.process_frame(frame, rms(frame))
+            if phrase is not None:
+                phrases.append(phrase)
+
+        del self.pending[:whole]
+        return phrases
+
+    def process_frame(self, frame, energy):
+        voiced = energy > self.threshold
+
+        if self.phrase is None:
+            if voiced:
+                self.phrase = self.pre_roll + [frame]
+                self.pre_roll = []
+                self.voiced_frames = 1
+                self.quiet_frames = 0
+                return None
+            # Background only: remember it for pre-roll and track the floor
+            self.pre_roll.append(frame)
+            if len(self.pre_roll) > self.pre_roll_frames:
+                del self.pre_roll[0]
+            self.noise_floor += (energy - self.noise_floor) * self.floor_adaptation
+            return None
+
+        self.phrase.append(frame)
+        if voiced:
+            self.voiced_frames += 1
+            self.quiet_frames = 0
+        else:
+            self.quiet_frames += 1
+
+        if self.quiet_frames >= self.pause_frames or len(self.phrase) >= self.max_phrase_frames:
+            return self.finish_phrase()
+        return None
+
+    def finish_phrase(self):
+        phrase, voiced_frames = self.phrase, self.voiced_frames
+        self.phrase = None
+        self.voiced_frames = self.quiet_frames = 0
+        if voiced_frames < self.min_phrase_frames:
+            return None
+        samples = array("h")
+        for frame in phrase:
+            samples.extend(frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples.tobytes()
+
+    def flush(self):
+        """End of stream: return the phrase in progress, if any"""
+        if self.phrase is None:
+            return None
+        return self.finish_phrase()
+
+
+class SpeechService(QObject):
+    """Recognizes speech on persistent worker threads.
+
+    Signals are delivered on the thread the service lives on (the GUI
+    thread): status for "Calibrating..." / "Listening..." / "Processing...",
+    then either recognized with the text or error with a message. In
+    continuous mode each phrase arrives through phrase_recognized, in the
+    order it was spoken, and capture_stopped fires once the last one is done.
+    """
+    status = pyqtSignal(str)
+    recognized = pyqtSignal(str)
+    phrase_recognized = pyqtSignal(str)
+    capture_stopped = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, source_factory=microphone_source, backend=None,
+                 timeout=5, phrase_time_limit=10, parent=None):
+        super().__init__(parent)
+        self.source_factory = source_factory
+        self.backend = backend or GoogleBackend()
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+
+        self.recognizer = None
+        self.calibrated_floor = None  # Background energy the threshold is based on
+        self.calibrations = 0
+        self.requests = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+
+        # Continuous capture: the worker captures, this thread recognizes
+        self.phrases = queue.Queue()
+        self.recognition_worker = None
+        self.stop_capture = threading.Event()
+
+    @property
+    def is_calibrated(self):
+        return self.calibrated_floor is not None
+
+    def set_backend(self, backend):
+        """Switch recognizer backends; takes effect from the next phrase"""
+        self.backend = backend
+
+    def start_worker(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name="speech", daemon=True)
+                self.worker.start()
+
+    def listen(self):
+        """Queue one listen-and-recognize request"""
+        self.start_worker()
+        self.requests.put("once")
+
+    def start_continuous(self):
+        """Capture and recognize phrases until stop_continuous() is called"""
+        with self.lock:
+            if self.recognition_worker is None:
+                self.recognition_worker = threading.Thread(
+                    target=self.run_recognition, name="speech-recognition", daemon=True)
+                self.recognition_worker.start()
+        self.start_worker()
+        self.stop_capture.clear()
+        self.requests.put("continuous")
+
+    def stop_continuous(self):
+        """Stop capturing; phrases already captured are still recognized"""
+        self.stop_capture.set()
+
+    def shutdown(self, wait=False):
+        """Stop the workers once queued requests are done"""
+        self.stop_capture.set()
+        self.requests.put(None)
+        if wait:
+            for thread in (self.worker, self.recognition_worker):
+                if thread is not None:
+                    thread.join()
+
+    def run(self):
+        # Imported on first use to keep it off the startup path
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            sr = None
+
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            if sr is None:
+                self.error.emit("Voice input requires the SpeechRecognition package")
+                if request == "continuous":
+                    self.capture_stopped.emit()
+            elif request == "continuous":
+                self.capture_continuous(sr)
+            else:
+                self.handle_request(sr)
+
+        if self.recognition_worker is not None:
+            self.phrases.put(None)
+
+    def handle_request(self, sr):
+        if self.recognizer is None:
+            self.recognizer = sr.Recognizer()
+
+        try:
+            with self.source_factory(sr) as source:
+                if self.is_calibrated:
+                    # listen() drifts the threshold with the speech it hears,
+                    # so each request starts again from the calibrated value
+                    self.recognizer.energy_threshold = self.calibrated_threshold()
+                else:
+                    self.status.emit("Calibrating...")
+                    self.calibrate(source)
+
+                self.status.emit("Listening...")
+                audio = self.recognizer.listen(source, timeout=self.timeout,
+                                               phrase_time_limit=self.phrase_time_limit)
+
+            self.status.emit("Processing...")
+            text = self.backend.recognize(self.recognizer, audio)
+            self.recognized.emit(text)
+        except sr.WaitTimeoutError:
+            self.error.emit("No speech detected")
+            return
+        except sr.UnknownValueError:
+            self.error.emit("Could not understand audio")
+            return
+        except sr.RequestError:
+            self.error.emit("Could not request results; check your network connection")
+            return
+        except Exception as e:
+            self.error.emit(f"Error: {str(e)}")
+            return
+
+        # The result is already out, so this costs the user nothing
+        self.check_drift(audio)
+
+    def capture_continuous(self, sr):
+        """Cut the source into phrases and queue them for the recognition thread"""
+        if self.recognizer is None:
+            self.recognizer = sr.Recognizer()
+
+        detector = None
+        try:
+            with self.source_factory(sr) as source:
+                if not self.is_calibrated:
+                    self.status.emit("Calibrating...")
+                    self.calibrate(source)
+                self.status.emit("Listening...")
+
+                sample_rate, sample_width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+                detector = VoiceActivityDetector(
+                    sample_rate, self.calibrated_floor / width_scale(sample_width),
+                    speech_ratio=self.recognizer.dynamic_energy_ratio,
+                    pause_seconds=self.recognizer.pause_threshold,
+                    max_phrase_seconds=self.phrase_time_limit)
+
+                while not self.stop_capture.is_set():
+                    buffer = source.stream.read(source.CHUNK)
+                    if not buffer:
+                        break  # End of an audio file
+                    if sample_width != 2:
+                        buffer = sr.AudioData(buffer, sample_rate, sample_width).get_raw_data(convert_width=2)
+                    for phrase in detector.feed(pcm16_samples(buffer)):
+                        self.phrases.put(sr.AudioData(phrase, sample_rate, 2))
+
+                phrase = detector.flush()
+                if phrase is not None:
+                    self.phrases.put(sr.AudioData(phrase, sample_rate, 2))
+        except Exception as e:
+            self.error.emit(f"Error: {str(e)}")
+
+        if detector is not None:
+            # Keep the floor the detector tracked for the next request
+            self.calibrated_floor = detector.noise_floor * width_scale(sample_width)
+        self.phrases.put("stopped")
+
+    def run_recognition(self):
+        """Recognize queued phrases in order while capture carries on"""
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            return  # The capture thread reports the missing package
+
+        request_error_reported = False
+        while True:
+            phrase = self.phrases.get()
+            if phrase is None:
+                break
+            if phrase == "stopped":
+                request_error_reported = False
+                self.capture_stopped.emit()
+                continue
+
+            try:
+                text = self.backend.recognize(self.recognizer, phrase)
+            except sr.UnknownValueError:
+                continue  # Noise or mumbling; nothing to add
+            except sr.RequestError:
+                # Report once per session rather than once per phrase
+                if not request_error_reported:
+                    request_error_reported = True
+                    self.error.emit("Could not request results; check your network connection")
+                continue
+            except Exception as e:
+                self.error.emit(f"Error: {str(e)}")
+                continue
+            if text:
+                self.phrase_recognized.emit(text)
+
+    def calibrated_threshold(self):
+        return max(self.calibrated_floor * self.recognizer.dynamic_energy_ratio, MIN_ENERGY_THRESHOLD)
+
+    def calibrate(self, source, duration=CALIBRATION_SECONDS):
+        """Measure ambient noise from the open source and set the energy threshold"""
+        self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+        self.calibrated_floor = self.recognizer.energy_threshold / self.recognizer.dynamic_energy_ratio
+        self.recognizer.energy_threshold = self.calibrated_threshold()
+        self.calibrations += 1
+
+    def check_drift(self, audio):
+        """Recalibrate from the phrase's leading noise if the floor has drifted"""
+        floor = noise_floor(audio)
+        if floor is None or not self.is_calibrated:
+            return
+        reference = max(self.calibrated_floor, 1.0)
+        if 1 / DRIFT_RATIO <= max(floor, 1.0) / reference <= DRIFT_RATIO:
+            return
+
+        self.calibrated_floor = floor
+        self.calibrations += 1
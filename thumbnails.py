@@ -0,0 +1,210 @@
+"""Off-thread thumbnail decoding with a disk cache and an in-memory LRU.
+
+Thumbnails are decoded and scaled on a QThreadPool with QImageReader, which
+can decode JPEGs directly at a reduced size. Results are written to a
+hashed on-disk cache keyed by source path, mtime, file size and target size,
+so later page loads skip decoding entirely. On the GUI thread the service
+keeps recently used QPixmaps in an LRU bounded by a byte budget, shared with
+the other image caches through global_pixmap_cache(). Widgets waiting for a
+thumbnail register for its key with notify(), so a finished decode only
+reaches the widgets that asked for it.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+THUMBNAIL_CACHE_DIR = os.path.join("cache", "thumbnails")
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024  # bytes of decoded pixmaps
+
+
+def thumbnail_key(image_path, size):
+    """Return the cache key for image_path scaled to size, or None if it's missing"""
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size.width()}x{size.height()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def pixmap_bytes(pixmap):
+    """Approximate memory used by a decoded pixmap"""
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapLRU:
+    """Least-recently-used QPixmap cache bounded by total decoded bytes"""
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.entries.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        if key in self.entries:
+            self.total_bytes -= pixmap_bytes(self.entries.pop(key))
+        self.entries[key] = pixmap
+        self.total_bytes += pixmap_bytes(pixmap)
+
+        # Evict oldest entries, but always keep the one just added
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= pixmap_bytes(evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+
+_global_pixmap_cache = None
+
+
+def global_pixmap_cache():
+    """Return the process-wide pixmap LRU, so every image cache shares one budget"""
+    global _global_pixmap_cache
+    if _global_pixmap_cache is None:
+        _global_pixmap_cache = PixmapLRU(DEFAULT_MEMORY_BUDGET)
+    return _global_pixmap_cache
+
+
+class ThumbnailTaskSignals(QObject):
+    # Cache key and the decoded image (null if decoding failed)
+    finished = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """Decode and scale one image, reading and filling the disk cache"""
+
+    def __init__(self, key, image_path, size, cache_dir):
+        super().__init__()
+        self.key = key
+        self.image_path = image_path
+        self.size = size
+        self.cache_dir = cache_dir
+        self.signals = ThumbnailTaskSignals()
+
+    def run(self):
+        cache_path = os.path.join(self.cache_dir, f"{self.key}.png")
+
+        image = QImage(cache_path) if os.path.exists(cache_path) else QImage()
+        if image.isNull():
+            image, was_scaled = self.decode()
+            # Sources already at or below the target size (such as pre-scaled
+            # image store variants) gain nothing from a second copy on disk
+            if not image.isNull() and was_scaled:
+                self.store(image, cache_path)
+
+        self.signals.finished.emit(self.key, image)
+
+    def decode(self):
+        """Decode the source at (or near) the target size; return (image, was_scaled)"""
+        reader = QImageReader(self.image_path)
+        reader.setAutoTransform(True)
+
+        source_size = reader.size()
+        was_scaled = False
+        if source_size.isValid() and (source_size.width() > self.size.width()
+                                      or source_size.height() > self.size.height()):
+            # Let the decoder downscale while reading where the format supports it
+            reader.setScaledSize(source_size.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio))
+            was_scaled = True
+
+        image = reader.read()
+        if image.isNull():
+            return image, False
+
+        if image.width() > self.size.width() or image.height() > self.size.height():
+            image = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+            was_scaled = True
+        return image, was_scaled
+
+    def store(self, image, cache_path):
+        """Write the thumbnail atomically so readers never see a partial file"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{id(self)}.tmp"
+            if image.save(temp_path, "PNG"):
+                os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+
+
+class ThumbnailService(QObject):
+    """Hands out thumbnails, decoding misses in the background.
+
+    request() returns a pixmap immediately on a memory hit. Otherwise it
+    queues a decode and thumbnail_ready fires on the GUI thread once the
+    pixmap is available; a null pixmap means the image couldn't be loaded.
+    Many widgets waiting at once (a page of recipe cards) should use
+    notify() instead of filtering every thumbnail_ready by key.
+    """
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+
+    _shared = None
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, memory_cache=None,
+                 thread_pool=None, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.memory_cache = memory_cache or global_pixmap_cache()
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.pending = {}
+        self.waiting = {}  # key -> [(receiver, slot)] to call when the key is ready
+
+    @classmethod
+    def shared(cls):
+        """Return the service shared by all recipe cards"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def request(self, image_path, size=QSize(250, 150)):
+        """Return (key, pixmap), where pixmap is None while a decode is pending"""
+        key = thumbnail_key(image_path, size)
+        if key is None:
+            return None, None
+
+        pixmap = self.memory_cache.get(key)
+        if pixmap is not None:
+            return key, pixmap
+
+        if key not in self.pending:
+            task = ThumbnailTask(key, image_path, QSize(size), self.cache_dir)
+            task.signals.finished.connect(self.handle_task_finished)
+            # Keep the signals object alive until the task reports back
+            self.pending[key] = task.signals
+            self.thread_pool.start(task)
+
+        return key, None
+
+    def notify(self, key, receiver, slot):
+        """Call slot(key, pixmap) once the pending thumbnail key is ready, unless receiver was deleted by then"""
+        self.waiting.setdefault(key, []).append((receiver, slot))
+
+    def handle_task_finished(self, key, image):
+        """Convert the decoded image to a pixmap on the GUI thread and publish it"""
+        self.pending.pop(key, None)
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        if not pixmap.isNull():
+            self.memory_cache.put(key, pixmap)
+        for receiver, slot in self.waiting.pop(key, ()):
+            if not sip.isdeleted(receiver):
+                slot(key, pixmap)
+        self.thumbnail_ready.emit(key, pixmap)